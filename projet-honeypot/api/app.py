@@ -4,15 +4,39 @@ API de collecte des menaces du Honeypot
 Reçoit, stocke et analyse les données d'attaques
 """
 
+import hmac
 import os
 import logging
-from datetime import datetime, timedelta
-from flask import Flask, request, jsonify
+import sys
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from flask import Flask, g, request, jsonify, send_from_directory
 from flask_sqlalchemy import SQLAlchemy
 from flask_cors import CORS
-from sqlalchemy import func
+from sqlalchemy import case, cast, func
 import json
 
+# Modules communs avec le honeypot (copiés à côté d'app.py dans l'image Docker)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'common'))
+
+from ip_lists import IPLists  # noqa: E402
+from profiles import upsert_profile  # noqa: E402
+from query_stats import QueryStats  # noqa: E402
+from sampling_profiler import MAX_INTERVAL, MIN_INTERVAL, ProfilerBusy, SamplingProfiler, profile_for  # noqa: E402
+from scoring import AnomalyScorer  # noqa: E402
+from snapshots import SnapshotCache  # noqa: E402
+from timeseries import (  # noqa: E402
+    DEFAULT_MAX_POINTS, MAX_POINTS_LIMIT, choose_resolution, fill_buckets, lttb, parse_resolution,
+    series_tail
+)
+from tracing import clock, latency_report, parse_trace  # noqa: E402
+
+try:
+    import orjson  # Sérialisation rapide (optionnelle)
+except ImportError:
+    orjson = None
+
 # Configuration
 app = Flask(__name__)
 app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get(
@@ -21,22 +45,43 @@ app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get(
 )
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'dev-secret-key')
+app.json.compact = True  # Pas d'indentation, même en mode debug
 
 # Extensions
 db = SQLAlchemy(app)
 CORS(app)  # Pour permettre les requêtes cross-origin
 
 # Logging
+LOG_DIR = os.environ.get('LOG_DIR', '/app/logs')
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
     handlers=[
-        logging.FileHandler('/app/logs/api.log'),
+        logging.FileHandler(os.path.join(LOG_DIR, 'api.log')),
         logging.StreamHandler()
     ]
 )
 logger = logging.getLogger('threat_api')
 
+# Scoring d'anomalies à l'ingestion (modèle exporté par ml_detector.py, rechargé à chaud)
+anomaly_scorer = AnomalyScorer(
+    os.environ.get('ANOMALY_MODEL_PATH', '/app/models/scoring_model.json')
+)
+
+
+# Plages exclues ou étiquetées (mêmes fichiers que le honeypot, rechargés à chaud)
+ip_lists = IPLists(os.environ.get('IP_LISTS_DIR', '/app/iplists'))
+
+
+# Chronométrage des requêtes SQL (requêtes lentes journalisées, EXPLAIN en option)
+query_stats = QueryStats(
+    slow_seconds=float(os.environ.get('SLOW_QUERY_MS', 100)) / 1000,
+    explain=os.environ.get('SLOW_QUERY_EXPLAIN', '').lower() in ('1', 'true', 'yes')
+)
+with app.app_context():
+    query_stats.install(db.engine)
+METRIC_SORTS = ('total_ms', 'count', 'mean_ms', 'p50_ms', 'p95_ms', 'max_ms', 'rows', 'slow')
+
 
 # Modèles
 class Threat(db.Model):
@@ -52,6 +97,9 @@ class Threat(db.Model):
     attack_type = db.Column(db.String(100), nullable=False)
     risk_score = db.Column(db.Integer, default=5)
     payload = db.Column(db.JSON)
+    anomaly_score = db.Column(db.Float)  # Score Isolation Forest (plus bas = plus anormal)
+    ip_tags = db.Column(db.JSON)  # Listes de plages contenant l'IP (voir ip_lists.py)
+    sample_rate = db.Column(db.Float)  # Échantillonnage du honeypot en surcharge (vide = 1)
     
     # Index pour les requêtes fréquentes
     __table_args__ = (
@@ -70,10 +118,34 @@ class Threat(db.Model):
             'attacker_port': self.attacker_port,
             'attack_type': self.attack_type,
             'risk_score': self.risk_score,
-            'payload': self.payload
+            'payload': self.payload,
+            'anomaly_score': self.anomaly_score,
+            'ip_tags': self.ip_tags,
+            'sample_rate': self.sample_rate
         }
 
 
+class ThreatTrace(db.Model):
+    """Horodatages (epoch, horloge monotone) des étapes d'une menace, de la capture à la publication"""
+    __tablename__ = 'threat_traces'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    threat_id = db.Column(db.Integer, db.ForeignKey('threats.id', ondelete='CASCADE'), nullable=False)
+    trace_id = db.Column(db.String(32), nullable=False)
+    honeypot_id = db.Column(db.String(50), nullable=False)
+    captured = db.Column(db.Float)
+    logged = db.Column(db.Float)
+    sent = db.Column(db.Float)
+    received = db.Column(db.Float, nullable=False)
+    committed = db.Column(db.Float)
+    published = db.Column(db.Float)
+    
+    __table_args__ = (
+        db.Index('idx_trace_threat', 'threat_id'),
+        db.Index('idx_trace_honeypot_received', 'honeypot_id', 'received'),
+    )
+
+
 class AttackerProfile(db.Model):
     """Profil des attaquants (IP uniques)"""
     __tablename__ = 'attacker_profiles'
@@ -97,6 +169,136 @@ class AttackerProfile(db.Model):
         }
 
 
+# Colonnes exposables via le paramètre ?fields=
+THREAT_FIELDS = (
+    'id', 'timestamp', 'honeypot_id', 'service', 'attacker_ip',
+    'attacker_port', 'attack_type', 'risk_score', 'payload', 'anomaly_score', 'ip_tags',
+    'sample_rate'
+)
+ATTACKER_FIELDS = (
+    'ip_address', 'first_seen', 'last_seen', 'total_attacks', 'risk_level', 'country'
+)
+
+# Colonnes renvoyées par /api/dashboard (mêmes que CONFIG.FEED_FIELDS / ATTACKER_FIELDS du dashboard)
+DASHBOARD_THREAT_FIELDS = ('id', 'timestamp', 'service', 'attacker_ip', 'attack_type', 'risk_score')
+DASHBOARD_ATTACKER_FIELDS = ('ip_address', 'total_attacks', 'risk_level', 'country')
+
+# Agrégats du dashboard partagés entre onglets, recalculés une fois par version
+dashboard_cache = SnapshotCache()
+
+
+def requested_fields(allowed):
+    """Lit le paramètre ?fields= (liste séparée par des virgules)
+
+    Retourne None si aucun champ n'est demandé (objet complet),
+    lève ValueError si un champ inconnu est demandé.
+    """
+    raw = request.args.get('fields')
+    if not raw:
+        return None
+    
+    fields = list(dict.fromkeys(f.strip() for f in raw.split(',') if f.strip()))
+    unknown = [f for f in fields if f not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return fields or None
+
+
+def project_query(query, model, fields):
+    """Restreint le SELECT aux colonnes demandées (le payload n'est lu que s'il est demandé)"""
+    return query.with_entities(*[getattr(model, f) for f in fields])
+
+
+def _json_default(value):
+    """Sérialise les types non natifs (dates) pour le fallback json"""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def fast_jsonify(data, status=200):
+    """Réponse JSON compacte écrite directement en bytes
+
+    Utilise orjson si disponible, sinon json avec des séparateurs compacts.
+    Les datetime naïfs sont sérialisés comme datetime.isoformat().
+    """
+    if orjson is not None:
+        body = orjson.dumps(data)
+    else:
+        body = json.dumps(data, separators=(',', ':'), default=_json_default).encode('utf-8')
+    return app.response_class(body, status=status, mimetype='application/json')
+
+
+# Profilage à la demande: routes /api/admin/* et en-tête X-Profile, désactivés sans ADMIN_TOKEN
+ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN')
+PROFILE_DIR = os.environ.get('PROFILE_DIR', os.path.join(LOG_DIR, 'profiles'))
+MAX_PROFILE_SECONDS = 120
+
+
+def profile_interval(value, default_ms):
+    """Intervalle d'échantillonnage (secondes) depuis une valeur en ms; None si invalide"""
+    try:
+        interval = float(value) / 1000 if value is not None else default_ms / 1000
+    except ValueError:
+        return None
+    return interval if MIN_INTERVAL <= interval <= MAX_INTERVAL else None
+
+
+def is_admin():
+    """La requête porte-t-elle le jeton d'administration (en-tête X-Admin-Token) ?"""
+    token = request.headers.get('X-Admin-Token', '')
+    return bool(ADMIN_TOKEN) and hmac.compare_digest(token.encode(), ADMIN_TOKEN.encode())
+
+
+@app.before_request
+def start_request_profile():
+    """X-Profile: 1 (avec X-Admin-Token): échantillonne le thread de cette requête"""
+    if request.headers.get('X-Profile') and is_admin():
+        interval = profile_interval(request.headers.get('X-Profile-Interval-Ms'), 1)
+        if interval is None:
+            return jsonify({
+                'status': 'error',
+                'message': f"X-Profile-Interval-Ms must be in [{MIN_INTERVAL * 1000:g}, {MAX_INTERVAL * 1000:g}]"
+            }), 400
+        g.profiler = SamplingProfiler(interval, thread_ids=[threading.get_ident()]).start()
+
+
+@app.after_request
+def finish_request_profile(response):
+    """Écrit le profil de la requête dans PROFILE_DIR, nommé dans l'en-tête X-Profile-Id"""
+    profiler = g.pop('profiler', None)
+    if profiler is None:
+        return response
+    profiler.stop()
+    name = f"{request.endpoint or 'request'}-{datetime.utcnow():%Y%m%dT%H%M%S%f}.folded"
+    try:
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        with open(os.path.join(PROFILE_DIR, name), 'w', encoding='utf-8') as f:
+            f.write(profiler.collapsed())
+    except OSError as e:
+        logger.error(f"Failed to write request profile: {e}")
+        return response
+    response.headers['X-Profile-Id'] = name
+    response.headers['X-Profile-Samples'] = str(profiler.samples)
+    return response
+
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+    query_stats.begin_request()
+
+
+@app.after_request
+def record_request_latency(response):
+    """Latence par route (modèle d'URL, pas l'URL: /api/threats/<int:threat_id>)"""
+    started = g.pop('request_started', None)
+    if started is not None:
+        rule = request.url_rule.rule if request.url_rule else '(aucune route)'
+        query_stats.end_request(f"{request.method} {rule}", response.status_code, time.perf_counter() - started)
+    return response
+
+
 # Routes API
 @app.route('/health', methods=['GET'])
 def health_check():
@@ -107,6 +309,7 @@ def health_check():
 @app.route('/api/threats', methods=['POST'])
 def create_threat():
     """Enregistre une nouvelle menace détectée par le honeypot"""
+    received = clock()
     try:
         data = request.json
         
@@ -119,42 +322,34 @@ def create_threat():
             attacker_port=data.get('attacker_port'),
             attack_type=data['attack_type'],
             risk_score=data.get('risk_score', 5),
-            payload=data.get('payload', {})
+            payload=data.get('payload', {}),
+            ip_tags=ip_tags_for(data),
+            sample_rate=parse_sample_rate(data)
         )
         
-        # Mettre à jour le profil de l'attaquant
-        attacker = AttackerProfile.query.filter_by(ip_address=data['attacker_ip']).first()
-        if not attacker:
-            attacker = AttackerProfile(
-                ip_address=data['attacker_ip'],
-                first_seen=datetime.utcnow(),
-                last_seen=datetime.utcnow(),
-                total_attacks=0,
-                risk_level='low'
-            )
-            db.session.add(attacker)
-            db.session.flush()  # Pour s'assurer que l'objet est créé
-        
-        # Mettre à jour les infos de l'attaquant
-        attacker.last_seen = datetime.utcnow()
-        attacker.total_attacks = (attacker.total_attacks or 0) + 1  # Gérer le cas où c'est None
-        
-        # Ajuster le niveau de risque
-        if attacker.total_attacks > 100:
-            attacker.risk_level = 'critical'
-        elif attacker.total_attacks > 50:
-            attacker.risk_level = 'high'
-        elif attacker.total_attacks > 10:
-            attacker.risk_level = 'medium'
+        # Scorer la menace avec le dernier modèle d'anomalies disponible
+        try:
+            threat.anomaly_score, is_anomaly = anomaly_scorer.score(data)
+        except Exception as e:
+            logger.error(f"Anomaly scoring failed: {e}")
+            is_anomaly = False
         
+        # Mettre à jour le profil de l'attaquant (upsert atomique, niveau de risque compris)
         db.session.add(threat)
+        upsert_profile(db.session, threat)
         db.session.commit()
+        committed = clock()
         
         logger.info(f"Threat recorded: {data['attacker_ip']} - {data['attack_type']}")
         
         # Vérifier si une alerte doit être déclenchée
         if threat.risk_score >= 8:
             trigger_alert(threat)
+        elif is_anomaly:
+            trigger_alert(threat, reason=f"anomalie détectée (modèle v{anomaly_scorer.version})")
+        
+        # La menace est visible et les alertes parties: fin du pipeline
+        record_trace(threat, data, received, committed, clock())
         
         return jsonify({
             'status': 'success',
@@ -168,6 +363,47 @@ def create_threat():
         return jsonify({'status': 'error', 'message': str(e)}), 500
 
 
+def parse_sample_rate(data):
+    """Taux d'échantillonnage envoyé par le honeypot, None hors de ]0, 1[ (pas d'échantillonnage)"""
+    try:
+        rate = float(data.get('sample_rate', 1))
+    except (TypeError, ValueError):
+        return None
+    return rate if 0 < rate < 1 else None
+
+
+def ip_tags_for(data):
+    """Étiquettes des listes de l'API, réunies avec celles posées par le honeypot"""
+    tags = set()
+    if isinstance(data.get('ip_tags'), list):
+        tags.update(str(tag) for tag in data['ip_tags'])
+    listed = ip_lists.match(data['attacker_ip'])
+    if listed:
+        tags.update(listed.tags)
+    return sorted(tags) or None
+
+
+def record_trace(threat, data, received, committed, published):
+    """Persiste les étapes d'une menace tracée (sans faire échouer l'ingestion)"""
+    trace_id, stages = parse_trace(data)
+    if trace_id is None:
+        return
+    try:
+        db.session.add(ThreatTrace(
+            threat_id=threat.id,
+            trace_id=trace_id,
+            honeypot_id=threat.honeypot_id,
+            received=received,
+            committed=committed,
+            published=published,
+            **stages
+        ))
+        db.session.commit()
+    except Exception as e:
+        logger.error(f"Error recording trace {trace_id}: {e}")
+        db.session.rollback()
+
+
 @app.route('/api/threats', methods=['GET'])
 def get_threats():
     """Récupère les menaces avec filtres optionnels"""
@@ -176,12 +412,19 @@ def get_threats():
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 20, type=int)
         
+        # Projection des colonnes
+        try:
+            fields = requested_fields(THREAT_FIELDS)
+        except ValueError as e:
+            return jsonify({'status': 'error', 'message': str(e)}), 400
+        
         # Filtres
         service = request.args.get('service')
         attack_type = request.args.get('attack_type')
         attacker_ip = request.args.get('attacker_ip')
         start_date = request.args.get('start_date')
         end_date = request.args.get('end_date')
+        since_id = request.args.get('since_id', type=int)
         
         # Construire la requête
         query = Threat.query
@@ -197,14 +440,39 @@ def get_threats():
         if end_date:
             query = query.filter(Threat.timestamp <= datetime.fromisoformat(end_date))
         
-        # Ordonner par timestamp décroissant
-        query = query.order_by(Threat.timestamp.desc())
+        if since_id is not None:
+            # Synchronisation incrémentale: ids croissants après le watermark
+            query = query.filter(Threat.id > since_id).order_by(Threat.id.asc())
+        else:
+            # Ordonner par timestamp décroissant
+            query = query.order_by(Threat.timestamp.desc())
+        
+        if fields:
+            query = project_query(query, Threat, fields)
+        
+        if since_id is not None:
+            # Pagination par clé (since_id = dernier id reçu): ni COUNT(*) ni OFFSET à chaque page
+            rows = query.limit(per_page + 1).all()
+            if fields:
+                items = [dict(zip(fields, row)) for row in rows[:per_page]]
+            else:
+                items = [t.to_dict() for t in rows[:per_page]]
+            return fast_jsonify({
+                'threats': items,
+                'per_page': per_page,
+                'has_more': len(rows) > per_page
+            })
         
         # Paginer
         threats = query.paginate(page=page, per_page=per_page, error_out=False)
         
-        return jsonify({
-            'threats': [t.to_dict() for t in threats.items],
+        if fields:
+            items = [dict(zip(fields, row)) for row in threats.items]
+        else:
+            items = [t.to_dict() for t in threats.items]
+        
+        return fast_jsonify({
+            'threats': items,
             'total': threats.total,
             'page': page,
             'per_page': per_page,
@@ -223,69 +491,305 @@ def get_threat(threat_id):
     return jsonify(threat.to_dict())
 
 
+def threat_weight():
+    """Poids d'une menace: 1 / taux d'échantillonnage du honeypot (1 sans délestage)"""
+    return 1.0 / func.coalesce(Threat.sample_rate, 1.0)
+
+
+def weighted_count():
+    """Nombre de menaces repondéré (estimation du trafic réel pendant le délestage)"""
+    return cast(func.round(func.sum(threat_weight())), db.Integer)
+
+
+def weighted_avg_risk():
+    return func.sum(Threat.risk_score * threat_weight()) / func.sum(threat_weight())
+
+
+def compute_stats(hours):
+    """Statistiques globales des `hours` dernières heures (comptes repondérés)"""
+    since = datetime.utcnow() - timedelta(hours=hours)
+    
+    # Stats globales
+    total_threats = db.session.query(weighted_count())\
+        .filter(Threat.timestamp >= since).scalar() or 0
+    unique_attackers = db.session.query(func.count(func.distinct(Threat.attacker_ip)))\
+        .filter(Threat.timestamp >= since).scalar()
+    
+    # Top 5 des types d'attaques
+    top_attacks = db.session.query(
+        Threat.attack_type, 
+        weighted_count().label('count')
+    ).filter(Threat.timestamp >= since)\
+     .group_by(Threat.attack_type)\
+     .order_by(weighted_count().desc())\
+     .limit(5).all()
+    
+    # Top 5 des IP attaquantes
+    top_ips = db.session.query(
+        Threat.attacker_ip,
+        weighted_count().label('count')
+    ).filter(Threat.timestamp >= since)\
+     .group_by(Threat.attacker_ip)\
+     .order_by(weighted_count().desc())\
+     .limit(5).all()
+    
+    # Distribution par service
+    service_dist = db.session.query(
+        Threat.service,
+        weighted_count().label('count')
+    ).filter(Threat.timestamp >= since)\
+     .group_by(Threat.service).all()
+    
+    # Score de risque moyen
+    avg_risk = db.session.query(weighted_avg_risk())\
+        .filter(Threat.timestamp >= since).scalar() or 0
+    
+    return {
+        'period_hours': hours,
+        'total_threats': total_threats,
+        'unique_attackers': unique_attackers,
+        'average_risk_score': round(float(avg_risk), 2),
+        'top_attack_types': [
+            {'type': attack, 'count': count} 
+            for attack, count in top_attacks
+        ],
+        'top_attackers': [
+            {'ip': ip, 'count': count}
+            for ip, count in top_ips
+        ],
+        'service_distribution': [
+            {'service': service, 'count': count}
+            for service, count in service_dist
+        ]
+    }
+
+
 @app.route('/api/stats', methods=['GET'])
 def get_stats():
     """Statistiques globales sur les menaces"""
     try:
         # Période (dernières 24h par défaut)
         hours = request.args.get('hours', 24, type=int)
-        since = datetime.utcnow() - timedelta(hours=hours)
-        
-        # Stats globales
-        total_threats = Threat.query.filter(Threat.timestamp >= since).count()
-        unique_attackers = db.session.query(func.count(func.distinct(Threat.attacker_ip)))\
-            .filter(Threat.timestamp >= since).scalar()
-        
-        # Top 5 des types d'attaques
-        top_attacks = db.session.query(
-            Threat.attack_type, 
-            func.count(Threat.id).label('count')
-        ).filter(Threat.timestamp >= since)\
-         .group_by(Threat.attack_type)\
-         .order_by(func.count(Threat.id).desc())\
-         .limit(5).all()
-        
-        # Top 5 des IP attaquantes
-        top_ips = db.session.query(
-            Threat.attacker_ip,
-            func.count(Threat.id).label('count')
-        ).filter(Threat.timestamp >= since)\
-         .group_by(Threat.attacker_ip)\
-         .order_by(func.count(Threat.id).desc())\
-         .limit(5).all()
-        
-        # Distribution par service
-        service_dist = db.session.query(
-            Threat.service,
-            func.count(Threat.id).label('count')
-        ).filter(Threat.timestamp >= since)\
-         .group_by(Threat.service).all()
-        
-        # Score de risque moyen
-        avg_risk = db.session.query(func.avg(Threat.risk_score))\
-            .filter(Threat.timestamp >= since).scalar() or 0
+        return jsonify(compute_stats(hours))
+        
+    except Exception as e:
+        logger.error(f"Error calculating stats: {e}")
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+
+@app.route('/api/traces/latency', methods=['GET'])
+def get_trace_latency():
+    """Percentiles de latence par étape du pipeline et par honeypot"""
+    try:
+        hours = request.args.get('hours', 1, type=float)
+        honeypot_id = request.args.get('honeypot_id')
+        limit = min(request.args.get('limit', 100_000, type=int), 1_000_000)
+        
+        query = db.session.query(
+            ThreatTrace.honeypot_id, ThreatTrace.captured, ThreatTrace.logged, ThreatTrace.sent,
+            ThreatTrace.received, ThreatTrace.committed, ThreatTrace.published
+        ).filter(ThreatTrace.received >= clock() - hours * 3600)
+        if honeypot_id:
+            query = query.filter(ThreatTrace.honeypot_id == honeypot_id)
+        # Les traces les plus récentes d'abord si la limite est atteinte
+        rows = query.order_by(ThreatTrace.received.desc()).limit(limit).all()
         
         return jsonify({
             'period_hours': hours,
-            'total_threats': total_threats,
-            'unique_attackers': unique_attackers,
-            'average_risk_score': round(float(avg_risk), 2),
-            'top_attack_types': [
-                {'type': attack, 'count': count} 
-                for attack, count in top_attacks
-            ],
-            'top_attackers': [
-                {'ip': ip, 'count': count}
-                for ip, count in top_ips
-            ],
-            'service_distribution': [
-                {'service': service, 'count': count}
-                for service, count in service_dist
+            'traces': len(rows),
+            'honeypots': latency_report(rows)
+        })
+        
+    except Exception as e:
+        logger.error(f"Error computing trace latency: {e}")
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+
+# Regroupements possibles des séries temporelles (?group_by=)
+TIMESERIES_GROUPS = {
+    'service': lambda: Threat.service,
+    'attack_type': lambda: Threat.attack_type,
+    # Mêmes seuils que le dashboard (CONFIG.RISK_LEVELS)
+    'risk_level': lambda: case(
+        (Threat.risk_score <= 3, 'low'),
+        (Threat.risk_score <= 6, 'medium'),
+        (Threat.risk_score <= 8, 'high'),
+        else_='critical'
+    )
+}
+
+
+def epoch_bucket(column, resolution):
+    """Numéro de bucket (secondes epoch // résolution) calculé par la base"""
+    if db.engine.dialect.name == 'postgresql':
+        seconds = func.floor(func.extract('epoch', column))
+    else:
+        seconds = func.strftime('%s', column)
+    return cast(seconds, db.BigInteger) // resolution
+
+
+def compute_timeseries(hours, group_by=None, resolution='auto', max_points=DEFAULT_MAX_POINTS):
+    """Nombre de menaces (repondéré) et risque moyen par bucket de temps (ValueError si paramètre invalide)"""
+    if hours < 1:
+        raise ValueError('hours must be at least 1')
+    if group_by and group_by not in TIMESERIES_GROUPS:
+        raise ValueError(f"Unknown group_by: {group_by} ({', '.join(TIMESERIES_GROUPS)})")
+    max_points = min(max(max_points, 3), MAX_POINTS_LIMIT)
+    requested = parse_resolution(resolution)
+    
+    now = datetime.utcnow()
+    since = now - timedelta(hours=hours)
+    resolution = choose_resolution(hours * 3600, max_points, requested)
+    
+    # Agrégation dans la base: une ligne par (bucket, groupe)
+    columns = [epoch_bucket(Threat.timestamp, resolution).label('bucket')]
+    if group_by:
+        columns.append(TIMESERIES_GROUPS[group_by]().label('key'))
+    rows = db.session.query(
+        *columns, weighted_count(), weighted_avg_risk()
+    ).filter(Threat.timestamp >= since).group_by(*columns).all()
+    if not group_by:
+        rows = [(bucket, 'total', count, avg_risk) for bucket, count, avg_risk in rows]
+    
+    first = int(since.replace(tzinfo=timezone.utc).timestamp()) // resolution
+    last = int(now.replace(tzinfo=timezone.utc).timestamp()) // resolution
+    series = []
+    downsampled = False
+    for key, points in fill_buckets(rows, first, last).items():
+        total = sum(point[1] for point in points)
+        if len(points) > max_points:
+            points = lttb(points, max_points)
+            downsampled = True
+        series.append({
+            'key': key,
+            'total': total,
+            'points': [
+                {
+                    't': datetime.utcfromtimestamp(bucket * resolution).isoformat(),
+                    'count': count,
+                    'avg_risk': round(float(avg_risk), 2) if avg_risk is not None else None
+                }
+                for bucket, count, avg_risk in points
             ]
         })
+    series.sort(key=lambda s: s['total'], reverse=True)
+    
+    return {
+        'period_hours': hours,
+        'resolution': resolution,
+        'group_by': group_by,
+        'downsampled': downsampled,
+        'series': series
+    }
+
+
+@app.route('/api/stats/timeseries', methods=['GET'])
+def get_stats_timeseries():
+    """Séries temporelles pour les graphiques (buckets SQL, sous-échantillonnage LTTB)"""
+    try:
+        try:
+            data = compute_timeseries(
+                request.args.get('hours', 24, type=int),
+                request.args.get('group_by'),
+                request.args.get('resolution', 'auto'),
+                request.args.get('max_points', DEFAULT_MAX_POINTS, type=int)
+            )
+        except ValueError as e:
+            return jsonify({'status': 'error', 'message': str(e)}), 400
+        return fast_jsonify(data)
         
     except Exception as e:
-        logger.error(f"Error calculating stats: {e}")
+        logger.error(f"Error computing timeseries: {e}")
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+
+def dashboard_sections(hours, chart_hours, attackers_limit):
+    """Agrégats du dashboard (hors flux de menaces)"""
+    attackers = project_query(
+        AttackerProfile.query.order_by(AttackerProfile.total_attacks.desc()),
+        AttackerProfile, DASHBOARD_ATTACKER_FIELDS
+    ).limit(attackers_limit).all()
+    return {
+        'stats': compute_stats(hours),
+        'attackers': [dict(zip(DASHBOARD_ATTACKER_FIELDS, row)) for row in attackers],
+        'timeline': compute_timeseries(chart_hours),
+        'trends': compute_timeseries(chart_hours, 'risk_level')
+    }
+
+
+def parse_dashboard_version(value):
+    """(id, révision) d'une version "<id>:<révision>"; un id seul (ancien client) vaut révision 0"""
+    if not value:
+        return None
+    max_id, _, revision = value.partition(':')
+    try:
+        return int(max_id), int(revision or 0)
+    except ValueError:
+        return None
+
+
+@app.route('/api/dashboard', methods=['GET'])
+def get_dashboard():
+    """Tout ce qu'affiche le dashboard en une requête
+
+    La version est "<plus grand id de menace>:<révision des agrégats>": les
+    fenêtres glissantes sont recalculées toutes les SNAPSHOT_TTL secondes même
+    sans nouvelle menace. Avec ?since_version=, seules les menaces plus
+    récentes et les sections modifiées depuis sont renvoyées (rien d'autre que
+    la version si rien n'a changé); les séries ne contiennent alors que les
+    buckets à partir de la plus ancienne nouvelle menace (partial_from).
+    """
+    try:
+        hours = request.args.get('hours', 24, type=int)
+        chart_hours = request.args.get('chart_hours', hours, type=int)
+        feed_limit = min(request.args.get('feed', 20, type=int), 100)
+        attackers_limit = min(request.args.get('attackers', 10, type=int), 100)
+        since_version = parse_dashboard_version(request.args.get('since_version'))
+        
+        if hours < 1 or chart_hours < 1:
+            return jsonify({'status': 'error', 'message': 'hours must be at least 1'}), 400
+        
+        max_id = db.session.query(func.max(Threat.id)).scalar() or 0
+        revision, sections = dashboard_cache.get(
+            (hours, chart_hours, attackers_limit), max_id,
+            lambda: dashboard_sections(hours, chart_hours, attackers_limit)
+        )
+        version = f"{max_id}:{revision}"
+        # Version inconnue (base réinitialisée...): instantané complet
+        if since_version is not None and since_version[0] > max_id:
+            since_version = None
+        if since_version is not None:
+            since_id, since_revision = since_version
+            if since_id == max_id and all(changed_at <= since_revision for _, changed_at in sections.values()):
+                return fast_jsonify({'version': version, 'changed': False})
+        
+        query = project_query(Threat.query, Threat, DASHBOARD_THREAT_FIELDS)
+        if since_version is not None:
+            query = query.filter(Threat.id > since_id)
+        threats = query.order_by(Threat.id.desc()).limit(feed_limit).all()
+        
+        response = {
+            'version': version,
+            'changed': True,
+            'full': since_version is None,
+            'threats': [dict(zip(DASHBOARD_THREAT_FIELDS, row)) for row in threats]
+        }
+        if since_version is not None:
+            oldest_new = db.session.query(func.min(Threat.timestamp))\
+                .filter(Threat.id > since_id).scalar()
+        for name, (content, changed_at) in sections.items():
+            if since_version is not None and changed_at <= since_revision:
+                continue
+            # Série recalculée sans nouvelle menace (fenêtre glissée): envoyée entière
+            if since_version is not None and oldest_new is not None and name in ('timeline', 'trends') \
+                    and not content['downsampled']:
+                content = series_tail(content, oldest_new)
+            response[name] = content
+        
+        return fast_jsonify(response)
+        
+    except Exception as e:
+        logger.error(f"Error building dashboard snapshot: {e}")
         return jsonify({'status': 'error', 'message': str(e)}), 500
 
 
@@ -297,6 +801,11 @@ def get_attackers():
         per_page = request.args.get('per_page', 20, type=int)
         risk_level = request.args.get('risk_level')
         
+        try:
+            fields = requested_fields(ATTACKER_FIELDS)
+        except ValueError as e:
+            return jsonify({'status': 'error', 'message': str(e)}), 400
+        
         query = AttackerProfile.query
         
         if risk_level:
@@ -305,10 +814,18 @@ def get_attackers():
         # Ordonner par nombre d'attaques décroissant
         query = query.order_by(AttackerProfile.total_attacks.desc())
         
+        if fields:
+            query = project_query(query, AttackerProfile, fields)
+        
         attackers = query.paginate(page=page, per_page=per_page, error_out=False)
         
-        return jsonify({
-            'attackers': [a.to_dict() for a in attackers.items],
+        if fields:
+            items = [dict(zip(fields, row)) for row in attackers.items]
+        else:
+            items = [a.to_dict() for a in attackers.items]
+        
+        return fast_jsonify({
+            'attackers': items,
             'total': attackers.total,
             'page': page,
             'per_page': per_page,
@@ -334,8 +851,61 @@ def test_alert():
     })
 
 
-def trigger_alert(threat):
-    """Déclenche une alerte pour une menace critique"""
+@app.route('/api/admin/profile', methods=['POST'])
+def profile_api():
+    """Profil de tous les threads de l'API pendant ?seconds= (collapsed stacks)"""
+    if not is_admin():
+        return jsonify({'status': 'error', 'message': 'Admin token required'}), 403
+    try:
+        seconds = float(request.args.get('seconds', 10))
+    except ValueError:
+        seconds = None
+    interval = profile_interval(request.args.get('interval_ms'), 5)
+    if seconds is None or not 0 < seconds <= MAX_PROFILE_SECONDS or interval is None:
+        return jsonify({
+            'status': 'error',
+            'message': f"seconds must be in ]0, {MAX_PROFILE_SECONDS}] and interval_ms in "
+                       f"[{MIN_INTERVAL * 1000:g}, {MAX_INTERVAL * 1000:g}]"
+        }), 400
+    try:
+        profiler = profile_for(seconds, interval)
+    except ProfilerBusy as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 409
+    return app.response_class(profiler.collapsed(), mimetype='text/plain',
+                              headers={'X-Profile-Samples': str(profiler.samples)})
+
+
+@app.route('/api/admin/profiles/<name>', methods=['GET'])
+def get_request_profile(name):
+    """Profil d'une requête (X-Profile-Id)"""
+    if not is_admin():
+        return jsonify({'status': 'error', 'message': 'Admin token required'}), 403
+    return send_from_directory(PROFILE_DIR, name, mimetype='text/plain')
+
+
+@app.route('/api/admin/metrics', methods=['GET'])
+def get_metrics():
+    """Requêtes SQL par forme (?sort=total_ms|count|p95_ms...&limit=) et latence par route"""
+    if not is_admin():
+        return jsonify({'status': 'error', 'message': 'Admin token required'}), 403
+    sort = request.args.get('sort', 'total_ms')
+    if sort not in METRIC_SORTS:
+        return jsonify({'status': 'error', 'message': f"sort must be one of {', '.join(METRIC_SORTS)}"}), 400
+    limit = min(max(request.args.get('limit', 50, type=int), 1), 500)
+    return jsonify(query_stats.report(sort, limit))
+
+
+@app.route('/api/admin/metrics', methods=['DELETE'])
+def reset_metrics():
+    """Remet les compteurs à zéro (avant une mesure)"""
+    if not is_admin():
+        return jsonify({'status': 'error', 'message': 'Admin token required'}), 403
+    query_stats.reset()
+    return jsonify({'status': 'success'})
+
+
+def trigger_alert(threat, reason=None):
+    """Déclenche une alerte pour une menace critique ou anormale"""
     alert_message = (
         f"🚨 ALERTE CRITIQUE 🚨\n"
         f"Type: {threat.attack_type}\n"
@@ -344,6 +914,11 @@ def trigger_alert(threat):
         f"Score de risque: {threat.risk_score}/10\n"
         f"Timestamp: {threat.timestamp}"
     )
+    if threat.anomaly_score is not None:
+        alert_message += f"\nScore d'anomalie: {threat.anomaly_score:.3f}"
+    if reason:
+        alert_message += f"\nRaison: {reason}"
+
     logger.critical(alert_message)
     # Ici vous pourriez ajouter l'envoi d'email, webhook, etc.
 
@@ -358,5 +933,5 @@ with app.app_context():
 
 
 if __name__ == '__main__':
-    os.makedirs('/app/logs', exist_ok=True)
+    os.makedirs(LOG_DIR, exist_ok=True)
     app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
@@ -15,7 +15,7 @@ class Config:
     
     # API
     JSON_SORT_KEYS = False
-    JSONIFY_PRETTYPRINT_REGULAR = True
+    JSONIFY_PRETTYPRINT_REGULAR = False
     
     # Pagination
     DEFAULT_PAGE_SIZE = 20
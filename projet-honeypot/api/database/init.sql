@@ -11,6 +11,9 @@ CREATE TABLE IF NOT EXISTS threats (
     attack_type VARCHAR(100) NOT NULL,
     risk_score INTEGER DEFAULT 5,
     payload JSONB,
+    anomaly_score REAL,
+    ip_tags JSONB,
+    sample_rate REAL,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
@@ -25,12 +28,28 @@ CREATE TABLE IF NOT EXISTS attacker_profiles (
     notes TEXT
 );
 
+-- Traçage de bout en bout (horodatages epoch des étapes, voir api/tracing.py)
+CREATE TABLE IF NOT EXISTS threat_traces (
+    id SERIAL PRIMARY KEY,
+    threat_id INTEGER NOT NULL REFERENCES threats(id) ON DELETE CASCADE,
+    trace_id VARCHAR(32) NOT NULL,
+    honeypot_id VARCHAR(50) NOT NULL,
+    captured DOUBLE PRECISION,
+    logged DOUBLE PRECISION,
+    sent DOUBLE PRECISION,
+    received DOUBLE PRECISION NOT NULL,
+    committed DOUBLE PRECISION,
+    published DOUBLE PRECISION
+);
+
 -- Index pour améliorer les performances
 CREATE INDEX IF NOT EXISTS idx_threats_timestamp ON threats(timestamp DESC);
 CREATE INDEX IF NOT EXISTS idx_threats_attacker_ip ON threats(attacker_ip);
 CREATE INDEX IF NOT EXISTS idx_threats_attack_type ON threats(attack_type);
 CREATE INDEX IF NOT EXISTS idx_threats_service ON threats(service);
 CREATE INDEX IF NOT EXISTS idx_threats_risk_score ON threats(risk_score);
+CREATE INDEX IF NOT EXISTS idx_trace_threat ON threat_traces(threat_id);
+CREATE INDEX IF NOT EXISTS idx_trace_honeypot_received ON threat_traces(honeypot_id, received);
 
 -- Vue pour les statistiques rapides
 CREATE OR REPLACE VIEW threat_stats_hourly AS
@@ -72,25 +91,8 @@ BEGIN
 END;
 $$ LANGUAGE plpgsql;
 
--- Trigger pour mettre à jour automatiquement last_seen dans attacker_profiles
-CREATE OR REPLACE FUNCTION update_attacker_profile()
-RETURNS TRIGGER AS $$
-BEGIN
-    INSERT INTO attacker_profiles (ip_address, total_attacks)
-    VALUES (NEW.attacker_ip, 1)
-    ON CONFLICT (ip_address)
-    DO UPDATE SET
-        last_seen = CURRENT_TIMESTAMP,
-        total_attacks = attacker_profiles.total_attacks + 1;
-    
-    RETURN NEW;
-END;
-$$ LANGUAGE plpgsql;
-
-CREATE TRIGGER threat_attacker_update
-AFTER INSERT ON threats
-FOR EACH ROW
-EXECUTE FUNCTION update_attacker_profile();
+-- Les profils d'attaquants sont tenus à jour par l'API (upsert par menace, voir
+-- api/profiles.py) et recalculés depuis threats par api/rebuild_profiles.py
 
 -- Données de test (optionnel, à commenter en production)
 
@@ -0,0 +1,112 @@
+"""
+Profils des attaquants (attacker_profiles) dérivés des menaces
+À l'ingestion, le profil de l'IP est mis à jour par un seul upsert atomique
+(INSERT ... ON CONFLICT): pas de lecture préalable, donc pas de conflit
+UNIQUE entre deux ingestions simultanées d'une nouvelle IP.
+
+La reconstruction recalcule tous les profils depuis threats, par tranches
+d'IPs triées: une agrégation ensembliste par tranche (INSERT ... SELECT ...
+GROUP BY ... ON CONFLICT DO UPDATE), seules les lignes qui changent sont
+réécrites. Sous PostgreSQL, les ingestions prennent un verrou consultatif
+partagé et chaque tranche le prend en exclusif: une menace est soit dans
+l'agrégat de la tranche, soit ajoutée au profil après elle, jamais perdue.
+SQLite sérialise déjà les écritures.
+
+Mêmes règles des deux côtés: une menace gardée au taux 1/8 par le honeypot
+compte 8, first_seen/last_seen sont les horodatages des menaces.
+"""
+
+from sqlalchemy import DateTime, Integer, String, bindparam, text
+
+# Verrou consultatif PostgreSQL ('prof') entre ingestions et reconstruction
+PROFILES_LOCK = 0x70726f66
+
+# Niveaux de risque selon le nombre d'attaques
+RISK_LEVEL_SQL = ("CASE WHEN {total} > 100 THEN 'critical' WHEN {total} > 50 THEN 'high' "
+                  "WHEN {total} > 10 THEN 'medium' ELSE 'low' END")
+
+# Poids d'une menace: 1 / sample_rate, arrondi comme à l'ingestion
+WEIGHT_SQL = "CAST(ROUND(1.0 / COALESCE(sample_rate, 1)) AS INTEGER)"
+
+UPSERT_SQL = text(f"""
+    INSERT INTO attacker_profiles (ip_address, first_seen, last_seen, total_attacks, risk_level)
+    VALUES (:ip, :seen, :seen, :weight, {RISK_LEVEL_SQL.format(total=':weight')})
+    ON CONFLICT (ip_address) DO UPDATE SET
+        first_seen = CASE WHEN attacker_profiles.first_seen <= excluded.first_seen
+                          THEN attacker_profiles.first_seen ELSE excluded.first_seen END,
+        last_seen = CASE WHEN attacker_profiles.last_seen >= excluded.last_seen
+                         THEN attacker_profiles.last_seen ELSE excluded.last_seen END,
+        total_attacks = COALESCE(attacker_profiles.total_attacks, 0) + excluded.total_attacks,
+        risk_level = {RISK_LEVEL_SQL.format(
+            total='(COALESCE(attacker_profiles.total_attacks, 0) + excluded.total_attacks)')}
+    RETURNING total_attacks
+""").bindparams(
+    bindparam('ip', type_=String), bindparam('seen', type_=DateTime), bindparam('weight', type_=Integer)
+)
+
+# Dernière IP d'une tranche de `size` IPs distinctes après `after`
+CHUNK_END_SQL = text("""
+    SELECT MAX(attacker_ip) FROM (
+        SELECT DISTINCT attacker_ip FROM threats
+        WHERE attacker_ip > :after ORDER BY attacker_ip LIMIT :size
+    ) chunk
+""")
+
+REBUILD_SQL = f"""
+    INSERT INTO attacker_profiles (ip_address, first_seen, last_seen, total_attacks, risk_level)
+    SELECT attacker_ip, MIN(timestamp), MAX(timestamp), SUM({WEIGHT_SQL}),
+           {RISK_LEVEL_SQL.format(total=f'SUM({WEIGHT_SQL})')}
+    FROM threats
+    WHERE attacker_ip > :after AND attacker_ip <= :upto
+    GROUP BY attacker_ip
+    ON CONFLICT (ip_address) DO UPDATE SET
+        first_seen = excluded.first_seen,
+        last_seen = excluded.last_seen,
+        total_attacks = excluded.total_attacks,
+        risk_level = excluded.risk_level
+    WHERE attacker_profiles.first_seen {{distinct}} excluded.first_seen
+       OR attacker_profiles.last_seen {{distinct}} excluded.last_seen
+       OR attacker_profiles.total_attacks {{distinct}} excluded.total_attacks
+       OR attacker_profiles.risk_level {{distinct}} excluded.risk_level
+"""
+
+# Profils sans menace dans la tranche (menaces purgées), supprimés avec --prune
+PRUNE_SQL = text("""
+    DELETE FROM attacker_profiles
+    WHERE ip_address > :after AND (:upto IS NULL OR ip_address <= :upto)
+      AND NOT EXISTS (SELECT 1 FROM threats WHERE threats.attacker_ip = attacker_profiles.ip_address)
+""")
+
+
+def _is_postgresql(connection):
+    return connection.dialect.name == 'postgresql'
+
+
+def upsert_profile(session, threat):
+    """Ajoute la menace au profil de son IP (créé au besoin); retourne le nouveau total"""
+    if _is_postgresql(session.connection()):
+        session.execute(text("SELECT pg_advisory_xact_lock_shared(:key)"), {'key': PROFILES_LOCK})
+    return session.execute(UPSERT_SQL, {
+        'ip': threat.attacker_ip,
+        'seen': threat.timestamp,
+        'weight': round(1 / (threat.sample_rate or 1))
+    }).scalar()
+
+
+def rebuild_chunk(connection, after, size, prune=False):
+    """Recalcule les profils des `size` IPs suivant `after`, dans la transaction en cours
+
+    Retourne (dernière IP de la tranche ou None en fin de table, profils réécrits).
+    """
+    postgresql = _is_postgresql(connection)
+    if postgresql:
+        # Attend les ingestions en cours; les suivantes attendent la fin de la tranche
+        connection.execute(text("SELECT pg_advisory_xact_lock(:key)"), {'key': PROFILES_LOCK})
+    upto = connection.execute(CHUNK_END_SQL, {'after': after, 'size': size}).scalar()
+    written = 0
+    if upto is not None:
+        statement = text(REBUILD_SQL.format(distinct='IS DISTINCT FROM' if postgresql else 'IS NOT'))
+        written = connection.execute(statement, {'after': after, 'upto': upto}).rowcount
+    if prune:
+        written += connection.execute(PRUNE_SQL, {'after': after, 'upto': upto}).rowcount
+    return upto, written
@@ -0,0 +1,297 @@
+"""
+Mesure des requêtes SQL et des routes de l'API
+Des hooks d'événements SQLAlchemy chronomètrent chaque requête. Les mesures
+sont agrégées par requête normalisée (valeurs littérales et paramètres
+remplacés par ?, listes IN réduites): nombre d'exécutions, temps total,
+p50/p95/max et lignes. Les requêtes plus lentes que le seuil sont
+journalisées avec la forme de leurs paramètres (types et tailles, jamais les
+valeurs: les payloads viennent des attaquants) et, en option, leur plan
+d'exécution (EXPLAIN, au plus une fois par requête et par période).
+
+Les durées tiennent dans des histogrammes à classes géométriques: mémoire
+fixe quel que soit le trafic. Les percentiles sont interpolés dans leur
+classe: moins de 1 % d'écart mesuré sur des durées à longue traîne
+(benchmarks/bench_query_stats.py), 19 % au pire (largeur d'une classe).
+Les requêtes en erreur sont comptées à part (errors), hors histogramme.
+"""
+
+import logging
+import math
+import re
+import threading
+import time
+from datetime import datetime
+
+logger = logging.getLogger('threat_api.queries')
+
+# Classes de l'histogramme: de 10 µs à ~100 s, chacune 19 % plus large que la précédente
+HISTOGRAM_MIN = 1e-5
+HISTOGRAM_RATIO = 2 ** 0.25
+HISTOGRAM_BUCKETS = int(math.log(1e7, HISTOGRAM_RATIO)) + 2
+
+MAX_STATEMENTS = 500  # Au-delà, les nouvelles requêtes sont comptées ensemble
+OTHER_STATEMENTS = '(autres requêtes)'
+EXPLAIN_INTERVAL = 600.0  # Un plan par requête lente toutes les 10 min au plus
+
+_LITERALS = [
+    (re.compile(r"'(?:[^']|'')*'"), '?'),  # Chaînes
+    (re.compile(r"%\(\w+\)s|(?<!:):\w+|\$\d+|__\[POSTCOMPILE_\w+\]"), '?'),  # Paramètres nommés
+    (re.compile(r"\b\d+(?:\.\d+)?\b"), '?'),  # Nombres
+    (re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)"), '(?, ...)'),  # Listes IN
+    (re.compile(r"\s+"), ' '),
+]
+
+
+def normalize_statement(statement):
+    """SQL sans ses valeurs: une clé par forme de requête"""
+    for pattern, replacement in _LITERALS:
+        statement = pattern.sub(replacement, statement)
+    return statement.strip()[:2000]
+
+
+def _value_shape(value):
+    if value is None:
+        return 'null'
+    if isinstance(value, (str, bytes)):
+        return f"{type(value).__name__}({len(value)})"
+    return type(value).__name__
+
+
+def parameter_shape(parameters):
+    """Types et tailles des paramètres, sans les valeurs"""
+    if isinstance(parameters, (list, tuple)) and parameters and isinstance(parameters[0], (dict, list, tuple)):
+        return f"{len(parameters)} x {parameter_shape(parameters[0])}"  # executemany
+    if isinstance(parameters, dict):
+        return '{' + ', '.join(f"{key}: {_value_shape(value)}" for key, value in parameters.items()) + '}'
+    if isinstance(parameters, (list, tuple)):
+        return '(' + ', '.join(_value_shape(value) for value in parameters) + ')'
+    return _value_shape(parameters)
+
+
+class LatencyHistogram:
+    """Durées (secondes) réparties en classes géométriques"""
+
+    def __init__(self):
+        self.counts = [0] * HISTOGRAM_BUCKETS
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    @staticmethod
+    def upper_bound(index):
+        return HISTOGRAM_MIN * HISTOGRAM_RATIO ** index
+
+    def add(self, seconds):
+        if seconds <= HISTOGRAM_MIN:
+            index = 0
+        else:
+            index = min(HISTOGRAM_BUCKETS - 1, math.ceil(math.log(seconds / HISTOGRAM_MIN, HISTOGRAM_RATIO)))
+        self.counts[index] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def percentile(self, q):
+        """Percentile q (0-100), interpolé dans sa classe (échelle géométrique)"""
+        if not self.count:
+            return 0.0
+        rank = self.count * q / 100
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                low = self.upper_bound(index - 1) if index else 0.0
+                high = self.upper_bound(index)
+                fraction = (rank - seen) / count
+                value = low * (high / low) ** fraction if low else high * fraction
+                return min(value, self.max)
+            seen += count
+        return self.max
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'total_ms': round(self.total * 1000, 3),
+            'mean_ms': round(self.total / self.count * 1000, 3) if self.count else 0.0,
+            'p50_ms': round(self.percentile(50) * 1000, 3),
+            'p95_ms': round(self.percentile(95) * 1000, 3),
+            'max_ms': round(self.max * 1000, 3)
+        }
+
+    def buckets(self):
+        """Classes non vides: {borne supérieure en ms: nombre}"""
+        return {
+            f"{self.upper_bound(index) * 1000:.4g}": count
+            for index, count in enumerate(self.counts) if count
+        }
+
+
+class StatementStats:
+    def __init__(self):
+        self.latency = LatencyHistogram()
+        self.rows = 0
+        self.slow = 0
+        self.errors = 0
+
+    def to_dict(self, statement):
+        return {'statement': statement, **self.latency.summary(), 'rows': self.rows, 'slow': self.slow,
+                'errors': self.errors}
+
+
+class QueryStats:
+    """Agrégats par requête normalisée et par route, alimentés par les hooks d'un moteur SQLAlchemy
+
+    rows: lignes modifiées, ou renvoyées quand le pilote les connaît à
+    l'exécution (psycopg2 oui, sqlite3 non).
+    """
+
+    def __init__(self, slow_seconds=0.1, explain=False, max_statements=MAX_STATEMENTS):
+        self.slow_seconds = slow_seconds
+        self.explain = explain
+        self.max_statements = max_statements
+        self.statements = {}
+        self.routes = {}
+        self.started = time.time()
+        self._normalized = {}  # SQL brut -> normalisé (les requêtes compilées se répètent)
+        self._explained = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def install(self, engine):
+        from sqlalchemy import event
+        event.listen(engine, 'before_cursor_execute', self._before)
+        event.listen(engine, 'after_cursor_execute', self._after)
+        event.listen(engine, 'handle_error', self._error)
+
+    def _before(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+    def _after(self, conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info['query_start'].pop()
+        normalized = self._normalize(statement)
+        rows = max(cursor.rowcount, 0)
+        slow = elapsed >= self.slow_seconds
+        with self._lock:
+            stats = self._statement_stats(normalized)
+            stats.latency.add(elapsed)
+            stats.rows += rows
+            stats.slow += slow
+        self._count_in_request(elapsed)
+        if slow:
+            self._log_slow(conn, statement, normalized, parameters, elapsed, rows)
+
+    def _error(self, context):
+        """Requête en erreur: after_cursor_execute ne sera pas appelé, on dépile ici
+
+        Sans cela, chaque erreur laisserait une entrée dans query_start, qui
+        suit la connexion DBAPI dans le pool.
+        """
+        conn = context.connection
+        starts = conn.info.get('query_start') if conn is not None else None
+        if not starts or context.statement is None:
+            return  # Erreur hors exécution (connexion, compilation)
+        elapsed = time.perf_counter() - starts.pop()
+        normalized = self._normalize(context.statement)
+        with self._lock:
+            self._statement_stats(normalized).errors += 1
+        self._count_in_request(elapsed)
+        logger.warning(f"Query failed after {elapsed * 1000:.0f} ms: {normalized} "
+                       f"params={parameter_shape(context.parameters)} "
+                       f"({type(context.original_exception).__name__})")
+
+    def _normalize(self, statement):
+        normalized = self._normalized.get(statement)
+        if normalized is None:
+            if len(self._normalized) >= 4 * self.max_statements:
+                self._normalized.clear()
+            normalized = self._normalized[statement] = normalize_statement(statement)
+        return normalized
+
+    def _statement_stats(self, normalized):
+        """Agrégat d'une requête normalisée (sous self._lock)"""
+        stats = self.statements.get(normalized)
+        if stats is None:
+            key = normalized if len(self.statements) < self.max_statements else OTHER_STATEMENTS
+            stats = self.statements.setdefault(key, StatementStats())
+        return stats
+
+    def _count_in_request(self, elapsed):
+        scope = getattr(self._local, 'scope', None)
+        if scope is not None:
+            scope[0] += 1
+            scope[1] += elapsed
+
+    def _log_slow(self, conn, statement, normalized, parameters, elapsed, rows):
+        message = (f"Slow query ({elapsed * 1000:.0f} ms, {rows} rows): {normalized} "
+                   f"params={parameter_shape(parameters)}")
+        plan = self._plan(conn, statement, normalized, parameters) if self.explain else None
+        if plan:
+            message += '\n    ' + '\n    '.join(plan)
+        logger.warning(message)
+
+    def _plan(self, conn, statement, normalized, parameters):
+        """Plan d'une requête SELECT (sans l'exécuter), au plus une fois par EXPLAIN_INTERVAL"""
+        if not statement.lstrip()[:6].upper().startswith(('SELECT', 'WITH')):
+            return None
+        now = time.monotonic()
+        if now - self._explained.get(normalized, -EXPLAIN_INTERVAL) < EXPLAIN_INTERVAL:
+            return None
+        self._explained[normalized] = now
+        prefix = 'EXPLAIN QUERY PLAN ' if conn.dialect.name == 'sqlite' else 'EXPLAIN '
+        # Curseur DBAPI direct: pas d'événement, donc pas de récursion
+        cursor = conn.connection.cursor()
+        try:
+            cursor.execute(prefix + statement, parameters)
+            return [' '.join(str(column) for column in row) for row in cursor.fetchall()]
+        except Exception as e:
+            logger.debug(f"EXPLAIN failed: {e}")
+            return None
+        finally:
+            cursor.close()
+
+    def begin_request(self):
+        """Compte les requêtes SQL du thread courant jusqu'à end_request()"""
+        self._local.scope = [0, 0.0]
+
+    def end_request(self, route, status, seconds):
+        scope = getattr(self._local, 'scope', None) or [0, 0.0]
+        self._local.scope = None
+        with self._lock:
+            stats = self.routes.get(route)
+            if stats is None:
+                stats = self.routes[route] = {
+                    'latency': LatencyHistogram(), 'status': {}, 'queries': 0, 'db_seconds': 0.0
+                }
+            stats['latency'].add(seconds)
+            status_class = f"{status // 100}xx"
+            stats['status'][status_class] = stats['status'].get(status_class, 0) + 1
+            stats['queries'] += scope[0]
+            stats['db_seconds'] += scope[1]
+
+    def report(self, sort='total_ms', limit=50):
+        """Requêtes triées par `sort` décroissant, et routes avec leur histogramme"""
+        with self._lock:
+            statements = [stats.to_dict(statement) for statement, stats in self.statements.items()]
+            routes = {
+                route: {
+                    **stats['latency'].summary(),
+                    'status': dict(stats['status']),
+                    'queries_per_request': round(stats['queries'] / stats['latency'].count, 2),
+                    'db_ms_per_request': round(stats['db_seconds'] / stats['latency'].count * 1000, 3),
+                    'histogram_ms': stats['latency'].buckets()
+                }
+                for route, stats in self.routes.items()
+            }
+        statements.sort(key=lambda item: item.get(sort, 0), reverse=True)
+        return {
+            'since': datetime.utcfromtimestamp(self.started).isoformat(),
+            'slow_query_ms': self.slow_seconds * 1000,
+            'statements': statements[:limit],
+            'statement_count': len(statements),
+            'routes': routes
+        }
+
+    def reset(self):
+        with self._lock:
+            self.statements.clear()
+            self.routes.clear()
+            self.started = time.time()
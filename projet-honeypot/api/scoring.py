@@ -0,0 +1,196 @@
+"""
+Scoring des anomalies à l'ingestion
+Charge le modèle portable exporté par le détecteur ML (scoring_model.json)
+et score chaque menace en Python pur, sans scikit-learn, avec le modèle de
+sa partition (service...). Le fichier est surveillé: une nouvelle version
+entraînée est rechargée à chaud.
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+import time
+import zlib
+from array import array
+
+logger = logging.getLogger('threat_api.scoring')
+
+SCORING_FORMAT = 3
+
+# Tokenisation des payloads (identique à ml_features.tokenize_payload)
+PAYLOAD_FIELDS = ('path', 'query', 'user_agent', 'username', 'password', 'client_banner')
+PAYLOAD_MAX_CHARS = 2048
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+|[^a-z0-9\s]")
+
+# Modèle de repli (voir ml_partitions.GLOBAL_KEY)
+GLOBAL_KEY = '*'
+
+
+class Forest:
+    """Scaler et arbres aplatis d'une partition"""
+
+    def __init__(self, data):
+        self.mean = data['scaler']['mean']
+        self.scale = data['scaler']['scale']
+        self.components = {int(column): weights for column, weights in data['payload_components'].items()}
+        self.n_components = data['n_components']
+        self.offset = data['offset']
+        self.normalizer = data['normalizer']
+        self.trees = [
+            (tree['left'], tree['right'], tree['feature'], tree['threshold'], tree['value'])
+            for tree in data['trees']
+        ]
+
+    def score(self, raw, payload_counts):
+        """Score d'anomalie (même échelle que IsolationForest.score_samples)"""
+        values = [(value - m) / s for value, m, s in zip(raw, self.mean, self.scale)]
+        if self.n_components:
+            # Projection SVD des tokens hachés (colonnes inconnues: poids nuls),
+            # accumulée en float32 comme le produit creux de scikit-learn
+            reduced = array('f', bytes(4 * self.n_components))
+            for column in sorted(payload_counts):
+                weights = self.components.get(column)
+                if weights:
+                    count = payload_counts[column]
+                    for j, weight in enumerate(weights):
+                        reduced[j] += count * weight
+            values.extend(reduced)
+        # Arrondi en float32, comme les arbres scikit-learn
+        x = array('f', values).tolist()
+
+        depth = 0.0
+        for left, right, feature, threshold, value in self.trees:
+            node = 0
+            while left[node] != -1:
+                node = left[node] if x[feature[node]] <= threshold[node] else right[node]
+            depth += value[node]
+
+        if self.normalizer == 0:
+            return -1.0
+        return -2.0 ** (-depth / self.normalizer)
+
+
+class ScoringModel:
+    """Modèle chargé en mémoire (immuable, remplacé en bloc lors d'un rechargement)"""
+
+    def __init__(self, data):
+        self.version = data['version']
+        encoders = data['encoders']
+        self.service_mapping = encoders['service_encoder']['mapping']
+        self.service_default = encoders['service_encoder']['default']
+        self.attack_mapping = encoders['attack_encoder']['mapping']
+        self.attack_default = encoders['attack_encoder']['default']
+        self.partition_fields = data['partition_fields']
+        self.payload_hash_features = encoders['payload_hash_features']
+        self.forests = {key: Forest(forest) for key, forest in data['models'].items()}
+
+    def features(self, threat):
+        """Vecteur de features d'une menace (identique à ml_features.FeaturePipeline)"""
+        timestamp = threat['timestamp']
+        hour = int(timestamp[11:13]) if len(timestamp) > 12 else 0
+
+        ip_parts = threat['attacker_ip'].split('.')
+        ip_last_octet = int(ip_parts[-1]) if len(ip_parts) == 4 else 0
+
+        return [
+            hour,
+            self.service_mapping.get(threat['service'], self.service_default),
+            self.attack_mapping.get(threat['attack_type'], self.attack_default),
+            threat.get('risk_score', 5),
+            ip_last_octet,
+            len(json.dumps(threat.get('payload', {}))),
+            threat.get('attacker_port') or 0
+        ]
+
+    def payload_counts(self, threat):
+        """Compte des tokens hachés du payload (identique à ml_features.PayloadHasher)"""
+        counts = {}
+        payload = threat.get('payload', {})
+        if not isinstance(payload, dict):
+            return counts
+        for field in PAYLOAD_FIELDS:
+            value = payload.get(field)
+            if isinstance(value, str) and value:
+                for token in _TOKEN_PATTERN.findall(value[:PAYLOAD_MAX_CHARS].lower()):
+                    column = zlib.crc32(f"{field}:{token}".encode('utf-8')) % self.payload_hash_features
+                    counts[column] = counts.get(column, 0) + 1
+        return counts
+
+    def forest_for(self, threat):
+        """Forêt de la partition de la menace, ou forêt globale"""
+        key = '|'.join(str(threat.get(field, '')) for field in self.partition_fields)
+        return self.forests.get(key) or self.forests[GLOBAL_KEY]
+
+    def score(self, threat):
+        """Retourne (score, is_anomaly) avec le modèle de la partition"""
+        forest = self.forest_for(threat)
+        counts = self.payload_counts(threat) if forest.n_components else {}
+        score = forest.score(self.features(threat), counts)
+        return score, score < forest.offset
+
+
+class AnomalyScorer:
+    """Score les menaces avec le dernier modèle disponible, rechargé à chaud"""
+
+    def __init__(self, path, reload_interval=5.0):
+        self.path = path
+        self.reload_interval = reload_interval
+        self.model = None
+        self._mtime = None
+        self._last_check = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def version(self):
+        model = self.model
+        return model.version if model else None
+
+    def _maybe_reload(self):
+        """Recharge le modèle si le fichier a changé (vérification au plus toutes les reload_interval s)"""
+        now = time.monotonic()
+        if now - self._last_check < self.reload_interval:
+            return
+        if not self._lock.acquire(blocking=False):
+            return  # Un autre thread vérifie déjà
+        try:
+            self._last_check = now
+            try:
+                mtime = os.stat(self.path).st_mtime_ns
+            except FileNotFoundError:
+                return
+            if mtime == self._mtime:
+                return
+
+            with open(self.path) as f:
+                data = json.load(f)
+            self._mtime = mtime  # Pas de nouvelle tentative tant que le fichier ne change pas
+            if data.get('format') != SCORING_FORMAT:
+                logger.warning(f"Unsupported scoring model format: {data.get('format')}")
+                return
+
+            # Remplacement atomique de la référence: les scorings en cours
+            # terminent avec l'ancienne version
+            self.model = ScoringModel(data)
+            logger.info(f"Anomaly model v{self.model.version} loaded from {self.path}")
+        except Exception as e:
+            logger.error(f"Failed to load anomaly model: {e}")
+        finally:
+            self._lock.release()
+
+    def score(self, threat):
+        """Retourne (score, is_anomaly), ou (None, False) si aucun modèle n'est disponible"""
+        self._maybe_reload()
+        model = self.model
+        if model is None:
+            return None, False
+        return model.score(threat)
+
+    def score_many(self, threats):
+        """Score un micro-batch de menaces avec une seule version du modèle"""
+        self._maybe_reload()
+        model = self.model
+        if model is None:
+            return [(None, False) for _ in threats]
+        return [model.score(threat) for threat in threats]
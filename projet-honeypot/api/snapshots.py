@@ -0,0 +1,60 @@
+"""
+Cache des instantanés du dashboard
+Les agrégats (statistiques, attaquants, séries) ne sont recalculés qu'une
+fois par version des données et par paramètres, quel que soit le nombre
+d'onglets ouverts. Chaque calcul reçoit une révision croissante (horloge en
+ms, donc plus grande après un redémarrage) et chaque section retient la
+révision à laquelle son contenu a changé pour la dernière fois: une requête
+?since_version= ne renvoie que les sections modifiées depuis, y compris
+celles qu'un recalcul sur TTL a fait évoluer sans nouvelle menace.
+"""
+
+import threading
+import time
+
+# Les fenêtres glissantes (24h...) évoluent même sans nouvelle menace
+SNAPSHOT_TTL = 30.0
+
+
+class SnapshotCache:
+    """Sections calculées par clé de paramètres, invalidées par version ou TTL"""
+
+    def __init__(self, ttl=SNAPSHOT_TTL, max_keys=64):
+        self.ttl = ttl
+        self.max_keys = max_keys
+        # clé -> (version, calculé à, révision, {section: (contenu, changé à la révision)})
+        self._entries = {}
+        self._revision = 0
+        self._lock = threading.Lock()
+
+    def get(self, key, version, build):
+        """Sections pour `key` à `version`; build() -> {section: contenu} si le cache est périmé
+
+        Retourne (révision du calcul, {section: (contenu, révision du dernier changement)}).
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry and entry[0] == version and time.monotonic() - entry[1] < self.ttl:
+            return entry[2], entry[3]
+
+        # Calcul hors verrou: deux requêtes simultanées peuvent calculer en double, sans risque
+        built = build()
+        previous = entry[3] if entry else {}
+
+        with self._lock:
+            self._revision = revision = max(self._revision + 1, int(time.time() * 1000))
+            sections = {}
+            for name, content in built.items():
+                old = previous.get(name)
+                unchanged = old is not None and old[0] == content
+                sections[name] = (content, old[1] if unchanged else revision)
+            if key not in self._entries and len(self._entries) >= self.max_keys:
+                # Paramètres exotiques: on évince l'entrée la plus ancienne
+                oldest = min(self._entries, key=lambda k: self._entries[k][1])
+                del self._entries[oldest]
+            self._entries[key] = (version, time.monotonic(), revision, sections)
+        return revision, sections
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,120 @@
+"""
+Séries temporelles pour les graphiques du dashboard
+Choix de la résolution des buckets, remplissage des buckets vides et
+sous-échantillonnage Largest-Triangle-Three-Buckets (LTTB): quelle que soit
+la plage demandée, le navigateur ne reçoit que quelques centaines de points.
+"""
+
+from datetime import datetime, timezone
+
+# Résolutions "rondes" proposées en mode auto (secondes)
+RESOLUTIONS = (60, 300, 900, 1800, 3600, 3 * 3600, 6 * 3600, 12 * 3600, 86400, 7 * 86400)
+UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+DEFAULT_MAX_POINTS = 300
+MAX_POINTS_LIMIT = 2000
+# Au-delà, la résolution explicite est relevée (buckets vides remplis en mémoire)
+MAX_BUCKETS = 50_000
+
+
+def parse_resolution(value):
+    """'auto' -> None, '300' / '5m' / '1h' / '1d' -> secondes; ValueError sinon"""
+    if value in (None, '', 'auto'):
+        return None
+    value = value.strip().lower()
+    multiplier = UNITS.get(value[-1])
+    number = value[:-1] if multiplier else value
+    try:
+        seconds = int(number) * (multiplier or 1)
+    except ValueError:
+        raise ValueError(f"Invalid resolution: {value} (auto, seconds or 5m/1h/1d)")
+    if seconds < 1:
+        raise ValueError("Resolution must be at least 1 second")
+    return seconds
+
+
+def choose_resolution(span_seconds, max_points, requested=None):
+    """Plus petite résolution ronde qui tient en max_points buckets (ou celle demandée)"""
+    if requested:
+        if span_seconds / requested <= MAX_BUCKETS:
+            return requested
+        # Résolution trop fine: relevée pour borner les buckets remplis en mémoire
+        max_points = MAX_BUCKETS
+    for resolution in RESOLUTIONS:
+        if span_seconds / resolution <= max_points:
+            return resolution
+    return -(-span_seconds // max_points)
+
+
+def fill_buckets(rows, first_bucket, last_bucket):
+    """Séries complètes (buckets vides à zéro) à partir des agrégats SQL
+
+    rows: tuples (bucket, clé, nombre, risque moyen) -> {clé: [(bucket, nombre, risque moyen)]}
+    """
+    by_key = {}
+    for bucket, key, count, avg_risk in rows:
+        by_key.setdefault(key, {})[int(bucket)] = (count, avg_risk)
+
+    series = {}
+    for key, buckets in by_key.items():
+        series[key] = [
+            (bucket, *buckets.get(bucket, (0, None)))
+            for bucket in range(first_bucket, last_bucket + 1)
+        ]
+    return series
+
+
+def lttb(points, threshold):
+    """Largest-Triangle-Three-Buckets sur des tuples (x, y, ...)
+
+    Garde le premier et le dernier point, puis dans chaque bucket le point
+    qui forme le plus grand triangle avec le point retenu précédent et la
+    moyenne du bucket suivant: pics et creux sont préservés.
+    """
+    n = len(points)
+    if threshold >= n or threshold < 3:
+        return list(points)
+
+    sampled = [points[0]]
+    every = (n - 2) / (threshold - 2)
+    a = 0
+    for i in range(threshold - 2):
+        # Moyenne du bucket suivant (le dernier point pour le dernier bucket)
+        next_start = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, n)
+        if next_start >= n - 1:
+            avg_x, avg_y = points[-1][0], points[-1][1]
+        else:
+            span = next_end - next_start
+            avg_x = sum(p[0] for p in points[next_start:next_end]) / span
+            avg_y = sum(p[1] for p in points[next_start:next_end]) / span
+
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        ax, ay = points[a][0], points[a][1]
+        best, best_area = start, -1.0
+        for j in range(start, end):
+            area = abs((ax - avg_x) * (points[j][1] - ay) - (ax - points[j][0]) * (avg_y - ay))
+            if area > best_area:
+                best, best_area = j, area
+        sampled.append(points[best])
+        a = best
+
+    sampled.append(points[-1])
+    return sampled
+
+
+def series_tail(timeseries, since):
+    """Copie de la réponse ne gardant que les buckets à partir de celui de `since`
+
+    Les buckets plus anciens n'ont pas changé: le client les conserve et
+    garde les `length` derniers points après fusion.
+    """
+    resolution = timeseries['resolution']
+    start = datetime.utcfromtimestamp(
+        int(since.replace(tzinfo=timezone.utc).timestamp()) // resolution * resolution
+    ).isoformat()
+    series = []
+    for s in timeseries['series']:
+        series.append({**s, 'length': len(s['points']), 'points': [p for p in s['points'] if p['t'] >= start]})
+    return {**timeseries, 'partial_from': start, 'series': series}
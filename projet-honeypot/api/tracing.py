@@ -0,0 +1,87 @@
+"""
+Traçage de bout en bout des menaces
+Chaque événement porte un trace_id et l'horodatage de ses étapes, de la
+capture par le honeypot jusqu'à la publication par l'API. Les latences
+entre étapes sont résumées en percentiles par honeypot.
+"""
+
+import time
+
+# Étapes dans l'ordre du pipeline (les trois premières sont posées par le honeypot)
+TRACE_STAGES = ('captured', 'logged', 'sent', 'received', 'committed', 'published')
+SENSOR_STAGES = TRACE_STAGES[:3]
+
+# Horloge monotone ancrée sur l'heure système (secondes epoch):
+# pas de saut si l'heure système est corrigée, comparable entre processus
+_CLOCK_ANCHOR = time.time() - time.monotonic()
+
+
+def clock():
+    return _CLOCK_ANCHOR + time.monotonic()
+
+
+def parse_trace(data):
+    """Extrait (trace_id, étapes du honeypot) d'une menace reçue, ou (None, {})"""
+    trace = data.get('trace')
+    if not isinstance(trace, dict) or not trace.get('trace_id'):
+        return None, {}
+    stages = trace.get('stages') or {}
+    return str(trace['trace_id'])[:32], {
+        stage: float(stages[stage]) for stage in SENSOR_STAGES
+        if isinstance(stages.get(stage), (int, float))
+    }
+
+
+def percentile(sorted_values, q):
+    """Percentile q (0-100) par interpolation linéaire sur une liste triée"""
+    if not sorted_values:
+        return 0.0
+    position = (len(sorted_values) - 1) * q / 100
+    low = int(position)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (position - low)
+
+
+def summarize(values):
+    values = sorted(values)
+    return {
+        'count': len(values),
+        'p50_ms': round(percentile(values, 50) * 1000, 3),
+        'p95_ms': round(percentile(values, 95) * 1000, 3),
+        'p99_ms': round(percentile(values, 99) * 1000, 3),
+        'max_ms': round(values[-1] * 1000, 3) if values else 0.0
+    }
+
+
+def latency_report(rows):
+    """Percentiles par étape et par honeypot
+
+    rows: tuples (honeypot_id, captured, logged, sent, received, committed, published).
+    Chaque étape est mesurée depuis l'étape précédente disponible (une étape
+    manquante est sautée), 'total' va de la première à la dernière.
+    """
+    durations = {}
+    counts = {}
+    for row in rows:
+        honeypot_id, stamps = row[0], row[1:]
+        counts[honeypot_id] = counts.get(honeypot_id, 0) + 1
+        hops = durations.setdefault(honeypot_id, {stage: [] for stage in TRACE_STAGES[1:] + ('total',)})
+        previous = first = None
+        for stage, stamp in zip(TRACE_STAGES, stamps):
+            if stamp is None:
+                continue
+            if previous is not None:
+                hops[stage].append(stamp - previous)
+            else:
+                first = stamp
+            previous = stamp
+        if first is not None and previous is not None and previous != first:
+            hops['total'].append(previous - first)
+
+    return {
+        honeypot_id: {
+            'count': counts[honeypot_id],
+            'stages': {stage: summarize(values) for stage, values in hops.items() if values}
+        }
+        for honeypot_id, hops in durations.items()
+    }
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Détection des attaques coordonnées
+Fenêtre glissante (deux pointeurs sur les timestamps triés) au lieu d'un
+refiltrage complet du DataFrame pour chaque menace: O(n log n) pour le tri,
+O(n) pour le balayage.
+"""
+
+import numpy as np
+
+
+def find_coordinated_campaigns(timestamps, ips, attack_types, window, min_ips=4):
+    """Regroupe les rafales d'attaques venant de plusieurs IPs en campagnes
+
+    Une menace est "coordonnée" si au moins `min_ips` IPs distinctes attaquent
+    dans [t - window, t + window]. Les fenêtres coordonnées qui se chevauchent
+    sont fusionnées en une seule campagne.
+
+    Args:
+        timestamps: tableau de timestamps (datetime64 ou entiers, même unité que window)
+        ips: codes entiers (ou valeurs hashables) des IPs attaquantes
+        attack_types: codes entiers (ou valeurs) des types d'attaque
+        window: demi-largeur de la fenêtre (timedelta64 ou entier)
+        min_ips: nombre minimum d'IPs distinctes
+
+    Returns:
+        Liste de campagnes triées chronologiquement: dict avec 'start', 'end'
+        (timestamps de la première et dernière menace), 'events', 'ips',
+        'attack_types' et 'peak_ips' (max d'IPs distinctes dans une fenêtre).
+    """
+    timestamps = np.asarray(timestamps)
+    if len(timestamps) == 0:
+        return []
+
+    order = np.argsort(timestamps, kind='stable')
+    times = timestamps[order]
+    ip_values, ip_codes = np.unique(np.asarray(ips)[order], return_inverse=True)
+    attack_values = np.asarray(attack_types)[order]
+
+    # Bornes [lo, hi) de la fenêtre de chaque menace (monotones, car times est trié)
+    lo = np.searchsorted(times, times - window, side='left')
+    hi = np.searchsorted(times, times + window, side='right')
+
+    distinct = _sliding_distinct(ip_codes.ravel(), lo, hi, len(ip_values))
+    flagged = np.flatnonzero(distinct >= min_ips)
+    if len(flagged) == 0:
+        return []
+
+    # Fusion des fenêtres qui se chevauchent: nouvelle campagne quand la fenêtre
+    # courante commence après la fin de toutes les précédentes
+    starts = lo[flagged]
+    ends = np.maximum.accumulate(hi[flagged])
+    breaks = np.flatnonzero(starts[1:] >= ends[:-1]) + 1
+    groups = np.split(np.arange(len(flagged)), breaks)
+
+    campaigns = []
+    for group in groups:
+        first, last = starts[group[0]], ends[group[-1]]
+        campaigns.append({
+            'start': times[first],
+            'end': times[last - 1],
+            'events': int(last - first),
+            'ips': ip_values[np.unique(ip_codes[first:last])].tolist(),
+            'attack_types': np.unique(attack_values[first:last]).tolist(),
+            'peak_ips': int(distinct[flagged[group]].max())
+        })
+    return campaigns
+
+
+def _sliding_distinct(codes, lo, hi, n_values):
+    """Nombre de valeurs distinctes de codes[lo[i]:hi[i]] pour chaque i (lo, hi croissants)"""
+    counts = np.zeros(n_values, dtype=np.int64).tolist()
+    codes = codes.tolist()
+    result = []
+    left = right = distinct = 0
+    for start, end in zip(lo.tolist(), hi.tolist()):
+        while right < end:
+            code = codes[right]
+            if counts[code] == 0:
+                distinct += 1
+            counts[code] += 1
+            right += 1
+        while left < start:
+            code = codes[left]
+            counts[code] -= 1
+            if counts[code] == 0:
+                distinct -= 1
+            left += 1
+        result.append(distinct)
+    return np.array(result, dtype=np.int64)
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Benchmark de sérialisation des endpoints de liste de l'API
+Compare l'ancien chemin (to_dict complet + jsonify indenté) à la
+projection ?fields= + encodeur rapide, sur des pages de 1000 lignes.
+
+Usage: python benchmarks/bench_api_serialization.py [--rows 5000] [--repeat 20]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+# L'API est configurée par variables d'environnement: base SQLite jetable
+TMP_DIR = tempfile.mkdtemp(prefix='bench_api_')
+os.environ.setdefault('DATABASE_URL', f"sqlite:///{os.path.join(TMP_DIR, 'bench.db')}")
+os.environ.setdefault('LOG_DIR', TMP_DIR)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'api'))
+
+import app as api  # noqa: E402
+from flask import json  # noqa: E402
+
+FEED_FIELDS = 'id,timestamp,service,attacker_ip,attack_type,risk_score'
+
+
+def seed(rows):
+    """Remplit la base avec des menaces réalistes (headers HTTP inclus)"""
+    rng = random.Random(42)
+    now = datetime.utcnow()
+    with api.app.app_context():
+        api.db.session.query(api.Threat).delete()
+        threats = []
+        for i in range(rows):
+            service = rng.choice(['ssh', 'http', 'telnet'])
+            threats.append(api.Threat(
+                timestamp=now - timedelta(seconds=i * 7),
+                honeypot_id='honeypot-001',
+                service=service,
+                attacker_ip=f"{rng.randint(1, 223)}.{rng.randint(0, 255)}.{rng.randint(0, 255)}.{rng.randint(1, 254)}",
+                attacker_port=rng.randint(1024, 65535),
+                attack_type=rng.choice(['brute_force', 'reconnaissance', 'sql_injection']),
+                risk_score=rng.randint(1, 10),
+                payload={
+                    'method': 'GET',
+                    'path': '/wp-admin/admin-ajax.php',
+                    'headers': {
+                        'Host': 'honeypot.local',
+                        'User-Agent': 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36',
+                        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+                        'Accept-Encoding': 'gzip, deflate',
+                        'Accept-Language': 'en-US,en;q=0.5',
+                        'Connection': 'keep-alive',
+                    },
+                    'query': "id=1' OR '1'='1",
+                    'user_agent': 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36',
+                }
+            ))
+        api.db.session.bulk_save_objects(threats)
+        api.db.session.commit()
+
+
+def legacy_threats_page(per_page):
+    """Reproduit l'ancien chemin: objets complets + jsonify indenté"""
+    with api.app.test_request_context():
+        page = api.Threat.query.order_by(api.Threat.timestamp.desc())\
+            .paginate(page=1, per_page=per_page, error_out=False)
+        body = json.dumps({
+            'threats': [t.to_dict() for t in page.items],
+            'total': page.total,
+        }, indent=2)
+        return len(body.encode('utf-8'))
+
+
+def timed(fn, repeat):
+    samples = []
+    size = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        size = fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), min(samples), size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=5000)
+    parser.add_argument('--per-page', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"🧪 Préparation de {args.rows} menaces (SQLite: {TMP_DIR})")
+    seed(args.rows)
+    client = api.app.test_client()
+
+    def endpoint(query):
+        def run():
+            response = client.get(f"/api/threats?per_page={args.per_page}{query}")
+            assert response.status_code == 200, response.data[:200]
+            return len(response.data)
+        return run
+
+    scenarios = [
+        ('avant: to_dict + jsonify indenté', lambda: legacy_threats_page(args.per_page)),
+        ('après: objets complets, encodeur rapide', endpoint('')),
+        ('après: ?fields= (sans payload)', endpoint(f"&fields={FEED_FIELDS}")),
+    ]
+
+    encoder = 'orjson' if api.orjson is not None else 'json (fallback)'
+    print(f"📊 Page de {args.per_page} lignes, {args.repeat} répétitions, encodeur: {encoder}\n")
+    print(f"{'Scénario':<42} {'médiane':>10} {'min':>10} {'taille':>12}")
+    print("-" * 78)
+    for name, fn in scenarios:
+        median, best, size = timed(fn, args.repeat)
+        print(f"{name:<42} {median:>8.1f}ms {best:>8.1f}ms {size / 1024:>9.1f} KB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Benchmark de la détection d'attaques coordonnées
+Compare la boucle historique (df.iloc + refiltrage complet, O(n²)) à la
+fenêtre glissante de attack_patterns.find_coordinated_campaigns.
+
+Usage: python benchmarks/bench_coordinated.py [--sizes 10000 100000 1000000] [--legacy-max 5000]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from attack_patterns import find_coordinated_campaigns  # noqa: E402
+
+WINDOW = pd.Timedelta(minutes=5)
+
+
+def make_events(n, seed=42):
+    """Trafic de fond sur 24h (3 attaquants persistants) + rafales multi-IPs"""
+    rng = np.random.default_rng(seed)
+    day_us = 24 * 3600 * 1_000_000
+    timestamps = rng.integers(0, day_us, n)
+    ips = rng.integers(0, 3, n)
+    # 2% des événements regroupés en rafales de 30 secondes venant de nombreuses IPs
+    bursts = rng.choice(n, n // 50, replace=False)
+    centers = rng.integers(0, day_us, 20)
+    timestamps[bursts] = rng.choice(centers, len(bursts)) + rng.integers(0, 30_000_000, len(bursts))
+    ips[bursts] = rng.integers(3, 3 + max(n // 100, 10), len(bursts))
+    attack_types = rng.integers(0, 7, n)
+    return timestamps, ips, attack_types
+
+
+def legacy(timestamps, ips, attack_types):
+    """Implémentation de référence (avant)"""
+    df = pd.DataFrame({
+        'timestamp': pd.to_datetime(timestamps, unit='us'),
+        'attacker_ip': ips,
+        'attack_type': attack_types
+    })
+    coordinated = []
+    for i in range(len(df)):
+        current_time = df.iloc[i]['timestamp']
+        window_attacks = df[
+            (df['timestamp'] >= current_time - WINDOW) &
+            (df['timestamp'] <= current_time + WINDOW)
+        ]
+        if len(window_attacks['attacker_ip'].unique()) > 3:
+            coordinated.append(current_time)
+    return coordinated
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[2_000, 10_000, 100_000, 1_000_000])
+    parser.add_argument('--legacy-max', type=int, default=5_000,
+                        help="taille maximale pour l'implémentation O(n²)")
+    args = parser.parse_args()
+
+    window_us = int(WINDOW / pd.Timedelta(microseconds=1))
+    print(f"{'Taille':>10} {'avant':>10} {'après':>9} {'campagnes':>10} {'lignes avant':>13}")
+    print("-" * 58)
+    for size in args.sizes:
+        timestamps, ips, attack_types = make_events(size)
+
+        legacy_time, legacy_rows = '-', '-'
+        if size <= args.legacy_max:
+            start = time.perf_counter()
+            legacy_rows = len(legacy(timestamps, ips, attack_types))
+            legacy_time = f"{time.perf_counter() - start:.2f}s"
+
+        start = time.perf_counter()
+        campaigns = find_coordinated_campaigns(timestamps, ips, attack_types, window_us)
+        elapsed = time.perf_counter() - start
+        print(f"{size:>10} {legacy_time:>10} {elapsed:>8.2f}s {len(campaigns):>10} {legacy_rows:>13}")
+
+
+if __name__ == '__main__':
+    main()
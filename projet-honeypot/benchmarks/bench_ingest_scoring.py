@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Benchmark du scoring d'anomalies à l'ingestion
+Entraîne les modèles par partition comme ml_detector.py, les exporte au
+format portable puis vérifie que api/scoring.py donne les mêmes scores que
+scikit-learn (score_samples / predict) et mesure la latence par menace.
+
+Usage: python benchmarks/bench_ingest_scoring.py [--train 20000] [--events 5000]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'api'))
+
+from bench_ml_features import make_threats  # noqa: E402
+from ml_features import FeaturePipeline  # noqa: E402
+from ml_partitions import PartitionedModel, partition_key  # noqa: E402
+from model_export import export_scoring_model  # noqa: E402
+from scoring import AnomalyScorer  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--train', type=int, default=20_000, help="taille du jeu d'entraînement")
+    parser.add_argument('--events', type=int, default=5_000, help='menaces scorées une par une')
+    parser.add_argument('--partition-by', default='service')
+    args = parser.parse_args()
+
+    pipeline = FeaturePipeline()
+    model = PartitionedModel(args.partition_by)
+    training = make_threats(args.train)
+    model.fit([partition_key(t, model.fields) for t in training], pipeline.transform(training),
+              pipeline.transform_payloads(training))
+
+    events = make_threats(args.events, seed=7)
+    predictions, expected, _ = model.predict(
+        [partition_key(t, model.fields) for t in events], pipeline.transform(events),
+        pipeline.transform_payloads(events)
+    )
+    expected_anomalies = predictions == -1
+
+    with tempfile.TemporaryDirectory() as model_dir:
+        path = export_scoring_model(model_dir, 1, pipeline, model)
+        print(f"Modèle exporté: {os.path.getsize(path) / 1024:.0f} Ko, "
+              f"{len(model.partitions)} partitions")
+
+        scorer = AnomalyScorer(path, reload_interval=0)
+        scorer.score(events[0])  # Chargement initial
+        scorer.reload_interval = 5.0
+
+        latencies = []
+        results = []
+        for event in events:
+            start = time.perf_counter()
+            results.append(scorer.score(event))
+            latencies.append(time.perf_counter() - start)
+
+    scores = np.array([score for score, _ in results])
+    anomalies = np.array([is_anomaly for _, is_anomaly in results])
+    latencies = np.array(latencies) * 1000
+
+    print(f"Écart max avec score_samples: {np.abs(scores - expected).max():.2e}")
+    print(f"Décisions identiques à predict: {(anomalies == expected_anomalies).mean() * 100:.2f}% "
+          f"({anomalies.sum()} anomalies)")
+    print(f"Latence par menace: p50 {np.percentile(latencies, 50):.3f} ms, "
+          f"p99 {np.percentile(latencies, 99):.3f} ms, max {latencies.max():.3f} ms")
+
+
+if __name__ == '__main__':
+    main()
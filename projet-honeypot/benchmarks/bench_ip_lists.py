@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Benchmark des listes de plages d'adresses
+Écrit N préfixes aléatoires (IPv4 surtout /24 et /32, 10% d'IPv6) dans des
+fichiers de listes, mesure le chargement (durée, taille des tables) puis le
+temps par recherche sur des adresses dans les listes et hors des listes,
+comparé à un parcours de ipaddress.ip_network (sur 1000 préfixes: au-delà
+il devient inutilisable).
+
+Usage: python benchmarks/bench_ip_lists.py [--sizes 10000 100000 1000000] [--lookups 200000]
+"""
+
+import argparse
+import ipaddress
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'common'))
+
+from ip_lists import ALLOW_DIR, TAG_DIR, IPLists  # noqa: E402
+
+# Répartition proche des listes publiques (blocs /24 et adresses seules)
+PREFIX_LENGTHS = [16] + [20, 22] * 5 + [24] * 35 + [28] * 4 + [32] * 50
+
+
+def random_prefix(rng):
+    if rng.random() < 0.1:
+        length = rng.choice([32, 48, 48, 56, 64, 64, 128])
+        return str(ipaddress.ip_network((rng.getrandbits(128), length), strict=False))
+    length = rng.choice(PREFIX_LENGTHS)
+    return str(ipaddress.ip_network((rng.getrandbits(32), length), strict=False))
+
+
+def write_lists(root, size, rng):
+    """Une liste d'exclusion (1%) et quatre listes d'étiquetage"""
+    prefixes = [random_prefix(rng) for _ in range(size)]
+    os.makedirs(os.path.join(root, ALLOW_DIR))
+    os.makedirs(os.path.join(root, TAG_DIR))
+    with open(os.path.join(root, ALLOW_DIR, 'scanners.txt'), 'w') as f:
+        f.writelines(f"{prefix}\n" for prefix in prefixes[:size // 100])
+    for n in range(4):
+        with open(os.path.join(root, TAG_DIR, f"list{n}.txt"), 'w') as f:
+            f.writelines(f"{prefix}\n" for prefix in prefixes[size // 100 + n::4])
+    return prefixes
+
+
+def addresses(prefixes, count, rng):
+    """Moitié d'adresses prises dans les préfixes, moitié au hasard"""
+    result = []
+    for i in range(count):
+        if i % 2:
+            result.append(str(ipaddress.ip_address(rng.getrandbits(32))))
+        else:
+            network = ipaddress.ip_network(rng.choice(prefixes))
+            result.append(str(network.network_address + rng.randrange(min(network.num_addresses, 2**32))))
+    return result
+
+
+def table_bytes(lists):
+    """Taille des tables de plages (tableaux, liste et entiers IPv6)"""
+    total = 0
+    for starts, labels in lists.prefixes.tables.values():
+        total += labels.itemsize * len(labels)
+        if isinstance(starts, list):
+            total += sys.getsizeof(starts) + sum(sys.getsizeof(start) for start in starts)
+        else:
+            total += starts.itemsize * len(starts)
+    return total
+
+
+def per_lookup(function, ips):
+    start = time.perf_counter()
+    for ip in ips:
+        function(ip)
+    return (time.perf_counter() - start) / len(ips)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--lookups', type=int, default=200_000)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    print(f"{'préfixes':>10} {'chargement':>11} {'mémoire':>9} {'plages':>9} {'recherche':>10} "
+          f"{'recherches/s':>13} {'trouvées':>9} {'ipaddress':>11}")
+    print("-" * 92)
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as root:
+            prefixes = write_lists(root, size, rng)
+
+            start = time.perf_counter()
+            lists = IPLists(root)
+            load_time = time.perf_counter() - start
+            memory = table_bytes(lists)
+
+            ips = addresses(prefixes, args.lookups, rng)
+            elapsed = per_lookup(lists.match, ips)
+            found = sum(1 for ip in ips if lists.match(ip))
+            ranges = sum(len(starts) for starts, _ in lists.prefixes.tables.values())
+
+            # Référence: appartenance testée préfixe par préfixe
+            networks = [ipaddress.ip_network(prefix) for prefix in prefixes[:1000]]
+            naive = per_lookup(lambda ip: [n for n in networks if ipaddress.ip_address(ip) in n], ips[:200])
+
+            print(f"{size:>10} {load_time:>10.2f}s {memory / 2**20:>7.1f}Mo {ranges:>9} "
+                  f"{elapsed * 1e6:>8.2f}µs {1 / elapsed:>13.0f} {100 * found / len(ips):>8.0f}% "
+                  f"{naive * 1e6:>9.0f}µs")
+
+
+if __name__ == '__main__':
+    main()
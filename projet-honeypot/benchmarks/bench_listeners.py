@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Benchmark de l'écoute multi-ports
+Ouvre N ports en local (processus séparé), mesure la mémoire du processus
+(RSS, allocations Python) et le temps d'ouverture, puis la latence
+d'acceptation vue du client (connexion -> bannière reçue) sur des ports
+tirés au hasard, à 3 ports et à 1000 ports.
+
+Usage: python benchmarks/bench_listeners.py [--sizes 3 100 1000] [--connections 5000]
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import random
+import resource
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'honeypot'))
+
+from listeners import ListenerProfile, PortListener  # noqa: E402
+
+BANNER = b"220 (vsFTPd 2.3.4)\r\n"
+
+
+class CountingLogger:
+    """Journal minimal: compte les connexions et attaques (sans fichier ni API)"""
+
+    def __init__(self):
+        self.connections = 0
+        self.attacks = 0
+
+    async def record_connection(self, service, attacker_ip, attacker_port, captured=None):
+        self.connections += 1
+
+    async def log_attack(self, **kwargs):
+        self.attacks += 1
+
+
+def rss_kb():
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1])
+    return 0
+
+
+def raise_fd_limit():
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    return resource.getrlimit(resource.RLIMIT_NOFILE)[0]
+
+
+def serve(ports, ready, stop, results):
+    """Processus serveur: ouvre les ports, rend compte puis attend l'arrêt"""
+    raise_fd_limit()
+
+    async def run():
+        attack_logger = CountingLogger()
+        listener = PortListener(
+            attack_logger,
+            {port: ListenerProfile('ftp', BANNER, b"530 Login incorrect.\r\n") for port in ports},
+            host='127.0.0.1', max_connections=10_000
+        )
+        rss_before = rss_kb()
+        tracemalloc.start()
+        start = time.perf_counter()
+        await listener.bind()
+        bind_time = time.perf_counter() - start
+        python_bytes, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        ready.put({
+            'bound': len(listener.servers), 'failed': len(listener.failed), 'bind_time': bind_time,
+            'rss_kb': rss_kb() - rss_before, 'python_bytes': python_bytes
+        })
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, stop.wait)
+        await listener.stop()
+        results.put({'connections': attack_logger.connections, 'attacks': attack_logger.attacks})
+
+    asyncio.run(run())
+
+
+async def client(ports, connections, concurrency):
+    """Latences connexion -> bannière, puis envoi d'une ligne et lecture de la réponse"""
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            start = time.perf_counter()
+            reader, writer = await asyncio.open_connection('127.0.0.1', random.choice(ports))
+            await reader.readexactly(len(BANNER))
+            latencies.append(time.perf_counter() - start)
+            writer.write(b"USER anonymous\r\n")
+            await reader.read(100)
+            writer.close()
+            await writer.wait_closed()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(connections)))
+    return latencies, time.perf_counter() - start
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[3, 100, 1000])
+    parser.add_argument('--base-port', type=int, default=20000)
+    parser.add_argument('--connections', type=int, default=5000)
+    parser.add_argument('--concurrency', type=int, default=50)
+    args = parser.parse_args()
+
+    limit = raise_fd_limit()
+    print(f"Limite de descripteurs: {limit}")
+    print(f"{'ports':>6} {'ouverture':>10} {'RSS':>9} {'Python':>9} {'/port':>8} "
+          f"{'conn/s':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'journal':>8}")
+    print("-" * 92)
+    for size in args.sizes:
+        ports = list(range(args.base_port, args.base_port + size))
+        ready, results = multiprocessing.Queue(), multiprocessing.Queue()
+        stop = multiprocessing.Event()
+        server = multiprocessing.Process(target=serve, args=(ports, ready, stop, results))
+        server.start()
+        bound = ready.get()
+
+        latencies, elapsed = asyncio.run(client(ports, args.connections, args.concurrency))
+        stop.set()
+        counts = results.get()
+        server.join()
+
+        per_port = (bound['rss_kb'] * 1024) / max(bound['bound'], 1)
+        print(f"{bound['bound']:>6} {bound['bind_time'] * 1000:>8.1f}ms {bound['rss_kb'] / 1024:>7.1f}Mo "
+              f"{bound['python_bytes'] / 2**20:>7.2f}Mo {per_port / 1024:>6.1f}Ko "
+              f"{len(latencies) / elapsed:>8.0f} {percentile(latencies, 50) * 1000:>6.2f}ms "
+              f"{percentile(latencies, 95) * 1000:>6.2f}ms {percentile(latencies, 99) * 1000:>6.2f}ms "
+              f"{counts['connections']:>8}")
+        if bound['failed']:
+            print(f"  ⚠️  {bound['failed']} ports indisponibles")
+
+
+if __name__ == '__main__':
+    main()
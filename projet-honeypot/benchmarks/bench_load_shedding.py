@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Benchmark du délestage en surcharge
+Envoie à l'AttackLogger un flot d'événements (port_scan, reconnaissance, brute_force
+répétés, command_injection) plus rapide que ce qu'absorbe une API factice
+lente (processus séparé, délai fixe par requête), avec et sans délestage.
+Rapporte le retard maximal de la boucle, les files d'envoi, les événements
+non envoyés faute de place (poids reporté), et pour chaque type les comptes reçus
+par l'API, repondérés (somme des 1 / sample_rate), face aux comptes réels.
+
+Usage: python benchmarks/bench_load_shedding.py [--rate 5000] [--duration 10] [--api-delay-ms 20]
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import Counter
+
+PORT = 20580
+os.environ.setdefault('LOG_LEVEL', 'ERROR')
+os.environ['API_URL'] = f"http://127.0.0.1:{PORT}"
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'honeypot'))
+
+from app import AttackLogger  # noqa: E402
+from load_shedding import LoadShedder  # noqa: E402
+
+# Part de chaque type dans le flot (brute force: 500 IPs qui insistent)
+MIX = [('port_scan', 0.35), ('reconnaissance', 0.25), ('brute_force', 0.3), ('command_injection', 0.1)]
+
+
+def fake_api(delay, ready, results):
+    """API factice: délai fixe par menace, comptes bruts et repondérés par type"""
+    from aiohttp import web
+
+    received, weighted = Counter(), Counter()
+
+    async def create_threat(request):
+        data = await request.json()
+        await asyncio.sleep(delay)
+        received[data['attack_type']] += 1
+        weighted[data['attack_type']] += 1 / data.get('sample_rate', 1)
+        return web.json_response({'status': 'success'}, status=201)
+
+    async def report(request):
+        results.put((dict(received), dict(weighted)))
+        return web.json_response({})
+
+    async def run():
+        app = web.Application()
+        app.router.add_post('/api/threats', create_threat)
+        app.router.add_get('/report', report)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        await web.TCPSite(runner, '127.0.0.1', PORT).start()
+        ready.put(True)
+        await asyncio.Event().wait()
+
+    asyncio.run(run())
+
+
+async def flood(rate, duration, shedding, log_file):
+    shedder = LoadShedder() if shedding else LoadShedder(min_rate=1.0)
+    attack_logger = AttackLogger(send_queue_size=10_000, send_workers=16, shedder=shedder)
+    attack_logger.attack_log_file = log_file
+    rng = random.Random(1)
+    offered = Counter()
+    types, weights = zip(*MIX)
+
+    loop = asyncio.get_running_loop()
+    worst_lag, max_queue, min_rate = 0.0, 0, 1.0
+    start = loop.time()
+    tick = 0.01
+    sent = 0
+    while loop.time() - start < duration:
+        expected = int((loop.time() - start + tick) * rate)
+        for _ in range(expected - sent):
+            attack_type = rng.choices(types, weights)[0]
+            ip = f"198.51.{rng.randrange(2)}.{rng.randrange(250)}"
+            offered[attack_type] += 1
+            await attack_logger.log_attack('ssh', ip, 40000, attack_type, {'n': sent})
+        sent = expected
+        before = loop.time()
+        await asyncio.sleep(tick)
+        worst_lag = max(worst_lag, loop.time() - before - tick)
+        max_queue = max(max_queue, attack_logger.send_backlog())
+        min_rate = min(min_rate, shedder.rate)
+
+    # Fin du flot: la file se vide (au plus 60 s)
+    drain_start = loop.time()
+    while attack_logger.send_backlog() and loop.time() - drain_start < 60:
+        await asyncio.sleep(0.1)
+    await asyncio.sleep(0.5)
+    drain = loop.time() - drain_start
+    for task in attack_logger._tasks:
+        task.cancel()
+    await attack_logger._session.close()
+    return offered, attack_logger.send_dropped, worst_lag, max_queue, min_rate, drain
+
+
+async def fetch_report():
+    import aiohttp
+    async with aiohttp.ClientSession() as session:
+        async with session.get(f"http://127.0.0.1:{PORT}/report") as response:
+            await response.read()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rate', type=int, default=5000, help="Événements par seconde")
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--api-delay-ms', type=float, default=20)
+    args = parser.parse_args()
+
+    print(f"Flot: {args.rate}/s pendant {args.duration:.0f}s, API: {args.api_delay_ms:.0f} ms par menace "
+          f"x 16 envois simultanés (~{16 * 1000 / args.api_delay_ms:.0f}/s)")
+    for shedding in (False, True):
+        ready, results = multiprocessing.Queue(), multiprocessing.Queue()
+        api = multiprocessing.Process(target=fake_api, args=(args.api_delay_ms / 1000, ready, results), daemon=True)
+        api.start()
+        ready.get()
+        with tempfile.TemporaryDirectory() as directory:
+            start = time.perf_counter()
+            offered, dropped, lag, max_queue, min_rate, drain = asyncio.run(
+                flood(args.rate, args.duration, shedding, os.path.join(directory, 'attacks.log'))
+            )
+            elapsed = time.perf_counter() - start
+        asyncio.run(fetch_report())
+        received, weighted = results.get()
+        api.terminate()
+
+        print()
+        print(f"{'Délestage' if shedding else 'Sans délestage'}: retard max de la boucle {lag * 1000:.0f} ms, "
+              f"file max {max_queue}, perdus (file pleine) {dropped}, taux min 1/{round(1 / min_rate)}, "
+              f"vidage {drain:.1f}s, total {elapsed:.1f}s")
+        print(f"  {'type':<18} {'réels':>8} {'reçus':>8} {'repondérés':>11} {'écart':>7}")
+        for attack_type, _ in MIX:
+            real = offered[attack_type]
+            estimate = weighted.get(attack_type, 0)
+            print(f"  {attack_type:<18} {real:>8} {received.get(attack_type, 0):>8} {estimate:>11.0f} "
+                  f"{100 * (estimate - real) / max(real, 1):>6.1f}%")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Benchmark de la recherche indexée dans attacks.log
+Génère des segments synthétiques (N événements répartis sur une semaine),
+mesure la création des index (durée, taille) puis compare, pour quelques
+requêtes types, la lecture complète des segments (filtre sur la ligne comme
+grep, puis décodage JSON) à LogSearch: durée et volume lu.
+
+Usage: python benchmarks/bench_log_search.py [--events 1000000] [--segments 4] [--ips 50000]
+"""
+
+import argparse
+import gzip
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'honeypot'))
+
+from log_index import LogSearch, build_index, list_segments, parse_line, to_epoch  # noqa: E402
+
+ATTACK_TYPES = ['brute_force', 'port_scan', 'command_injection', 'sql_injection', 'xss', 'path_traversal']
+SERVICES = ['ssh', 'http', 'telnet', 'ftp', 'redis']
+START = datetime(2025, 7, 1)
+TARGET_IP = '203.0.113.7'
+
+
+def generate(directory, events, segments, ips):
+    """Segments attacks.log.<n> puis attacks.log (le plus récent), ~350 octets par ligne"""
+    rng = random.Random(42)
+    pool = [f"{rng.randint(1, 223)}.{rng.randint(0, 255)}.{rng.randint(0, 255)}.{rng.randint(1, 254)}"
+            for _ in range(ips)]
+    step = timedelta(days=7) / events
+    per_segment = events // segments
+    names = [f"attacks.log.{n}" for n in range(segments - 1, 0, -1)] + ['attacks.log']
+    for number, name in enumerate(names):
+        with open(os.path.join(directory, name), 'w') as f:
+            for i in range(number * per_segment, (number + 1) * per_segment):
+                # Une IP suivie (1 événement sur 5000) au milieu d'une population à longue traîne
+                ip = TARGET_IP if i % 5000 == 0 else pool[min(int(rng.paretovariate(1.2)) - 1, ips - 1)
+                                                          if rng.random() < 0.5 else rng.randrange(ips)]
+                f.write(json.dumps({
+                    'timestamp': (START + step * i).isoformat(),
+                    'honeypot_id': 'honeypot-001',
+                    'service': rng.choice(SERVICES),
+                    'attacker_ip': ip,
+                    'attacker_port': rng.randint(1024, 65535),
+                    'attack_type': rng.choice(ATTACK_TYPES),
+                    'payload': {'username': 'root', 'password': f"pass{rng.randint(0, 9999)}",
+                                'client_version': 'SSH-2.0-libssh2_1.9.0'},
+                    'risk_score': rng.randint(1, 10),
+                    'trace': {'trace_id': f"{rng.getrandbits(128):032x}", 'stages': {'captured': 0.0}}
+                }) + '\n')
+
+
+def scan(directory, ip=None, since=None, until=None, by=None):
+    """Référence: lecture complète, préfiltre sur la ligne brute comme grep"""
+    needle = f'"{ip}"'.encode() if ip else None
+    matched, counts, read = 0, Counter(), 0
+    for segment in list_segments([directory]):
+        with open(segment, 'rb') as f:
+            for line in f:
+                read += len(line)
+                if needle is not None and needle not in line:
+                    continue
+                event, timestamp = parse_line(line)
+                if event is None or (since is not None and timestamp < since) or (until is not None and timestamp >= until):
+                    continue
+                if ip is not None and event['attacker_ip'] != ip:
+                    continue
+                matched += 1
+                if by:
+                    counts[event[by]] += 1
+    return matched, read
+
+
+def indexed(directory, ip=None, since=None, until=None, by=None):
+    search = LogSearch([directory], update=False)
+    if by:
+        matched = sum(search.count(by, ip, since, until).values())
+    else:
+        matched = sum(1 for _ in search.events(ip, since, until))
+    return matched, search.stats['bytes_read']
+
+
+def check_rotated(directory, events=1000):
+    """attacks.log vide à côté d'un segment .gz (logrotate copytruncate + compress)"""
+    with gzip.open(os.path.join(directory, 'attacks.log.1.gz'), 'wt') as f:
+        for i in range(events):
+            f.write(json.dumps({'timestamp': (START + timedelta(seconds=i)).isoformat(),
+                                'attacker_ip': TARGET_IP, 'attack_type': 'port_scan'}) + '\n')
+    open(os.path.join(directory, 'attacks.log'), 'w').close()
+    search = LogSearch([directory])
+    matched = sum(1 for _ in search.events(TARGET_IP))
+    counted = sum(search.count('attack_type').values())
+    return matched == counted == events
+
+
+def timed(function, *args, **kwargs):
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--events', type=int, default=1_000_000)
+    parser.add_argument('--segments', type=int, default=4)
+    parser.add_argument('--ips', type=int, default=50_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        elapsed, _ = timed(generate, directory, args.events, args.segments, args.ips)
+        segments = list_segments([directory])
+        total = sum(os.path.getsize(segment) for segment in segments)
+        print(f"{args.events} événements, {len(segments)} segments, {total / 2**20:.0f} Mo "
+              f"(générés en {elapsed:.1f}s)")
+
+        elapsed, _ = timed(lambda: [build_index(segment) for segment in segments])
+        index_bytes = sum(os.path.getsize(segment + '.idx') for segment in segments)
+        print(f"Index: {elapsed:.1f}s ({args.events / elapsed:.0f} lignes/s), "
+              f"{index_bytes / 2**20:.1f} Mo ({100 * index_bytes / total:.1f}% des segments)")
+
+        day = to_epoch((START + timedelta(days=3)).isoformat())
+        queries = [
+            ("IP, tout l'historique", {'ip': TARGET_IP}),
+            ("IP, sur 6 h", {'ip': TARGET_IP, 'since': day, 'until': day + 6 * 3600}),
+            ("période de 10 min", {'since': day, 'until': day + 600}),
+            ("comptage par type, 24 h", {'since': day, 'until': day + 86400, 'by': 'attack_type'}),
+            ("comptage par type, tout", {'by': 'attack_type'}),
+        ]
+        print()
+        print(f"{'requête':<26} {'résultats':>10} {'lecture complète':>17} {'indexée':>10} "
+              f"{'gain':>7} {'lu (index)':>11}")
+        print("-" * 86)
+        for label, query in queries:
+            scan_time, (expected, scan_read) = timed(scan, directory, **query)
+            index_time, (matched, index_read) = timed(indexed, directory, **query)
+            check = '' if matched == expected else f"  ⚠️  {matched} != {expected}"
+            print(f"{label:<26} {matched:>10} {scan_time * 1000:>15.0f}ms {index_time * 1000:>8.1f}ms "
+                  f"{scan_time / index_time:>6.0f}x {index_read / 2**20:>9.2f}Mo{check}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        print()
+        print(f"attacks.log vide + segment .gz: {'ok' if check_rotated(directory) else '⚠️  résultats incomplets'}")
+
+
+if __name__ == '__main__':
+    main()
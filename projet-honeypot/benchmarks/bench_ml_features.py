@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Benchmark de l'extraction de features du détecteur ML
+Compare la boucle Python historique à FeaturePipeline (vectorisée):
+temps, pic mémoire (tracemalloc) et égalité stricte des matrices. Vérifie
+aussi que l'encodeur C direct et le repli json.dumps mesurent les mêmes
+longueurs de payload.
+
+Usage: python benchmarks/bench_ml_features.py [--sizes 100000 1000000]
+"""
+
+import argparse
+import gc
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import ml_features  # noqa: E402
+from ml_features import FeaturePipeline, payload_lengths  # noqa: E402
+
+
+def legacy_prepare_features(threats):
+    """Implémentation de référence (boucle par menace, avant vectorisation)"""
+    features = []
+    for threat in threats:
+        hour = datetime.fromisoformat(threat['timestamp']).hour
+        service_encoding = {'ssh': 0, 'http': 1, 'telnet': 2}.get(threat['service'], 3)
+        attack_encoding = {
+            'brute_force': 0, 'unauthorized_access': 1, 'sql_injection': 2,
+            'command_injection': 3, 'path_traversal': 4, 'reconnaissance': 5
+        }.get(threat['attack_type'], 6)
+        ip_parts = threat['attacker_ip'].split('.')
+        ip_last_octet = int(ip_parts[-1]) if len(ip_parts) == 4 else 0
+        payload_length = len(json.dumps(threat.get('payload', {})))
+        features.append([
+            hour, service_encoding, attack_encoding, threat['risk_score'],
+            ip_last_octet, payload_length, threat.get('attacker_port', 0)
+        ])
+    return np.array(features)
+
+
+def make_threats(n, seed=42):
+    """Menaces synthétiques au format Threat.to_dict()"""
+    rng = random.Random(seed)
+    start = datetime(2025, 7, 1)
+    services = ['ssh', 'http', 'telnet']
+    attacks = ['brute_force', 'reconnaissance', 'sql_injection', 'path_traversal',
+               'unauthorized_access', 'command_injection', 'port_scan']
+    threats = []
+    for i in range(n):
+        service = rng.choice(services)
+        if service == 'http':
+            payload = {'method': 'GET', 'path': f"/p{rng.randint(0, 999)}",
+                       'headers': {'Host': 'x', 'User-Agent': 'curl/8.0'},
+                       'query': '', 'user_agent': 'curl/8.0'}
+        elif service == 'ssh':
+            payload = {'client_banner': 'SSH-2.0-libssh_0.9.6\r\n', 'attempted_auth': 'password'}
+        else:
+            payload = {'username': 'root', 'password': rng.choice(['admin', '123456'])}
+        ts = start + timedelta(seconds=i * 0.6, microseconds=rng.randint(0, 1) * 1234)
+        threats.append({
+            'id': i + 1,
+            'timestamp': ts.isoformat(),
+            'honeypot_id': 'honeypot-001',
+            'service': service,
+            'attacker_ip': f"{rng.randint(1, 223)}.{rng.randint(0, 255)}.{rng.randint(0, 255)}.{rng.randint(1, 254)}",
+            'attacker_port': rng.randint(1024, 65535),
+            'attack_type': rng.choice(attacks),
+            'risk_score': rng.randint(1, 10),
+            'payload': payload
+        })
+    return threats
+
+
+def measure(fn, threats):
+    """Temps (sans tracemalloc, qui fausse la mesure) puis pic mémoire sur un second passage"""
+    gc.collect()
+    start = time.perf_counter()
+    result = fn(threats)
+    elapsed = time.perf_counter() - start
+
+    gc.collect()
+    tracemalloc.start()
+    fn(threats)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak / 1024 / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100_000, 1_000_000])
+    args = parser.parse_args()
+
+    pipeline = FeaturePipeline()
+    payloads = [t['payload'] for t in make_threats(10_000)] + ['scalaire', 42, None, [1, {'é': '"'}]]
+    fast, fallback = payload_lengths(payloads), payload_lengths(payloads, fast=False)
+    reference = np.array([len(json.dumps(p)) for p in payloads])
+    print(f"Longueurs de payload: encodeur C {'actif' if ml_features._c_encode else 'indisponible'}, "
+          f"repli json.dumps {'✅' if np.array_equal(fallback, reference) else '❌'}, "
+          f"encodeur C {'✅' if np.array_equal(fast, reference) else '❌'}")
+    print()
+    print(f"{'Taille':>10} {'Implémentation':<14} {'temps':>9} {'pic mémoire':>12}  identique")
+    print("-" * 62)
+    for size in args.sizes:
+        threats = make_threats(size)
+        legacy, legacy_time, legacy_peak = measure(legacy_prepare_features, threats)
+        vectorized, vec_time, vec_peak = measure(pipeline.transform, threats)
+        identical = np.array_equal(legacy, vectorized)
+        print(f"{size:>10} {'boucle':<14} {legacy_time:>8.2f}s {legacy_peak:>9.1f} MB")
+        print(f"{size:>10} {'vectorisée':<14} {vec_time:>8.2f}s {vec_peak:>9.1f} MB  {'✅' if identical else '❌'}"
+              f"  (x{legacy_time / vec_time:.1f})")
+        del threats, legacy, vectorized
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Benchmark de bout en bout du détecteur ML sur données synthétiques
+Génère des menaces avec synthetic_threats (vérité terrain connue), les
+charge dans un feature store temporaire puis mesure temps et pic mémoire
+de prepare_features, train_model, detect_anomalies et
+analyze_attack_patterns, et la précision/rappel de la détection.
+
+Usage: python benchmarks/bench_ml_pipeline.py [--sizes 100000 1000000] [--seed 42] [--end 2025-07-08]
+"""
+
+import argparse
+import gc
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from ml_detector import MLThreatDetector  # noqa: E402
+from synthetic_threats import DEFAULT_END, FIRST_ANOMALY, SCENARIOS, ThreatGenerator, is_anomaly  # noqa: E402
+
+
+def measure(fn, repeat_for_memory=True):
+    """Temps (sans tracemalloc, qui fausse la mesure) puis pic mémoire sur un second passage"""
+    gc.collect()
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+
+    peak = float('nan')
+    if repeat_for_memory:
+        gc.collect()
+        tracemalloc.start()
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        peak /= 1024 * 1024
+    return result, elapsed, peak
+
+
+def load_store(detector, generator, size, batch_size):
+    """Génère les menaces par lots et les ajoute au feature store (prepare_features inclus)"""
+    scenarios = np.empty(size, dtype=np.int64)
+    features_time = 0.0
+    for threats, batch_scenarios in generator.iter_batches(size, batch_size):
+        scenarios[threats[0]['id'] - 1:threats[-1]['id']] = batch_scenarios
+        start = time.perf_counter()
+        detector.prepare_features(threats)
+        features_time += time.perf_counter() - start
+        detector.store.append(threats)
+    return scenarios, features_time
+
+
+def evaluate(detector, scenarios):
+    """Précision et rappel du modèle entraîné sur toute la fenêtre d'entraînement"""
+    window = detector.store.read()
+    predictions, _, _ = detector.model.predict(
+        detector.partition_keys(window), window['features'], window['payload']
+    )
+    flagged = predictions == -1
+    truth = is_anomaly(scenarios[window['id'] - 1])
+
+    true_positives = int((flagged & truth).sum())
+    precision = true_positives / flagged.sum() if flagged.sum() else 0.0
+    recall = true_positives / truth.sum() if truth.sum() else 0.0
+    per_scenario = {
+        SCENARIOS[code]: float(flagged[scenarios[window['id'] - 1] == code].mean())
+        for code in range(len(SCENARIOS))
+    }
+    return precision, recall, per_scenario
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100_000, 1_000_000])
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--end', type=datetime.fromisoformat, default=DEFAULT_END, help='fin de la période générée')
+    parser.add_argument('--batch-size', type=int, default=100_000)
+    parser.add_argument('--no-memory', action='store_true', help='ne pas mesurer le pic mémoire (2x plus rapide)')
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        print(f"\n📊 {size} menaces (graine {args.seed})")
+        with tempfile.TemporaryDirectory() as model_dir:
+            # Fenêtres glissantes calées sur la fin des données, pas sur l'heure courante
+            detector = MLThreatDetector(api_url='http://localhost:0', model_dir=model_dir, clock=lambda: args.end)
+            # Les données viennent du générateur, pas de l'API
+            detector.refresh = lambda force=False: 0
+
+            generator = ThreatGenerator(seed=args.seed, end=args.end)
+            start = time.perf_counter()
+            scenarios, features_time = load_store(detector, generator, size, args.batch_size)
+            total = time.perf_counter() - start
+            print(f"  génération + ingestion:  {total:7.2f}s  (dont prepare_features {features_time:.2f}s)")
+
+            memory = not args.no_memory
+            for name, fn in (
+                ('train_model', detector.train_model),
+                ('detect_anomalies', detector.detect_anomalies),
+                ('analyze_attack_patterns', detector.analyze_attack_patterns),
+            ):
+                _, elapsed, peak = measure(fn, memory)
+                print(f"  {name + ':':<24} {elapsed:7.2f}s  pic {peak:8.1f} MB")
+
+            precision, recall, per_scenario = evaluate(detector, scenarios)
+            print(f"  précision {precision:.3f} | rappel {recall:.3f} "
+                  f"({int(is_anomaly(scenarios).sum())} anomalies injectées)")
+            for scenario, rate in per_scenario.items():
+                kind = 'détectées' if SCENARIOS.index(scenario) >= FIRST_ANOMALY else 'faux positifs'
+                print(f"    {scenario:<22} {rate * 100:5.1f}% {kind}")
+
+
+if __name__ == '__main__':
+    main()
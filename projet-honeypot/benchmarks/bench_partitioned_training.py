@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Benchmark de l'entraînement des modèles partitionnés
+Temps d'entraînement du modèle global historique comparé aux modèles par
+partition (honeypot + service) selon le nombre de workers du pool.
+
+Usage: python benchmarks/bench_partitioned_training.py [--size 200000] [--workers 1 2 4]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from bench_ml_features import make_threats  # noqa: E402
+from ml_features import FeaturePipeline  # noqa: E402
+from ml_partitions import PartitionedModel, partition_key  # noqa: E402
+
+
+def main():
+    cores = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size', type=int, default=200_000)
+    parser.add_argument('--honeypots', type=int, default=4, help='nombre de honeypot_id distincts')
+    parser.add_argument('--partition-by', default='honeypot_service')
+    parser.add_argument('--workers', type=int, nargs='+', default=sorted({1, max(1, cores // 2), cores}))
+    args = parser.parse_args()
+
+    threats = make_threats(args.size)
+    rng = random.Random(1)
+    for threat in threats:
+        threat['honeypot_id'] = f"honeypot-{rng.randint(1, args.honeypots):03d}"
+    features = FeaturePipeline().transform(threats)
+    print(f"{args.size} menaces, {cores} cœurs")
+
+    start = time.perf_counter()
+    PartitionedModel('global', max_workers=1).fit([''] * len(threats), features)
+    baseline = time.perf_counter() - start
+    print(f"{'modèle global (avant)':>28}: {baseline:6.2f}s")
+
+    keys = [partition_key(t, ('honeypot_id', 'service')) for t in threats]
+    for workers in args.workers:
+        model = PartitionedModel(args.partition_by, max_workers=workers)
+        start = time.perf_counter()
+        model.fit(keys, features)
+        elapsed = time.perf_counter() - start
+        print(f"{f'{len(model.partitions)} partitions, {workers} worker(s)':>28}: {elapsed:6.2f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Benchmark des features de payload hachées
+Compare la mémoire et le temps de la chaîne creuse (CSR -> SVD tronquée)
+à la même matrice densifiée, sur des menaces synthétiques.
+
+Usage: python benchmarks/bench_payload_features.py [--sizes 20000 100000 1000000] [--dense-max 50000]
+"""
+
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+from sklearn.decomposition import TruncatedSVD
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from ml_features import FeaturePipeline  # noqa: E402
+from ml_partitions import PAYLOAD_COMPONENTS  # noqa: E402
+from synthetic_threats import ThreatGenerator  # noqa: E402
+
+
+def sparse_path(pipeline, threats):
+    payloads = pipeline.transform_payloads(threats)
+    reduced = TruncatedSVD(n_components=PAYLOAD_COMPONENTS, random_state=42).fit_transform(payloads)
+    return payloads.data.nbytes + payloads.indices.nbytes + payloads.indptr.nbytes, reduced
+
+
+def dense_path(pipeline, threats):
+    payloads = pipeline.transform_payloads(threats).toarray()
+    reduced = TruncatedSVD(n_components=PAYLOAD_COMPONENTS, random_state=42).fit_transform(payloads)
+    return payloads.nbytes, reduced
+
+
+def measure(fn, *args):
+    """Temps (sans tracemalloc, qui fausse la mesure) puis pic mémoire sur un second passage"""
+    gc.collect()
+    start = time.perf_counter()
+    result = fn(*args)
+    elapsed = time.perf_counter() - start
+
+    gc.collect()
+    tracemalloc.start()
+    fn(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak / 1024 / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[20_000, 100_000, 1_000_000])
+    parser.add_argument('--dense-max', type=int, default=50_000,
+                        help='taille maximale pour la version dense (n x 2^14 float32)')
+    args = parser.parse_args()
+
+    pipeline = FeaturePipeline()
+    width = pipeline.payload_hasher.n_features
+    print(f"Espace de hachage: {width} colonnes, {PAYLOAD_COMPONENTS} composantes après SVD")
+    print(f"{'Taille':>9} {'Chaîne':<7} {'matrice':>10} {'pic mémoire':>12} {'temps':>8}  non-zéros/ligne")
+    print("-" * 66)
+    for size in args.sizes:
+        threats, _ = ThreatGenerator().generate(size)
+
+        (matrix_bytes, _), elapsed, peak = measure(sparse_path, pipeline, threats)
+        nnz = pipeline.transform_payloads(threats[:10_000]).nnz / min(size, 10_000)
+        print(f"{size:>9} {'creuse':<7} {matrix_bytes / 2**20:>7.1f} MB {peak:>9.1f} MB {elapsed:>7.2f}s  {nnz:.1f}")
+
+        if size <= args.dense_max:
+            (matrix_bytes, _), elapsed, peak = measure(dense_path, pipeline, threats)
+            print(f"{size:>9} {'dense':<7} {matrix_bytes / 2**20:>7.1f} MB {peak:>9.1f} MB {elapsed:>7.2f}s")
+        else:
+            estimate = size * width * np.dtype(np.float32).itemsize
+            print(f"{size:>9} {'dense':<7} {estimate / 2**20:>7.0f} MB {'(estimé, non exécuté)':>24}")
+        del threats
+
+
+if __name__ == '__main__':
+    main()
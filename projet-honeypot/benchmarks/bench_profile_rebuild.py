@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Benchmark de la reconstruction des profils d'attaquants
+Remplit une base SQLite temporaire (N menaces, IPs à longue traîne, 5% des
+menaces échantillonnées), puis mesure la reconstruction par tranches de
+profiles.py pour plusieurs tailles de tranche, face à une réparation ligne
+par ligne (une requête d'agrégat et une écriture par IP, extrapolée depuis
+un échantillon d'IPs). Vérifie que les profils reconstruits correspondent
+aux menaces.
+
+Usage: python benchmarks/bench_profile_rebuild.py [--threats 2000000] [--ips 200000] [--chunks 1000 5000 50000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, text
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'api'))
+
+from profiles import rebuild_chunk  # noqa: E402
+
+SCHEMA = [
+    """CREATE TABLE threats (
+        id INTEGER PRIMARY KEY, timestamp DATETIME NOT NULL, honeypot_id VARCHAR(50) NOT NULL,
+        service VARCHAR(50) NOT NULL, attacker_ip VARCHAR(45) NOT NULL, attack_type VARCHAR(100) NOT NULL,
+        risk_score INTEGER, sample_rate FLOAT)""",
+    "CREATE INDEX idx_attacker_ip ON threats (attacker_ip)",
+    """CREATE TABLE attacker_profiles (
+        id INTEGER PRIMARY KEY, ip_address VARCHAR(45) UNIQUE NOT NULL, first_seen DATETIME,
+        last_seen DATETIME, total_attacks INTEGER, risk_level VARCHAR(20), country VARCHAR(2))""",
+]
+START = datetime(2025, 7, 1)
+
+
+def populate(engine, threats, ips):
+    rng = random.Random(42)
+    pool = [f"{rng.randint(1, 223)}.{rng.randint(0, 255)}.{rng.randint(0, 255)}.{rng.randint(1, 254)}"
+            for _ in range(ips)]
+    step = timedelta(days=30) / threats
+    with engine.begin() as connection:
+        for statement in SCHEMA:
+            connection.execute(text(statement))
+        insert = text("INSERT INTO threats (timestamp, honeypot_id, service, attacker_ip, attack_type, "
+                      "risk_score, sample_rate) VALUES (:ts, 'honeypot-001', 'ssh', :ip, 'brute_force', 5, :rate)")
+        batch = []
+        for i in range(threats):
+            ip = pool[min(int(rng.paretovariate(1.1)) - 1, ips - 1) if rng.random() < 0.5 else rng.randrange(ips)]
+            batch.append({'ts': (START + step * i).strftime('%Y-%m-%d %H:%M:%S.%f'), 'ip': ip,
+                          'rate': rng.choice([0.5, 0.125]) if rng.random() < 0.05 else None})
+            if len(batch) == 50_000:
+                connection.execute(insert, batch)
+                batch = []
+        if batch:
+            connection.execute(insert, batch)
+        # Profils faussés, comme avec le double comptage
+        connection.execute(text("INSERT INTO attacker_profiles (ip_address, first_seen, last_seen, total_attacks, "
+                                "risk_level) SELECT DISTINCT attacker_ip, '2025-08-01', '2025-08-01', 1, 'low' "
+                                "FROM threats"))
+
+
+def chunked(engine, size):
+    after, chunks, written = '', 0, 0
+    while True:
+        with engine.begin() as connection:
+            upto, count = rebuild_chunk(connection, after, size)
+        chunks += 1
+        written += count
+        if upto is None:
+            return chunks, written
+        after = upto
+
+
+def row_by_row(engine, sample):
+    """Référence: une lecture d'agrégat et une mise à jour par IP"""
+    with engine.begin() as connection:
+        ips = [row[0] for row in connection.execute(text(
+            "SELECT ip_address FROM attacker_profiles ORDER BY random() LIMIT :n"), {'n': sample})]
+        start = time.perf_counter()
+        for ip in ips:
+            first, last, total = connection.execute(text(
+                "SELECT MIN(timestamp), MAX(timestamp), SUM(CAST(ROUND(1.0 / COALESCE(sample_rate, 1)) AS INTEGER)) "
+                "FROM threats WHERE attacker_ip = :ip"), {'ip': ip}).one()
+            connection.execute(text("UPDATE attacker_profiles SET first_seen = :f, last_seen = :l, total_attacks = :t "
+                                    "WHERE ip_address = :ip"), {'f': first, 'l': last, 't': total, 'ip': ip})
+        elapsed = time.perf_counter() - start
+        connection.rollback()
+    return elapsed / len(ips)
+
+
+def check(engine):
+    """Profils qui diffèrent d'un recalcul direct"""
+    with engine.connect() as connection:
+        return connection.execute(text("""
+            SELECT COUNT(*) FROM attacker_profiles p JOIN (
+                SELECT attacker_ip, MIN(timestamp) f, MAX(timestamp) l,
+                       SUM(CAST(ROUND(1.0 / COALESCE(sample_rate, 1)) AS INTEGER)) t
+                FROM threats GROUP BY attacker_ip
+            ) a ON a.attacker_ip = p.ip_address
+            WHERE p.first_seen IS NOT a.f OR p.last_seen IS NOT a.l OR p.total_attacks IS NOT a.t
+        """)).scalar()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--threats', type=int, default=2_000_000)
+    parser.add_argument('--ips', type=int, default=200_000)
+    parser.add_argument('--chunks', type=int, nargs='+', default=[1000, 5000, 50_000])
+    parser.add_argument('--sample', type=int, default=2000, help="IPs pour la référence ligne par ligne")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(f"sqlite:///{os.path.join(directory, 'threats.db')}")
+        start = time.perf_counter()
+        populate(engine, args.threats, args.ips)
+        with engine.connect() as connection:
+            profiles = connection.execute(text("SELECT COUNT(*) FROM attacker_profiles")).scalar()
+        print(f"{args.threats} menaces, {profiles} IPs (base générée en {time.perf_counter() - start:.1f}s)")
+
+        per_ip = row_by_row(engine, args.sample)
+        print(f"Ligne par ligne: {per_ip * 1e6:.0f}µs par IP, soit ~{per_ip * profiles:.1f}s estimées")
+        print()
+        print(f"{'tranche':>9} {'tranches':>9} {'réécrits':>9} {'durée':>8} {'menaces/s':>11} {'gain':>6} {'écarts':>7}")
+        print("-" * 66)
+        for size in args.chunks:
+            with engine.begin() as connection:
+                connection.execute(text("UPDATE attacker_profiles SET total_attacks = total_attacks + 1"))
+            start = time.perf_counter()
+            chunks, written = chunked(engine, size)
+            elapsed = time.perf_counter() - start
+            print(f"{size:>9} {chunks:>9} {written:>9} {elapsed:>7.1f}s {args.threats / elapsed:>11.0f} "
+                  f"{per_ip * profiles / elapsed:>5.0f}x {check(engine):>7}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Benchmark du coût du profileur par échantillonnage
+Mesure la durée d'une charge CPU (sérialisation JSON d'événements, comme
+l'ingestion) sans profileur puis profilée à plusieurs intervalles, avec
+quelques threads en attente en plus (workers, pool d'exécution), et le coût
+d'un relevé seul. La pile d'un thread en attente n'est parcourue qu'une fois.
+Sur une machine à un cœur, le surcoût mesuré est surtout celui des
+passages du GIL et varie de quelques % d'une exécution à l'autre.
+
+Usage: python benchmarks/bench_profiler.py [--rounds 5] [--idle-threads 0 16]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'common'))
+
+from sampling_profiler import SamplingProfiler  # noqa: E402
+
+EVENT = {
+    'timestamp': '2025-07-01T12:00:00', 'honeypot_id': 'honeypot-001', 'service': 'ssh',
+    'attacker_ip': '203.0.113.7', 'attacker_port': 40000, 'attack_type': 'brute_force',
+    'payload': {'username': 'root', 'password': 'toor', 'client_version': 'SSH-2.0-libssh2_1.9.0'},
+    'risk_score': 5
+}
+
+
+def nested(depth, n):
+    """Charge avec une pile de profondeur réaliste (~30 cadres)"""
+    if depth:
+        return nested(depth - 1, n)
+    total = 0
+    for _ in range(n):
+        total += len(json.loads(json.dumps(EVENT)))
+    return total
+
+
+def workload():
+    start = time.perf_counter()
+    nested(25, 40_000)
+    return time.perf_counter() - start
+
+
+def waiting(stop, depth=30):
+    """Thread en attente au bout d'une pile de `depth` cadres"""
+    return waiting(stop, depth - 1) if depth else stop.wait()
+
+
+def sample_cost(idle, repeat=5000):
+    stop = threading.Event()
+    threads = [threading.Thread(target=waiting, args=(stop,), daemon=True) for _ in range(idle)]
+    for thread in threads:
+        thread.start()
+    profiler = SamplingProfiler()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        profiler._sample()
+    elapsed = time.perf_counter() - start
+    stop.set()
+    return elapsed / repeat
+
+
+def median_time(rounds, interval=None, idle=0):
+    stop = threading.Event()
+    threads = [threading.Thread(target=waiting, args=(stop,), daemon=True) for _ in range(idle)]
+    for thread in threads:
+        thread.start()
+    times, samples = [], 0
+    for _ in range(rounds):
+        if interval is None:
+            times.append(workload())
+            continue
+        with SamplingProfiler(interval) as profiler:
+            times.append(workload())
+        samples += profiler.samples
+    stop.set()
+    return statistics.median(times), samples // rounds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--idle-threads', type=int, nargs='+', default=[0, 16])
+    parser.add_argument('--intervals-ms', type=float, nargs='+', default=[1, 5, 10])
+    args = parser.parse_args()
+
+    print(f"{'threads':>8} {'intervalle':>11} {'durée':>9} {'relevés':>8} {'surcoût':>8}")
+    print("-" * 50)
+    for idle in args.idle_threads:
+        base, _ = median_time(args.rounds, idle=idle)
+        print(f"{idle + 1:>8} {'sans':>11} {base * 1000:>7.0f}ms {'-':>8} {'-':>8}   "
+              f"(un relevé: {sample_cost(idle) * 1e6:.1f}µs)")
+        for interval in args.intervals_ms:
+            elapsed, samples = median_time(args.rounds, interval / 1000, idle)
+            print(f"{idle + 1:>8} {interval:>9g}ms {elapsed * 1000:>7.0f}ms {samples:>8} "
+                  f"{100 * (elapsed - base) / base:>7.1f}%")
+
+
+if __name__ == '__main__':
+    main()
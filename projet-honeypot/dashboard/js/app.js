@@ -16,11 +16,16 @@ class HoneypotDashboard {
         this.components = {};
         this.data = {
             stats: null,
+            timeseries: { timeline: null, trends: null },
             threats: [],
             attackers: []
         };
         this.updateIntervals = {};
-        this.lastThreatCount = 0;
+        this.lastThreatId = 0;
+        // Version des données reçue de /api/dashboard (deltas via since_version)
+        this.dashboardVersion = null;
+        this.dashboardChartHours = null;
+        this.lastFullSnapshot = 0;
         this.soundEnabled = true;
         this.init();
     }
@@ -126,30 +131,35 @@ class HoneypotDashboard {
     
     /**
      * Met à jour toutes les données du dashboard
+     * Une seule requête /api/dashboard: instantané complet au premier appel,
+     * au changement de plage et toutes les DASHBOARD_FULL_REFRESH ms (les
+     * fenêtres glissantes évoluent même sans nouvelle menace), deltas sinon.
      */
     async updateDashboard() {
         try {
-            // Récupérer les données en parallèle
-            const [stats, threatsData, attackersData] = await Promise.all([
-                API.getStats(CONFIG.CHART_HOURS_DEFAULT),
-                API.getThreats({ perPage: CONFIG.MAX_FEED_ITEMS }),
-                API.getAttackers({ perPage: CONFIG.MAX_ATTACKERS })
-            ]);
+            const chartHours = this.components.charts
+                ? this.components.charts.currentRange
+                : CONFIG.CHART_HOURS_DEFAULT;
+            const full = this.dashboardVersion === null
+                || chartHours !== this.dashboardChartHours
+                || Date.now() - this.lastFullSnapshot > CONFIG.DASHBOARD_FULL_REFRESH;
             
-            // Stocker les données
-            this.data.stats = stats;
-            this.data.threats = threatsData.threats || [];
-            this.data.attackers = attackersData.attackers || [];
+            const snapshot = await API.getDashboard({
+                hours: CONFIG.CHART_HOURS_DEFAULT,
+                chartHours,
+                feed: CONFIG.MAX_FEED_ITEMS,
+                attackers: CONFIG.MAX_ATTACKERS,
+                sinceVersion: full ? null : this.dashboardVersion
+            });
             
-            // Mettre à jour les composants
-            this.updateStats(stats);
-            this.updateLiveFeed(this.data.threats);
-            this.updateCharts();
-            this.updateAttackers();
-            this.updateMap();
-            
-            // Détecter les nouvelles menaces
-            this.detectNewThreats();
+            this.dashboardVersion = snapshot.version;
+            if (full) {
+                this.lastFullSnapshot = Date.now();
+                this.dashboardChartHours = chartHours;
+            }
+            if (snapshot.changed) {
+                this.applySnapshot(snapshot);
+            }
             
             // Mettre à jour l'heure de dernière mise à jour
             this.updateLastUpdate();
@@ -159,6 +169,69 @@ class HoneypotDashboard {
         }
     }
     
+    /**
+     * Applique un instantané (complet ou delta) de /api/dashboard
+     * @param {object} snapshot 
+     */
+    applySnapshot(snapshot) {
+        // Menaces jamais affichées (un instantané complet renvoie aussi les anciennes)
+        const isFirstLoad = this.lastThreatId === 0;
+        const fresh = snapshot.threats.filter(t => t.id > this.lastThreatId);
+        this.data.threats = snapshot.full
+            ? snapshot.threats
+            : [...snapshot.threats, ...this.data.threats].slice(0, CONFIG.MAX_FEED_ITEMS);
+        
+        if (fresh.length > 0) {
+            this.lastThreatId = fresh[0].id;
+            this.updateLiveFeed(fresh);
+            this.updateMap(fresh);
+            if (!isFirstLoad) {
+                this.detectNewThreats(fresh);
+            }
+        }
+        
+        // Sections absentes: inchangées depuis notre version
+        if (snapshot.stats) {
+            this.data.stats = snapshot.stats;
+            this.updateStats(snapshot.stats);
+        }
+        if (snapshot.attackers) {
+            this.data.attackers = snapshot.attackers;
+            this.updateAttackers();
+        }
+        ['timeline', 'trends'].forEach(name => {
+            if (snapshot[name]) {
+                this.data.timeseries[name] = this.mergeTimeseries(this.data.timeseries[name], snapshot[name]);
+            }
+        });
+        if (snapshot.stats || snapshot.timeline || snapshot.trends) {
+            this.updateCharts();
+        }
+    }
+    
+    /**
+     * Fusionne une série partielle (buckets depuis partial_from) avec la précédente
+     * @param {object|null} previous 
+     * @param {object} update 
+     * @returns {object}
+     */
+    mergeTimeseries(previous, update) {
+        if (!update.partial_from || !previous || previous.resolution !== update.resolution) {
+            return update;
+        }
+        
+        const oldPoints = {};
+        previous.series.forEach(s => { oldPoints[s.key] = s.points; });
+        
+        return {
+            ...update,
+            series: update.series.map(s => {
+                const kept = (oldPoints[s.key] || []).filter(p => p.t < update.partial_from);
+                return { ...s, points: [...kept, ...s.points].slice(-s.length) };
+            })
+        };
+    }
+    
     /**
      * Met à jour les statistiques
      */
@@ -283,17 +356,18 @@ class HoneypotDashboard {
         
         this.components.charts.updateAll({
             stats: this.data.stats,
-            threats: this.data.threats
+            timeline: this.data.timeseries.timeline,
+            trends: this.data.timeseries.trends
         });
     }
     
     /**
      * Met à jour la carte
      */
-    updateMap() {
+    updateMap(threats) {
         if (!this.components.worldMap) return;
         
-        this.components.worldMap.updateBatch(this.data.threats);
+        this.components.worldMap.updateBatch(threats);
     }
     
     /**
@@ -325,36 +399,27 @@ class HoneypotDashboard {
     }
     
     /**
-     * Détecte les nouvelles menaces
+     * Détecte les nouvelles menaces critiques
+     * @param {Array} newThreats - Menaces arrivées depuis la dernière mise à jour
      */
-    detectNewThreats() {
-        const currentCount = this.data.threats.length;
+    detectNewThreats(newThreats) {
+        // Vérifier les menaces critiques
+        const criticalThreats = newThreats.filter(t => t.risk_score >= 8);
         
-        if (this.lastThreatCount > 0 && currentCount > this.lastThreatCount) {
-            const newThreats = currentCount - this.lastThreatCount;
+        if (criticalThreats.length > 0) {
+            const threat = criticalThreats[0];
+            const countryInfo = getCountryInfo(threat.country || 'XX');
             
-            // Vérifier les menaces critiques
-            const criticalThreats = this.data.threats
-                .slice(0, newThreats)
-                .filter(t => t.risk_score >= 8);
+            this.showNotification(
+                '🚨 Menace Critique Détectée!',
+                `${threat.attack_type} depuis ${countryInfo.flag} ${countryInfo.name}`,
+                'critical'
+            );
             
-            if (criticalThreats.length > 0) {
-                const threat = criticalThreats[0];
-                const countryInfo = getCountryInfo(threat.country || 'XX');
-                
-                this.showNotification(
-                    '🚨 Menace Critique Détectée!',
-                    `${threat.attack_type} depuis ${countryInfo.flag} ${countryInfo.name}`,
-                    'critical'
-                );
-                
-                if (this.soundEnabled) {
-                    this.playAlertSound();
-                }
+            if (this.soundEnabled) {
+                this.playAlertSound();
             }
         }
-        
-        this.lastThreatCount = currentCount;
     }
     
     /**
@@ -395,9 +460,8 @@ class HoneypotDashboard {
         
         // Événements de changement de plage des graphiques
         document.addEventListener('chartRangeChanged', async (e) => {
-            const hours = e.detail.hours;
-            this.data.stats = await API.getStats(hours);
-            this.updateCharts();
+            // La plage a changé: instantané complet avec les nouvelles séries
+            await this.updateDashboard();
         });
     }
     
@@ -4,7 +4,7 @@
  */
 
 import { TimezoneUtils } from '../utils/timezone.js';
-import { CONFIG, getAttackTypeInfo, getRiskLevel } from '../config.js';
+import { CONFIG, getAttackTypeInfo } from '../config.js';
 
 export class Charts {
     constructor(timelineId, typesId, trendsId) {
@@ -316,17 +316,38 @@ export class Charts {
         });
     }
     
+    /**
+     * Formate le début d'un bucket selon sa résolution et la plage affichée
+     * @param {string} timestamp - Début du bucket (UTC)
+     * @param {number} resolution - Taille du bucket (secondes)
+     * @returns {string}
+     */
+    formatBucket(timestamp, resolution) {
+        const date = TimezoneUtils.utcToLocal(timestamp);
+        const options = { timeZone: 'Europe/Paris', hour12: false };
+        if (resolution >= 86400) {
+            Object.assign(options, { day: '2-digit', month: 'short' });
+        } else if (this.currentRange > 24) {
+            Object.assign(options, { day: '2-digit', month: '2-digit', hour: '2-digit', minute: '2-digit' });
+        } else {
+            Object.assign(options, { hour: '2-digit', minute: '2-digit' });
+        }
+        return date.toLocaleString('fr-FR', options);
+    }
+    
     /**
      * Met à jour les données de la timeline
-     * @param {Array} threats 
+     * @param {object} timeseries - Réponse de /api/stats/timeseries (sans group_by)
      */
-    updateTimeline(threats) {
-        if (!this.charts.timeline) return;
+    updateTimeline(timeseries) {
+        if (!this.charts.timeline || !timeseries.series) return;
         
-        const hourlyData = TimezoneUtils.groupByHour(threats, 'timestamp', this.currentRange);
+        const points = timeseries.series.length ? timeseries.series[0].points : [];
         
-        this.charts.timeline.data.labels = Object.keys(hourlyData);
-        this.charts.timeline.data.datasets[0].data = Object.values(hourlyData);
+        this.charts.timeline.data.labels = points.map(p => this.formatBucket(p.t, timeseries.resolution));
+        this.charts.timeline.data.datasets[0].data = points.map(p => p.count);
+        // Points masqués sur les longues séries (lisibilité)
+        this.charts.timeline.data.datasets[0].pointRadius = points.length > 60 ? 0 : 3;
         
         // Animation smooth
         this.charts.timeline.update('active');
@@ -353,59 +374,24 @@ export class Charts {
     
     /**
      * Met à jour les tendances de risque
-     * @param {Array} threats 
+     * @param {object} timeseries - Réponse de /api/stats/timeseries?group_by=risk_level
      */
-    updateTrends(threats) {
-        if (!this.charts.trends) return;
-        
-        // Grouper par heure et niveau de risque
-        const hourlyRisks = {};
-        const hours = 12; // Dernières 12 heures pour les tendances
-        const now = new Date();
+    updateTrends(timeseries) {
+        if (!this.charts.trends || !timeseries.series) return;
         
-        // Initialiser
-        for (let i = hours - 1; i >= 0; i--) {
-            const hour = new Date(now - i * 60 * 60 * 1000);
-            const key = hour.toLocaleTimeString('fr-FR', { 
-                timeZone: 'Europe/Paris',
-                hour: '2-digit',
-                minute: '00',
-                hour12: false
-            });
-            hourlyRisks[key] = { low: 0, medium: 0, high: 0, critical: 0 };
-        }
+        // Une série par niveau de risque, mêmes buckets pour toutes
+        const byLevel = {};
+        timeseries.series.forEach(s => { byLevel[s.key] = s.points; });
+        const reference = timeseries.series.length ? timeseries.series[0].points : [];
         
-        // Compter
-        threats.forEach(threat => {
-            const date = TimezoneUtils.utcToLocal(threat.timestamp);
-            const hoursSinceNow = (now - date) / (60 * 60 * 1000);
-            
-            if (hoursSinceNow <= hours) {
-                const key = date.toLocaleTimeString('fr-FR', { 
-                    timeZone: 'Europe/Paris',
-                    hour: '2-digit',
-                    minute: '00',
-                    hour12: false
-                });
-                
-                if (hourlyRisks[key]) {
-                    const level = getRiskLevel(threat.risk_score);
-                    if (threat.risk_score <= 3) hourlyRisks[key].low++;
-                    else if (threat.risk_score <= 6) hourlyRisks[key].medium++;
-                    else if (threat.risk_score <= 8) hourlyRisks[key].high++;
-                    else hourlyRisks[key].critical++;
-                }
-            }
+        this.charts.trends.data.labels = reference.map(p => this.formatBucket(p.t, timeseries.resolution));
+        ['low', 'medium', 'high', 'critical'].forEach((level, i) => {
+            const points = byLevel[level];
+            // Séries sous-échantillonnées (LTTB): chaque niveau garde ses propres buckets
+            const counts = new Map((points || []).map(p => [p.t, p.count]));
+            this.charts.trends.data.datasets[i].data = reference.map(p => counts.get(p.t) || 0);
         });
         
-        // Mettre à jour le graphique
-        const labels = Object.keys(hourlyRisks);
-        this.charts.trends.data.labels = labels;
-        this.charts.trends.data.datasets[0].data = labels.map(k => hourlyRisks[k].low);
-        this.charts.trends.data.datasets[1].data = labels.map(k => hourlyRisks[k].medium);
-        this.charts.trends.data.datasets[2].data = labels.map(k => hourlyRisks[k].high);
-        this.charts.trends.data.datasets[3].data = labels.map(k => hourlyRisks[k].critical);
-        
         this.charts.trends.update('active');
     }
     
@@ -441,12 +427,15 @@ export class Charts {
     
     /**
      * Met à jour tous les graphiques
-     * @param {object} data 
+     * @param {object} data - { stats, timeline, trends }
      */
     updateAll(data) {
-        if (data.threats) {
-            this.updateTimeline(data.threats);
-            this.updateTrends(data.threats);
+        if (data.timeline) {
+            this.updateTimeline(data.timeline);
+        }
+        
+        if (data.trends) {
+            this.updateTrends(data.trends);
         }
         
         if (data.stats) {
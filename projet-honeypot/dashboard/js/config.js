@@ -15,6 +15,7 @@ export const CONFIG = {
     CLOCK_UPDATE_INTERVAL: 1000,  // Horloge
     LIVE_FEED_INTERVAL: 3000,     // Feed live
     STATS_UPDATE_INTERVAL: 10000, // Statistiques
+    DASHBOARD_FULL_REFRESH: 60000, // Instantané complet (deltas entre deux)
     
     // === Cache Configuration ===
     CACHE_DURATION: 60000, // 1 minute
@@ -25,6 +26,10 @@ export const CONFIG = {
     MAX_ATTACKERS: 10,
     CHART_HOURS_DEFAULT: 24,
     
+    // Colonnes demandées à l'API pour les listes (?fields=, sans le payload)
+    FEED_FIELDS: ['id', 'timestamp', 'service', 'attacker_ip', 'attack_type', 'risk_score'],
+    ATTACKER_FIELDS: ['ip_address', 'total_attacks', 'risk_level', 'country'],
+    
     // === Risk Levels ===
     RISK_LEVELS: {
         LOW: { max: 3, color: '#00ff88', label: 'Faible' },
@@ -38,6 +43,7 @@ export const CONFIG = {
         brute_force: { icon: '🔑', label: 'Brute Force' },
         sql_injection: { icon: '💉', label: 'SQL Injection' },
         command_injection: { icon: '🐚', label: 'Command Injection' },
+        shell_session: { icon: '💻', label: 'Session Shell' },
         path_traversal: { icon: '📁', label: 'Path Traversal' },
         reconnaissance: { icon: '🔍', label: 'Reconnaissance' },
         unauthorized_access: { icon: '🚫', label: 'Accès Non Autorisé' },
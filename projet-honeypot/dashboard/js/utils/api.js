@@ -178,6 +178,34 @@ class APIManager {
         return this.get('/api/stats', { hours });
     }
     
+    /**
+     * Récupère l'instantané du dashboard (tout en une requête, jamais mis en cache)
+     * @param {object} options - hours, chartHours, feed, attackers, sinceVersion (delta)
+     * @returns {Promise<object>}
+     */
+    async getDashboard(options = {}) {
+        const params = {
+            hours: options.hours,
+            chart_hours: options.chartHours,
+            feed: options.feed,
+            attackers: options.attackers,
+            since_version: options.sinceVersion
+        };
+        
+        return this.get('/api/dashboard', params, false);
+    }
+    
+    /**
+     * Récupère les séries temporelles agrégées côté serveur (quelques centaines de points)
+     * @param {number} hours 
+     * @param {string} groupBy - service, attack_type, risk_level ou null (total)
+     * @param {string} resolution - 'auto', secondes ou 5m/1h/1d
+     * @returns {Promise<object>}
+     */
+    async getTimeseries(hours = 24, groupBy = null, resolution = 'auto') {
+        return this.get('/api/stats/timeseries', { hours, group_by: groupBy, resolution });
+    }
+    
     /**
      * Récupère les menaces
      * @param {object} filters 
@@ -191,7 +219,8 @@ class APIManager {
             attack_type: filters.attackType,
             attacker_ip: filters.attackerIp,
             start_date: filters.startDate,
-            end_date: filters.endDate
+            end_date: filters.endDate,
+            fields: filters.fields ? filters.fields.join(',') : undefined
         };
         
         return this.get('/api/threats', params);
@@ -215,7 +244,8 @@ class APIManager {
         const params = {
             page: filters.page || 1,
             per_page: filters.perPage || 20,
-            risk_level: filters.riskLevel
+            risk_level: filters.riskLevel,
+            fields: filters.fields ? filters.fields.join(',') : undefined
         };
         
         return this.get('/api/attackers', params);
@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+"""
+Feature store local du détecteur ML
+Stocke en colonnes (fichiers .npy mappés en mémoire) les menaces déjà
+récupérées depuis l'API, avec leurs features calculées une seule fois
+(les tokens hachés des payloads en CSR: data/indices/indptr).
+La synchronisation est incrémentale: seules les menaces d'id supérieur
+au watermark sont demandées à l'API. Les ids sont attribués à l'insertion
+mais visibles au commit: une transaction lente peut publier un id inférieur
+au watermark. Les trous des SYNC_OVERLAP_IDS derniers ids sont donc retenus
+et redemandés à chaque synchronisation; au-delà, une menace en retard est
+perdue pour le store.
+"""
+
+import json
+import os
+import shutil
+from datetime import datetime, timedelta
+
+import numpy as np
+import requests
+from scipy import sparse
+
+from ml_features import FEATURE_COLUMNS, FeaturePipeline
+
+# Colonnes catégorielles stockées sous forme de codes + vocabulaire
+CATEGORICAL_COLUMNS = ('attacker_ip', 'service', 'attack_type', 'honeypot_id')
+# Toutes les colonnes denses d'un segment
+COLUMNS = ('id', 'timestamp', 'features') + CATEGORICAL_COLUMNS
+# Colonnes creuses (matrices CSR stockées en trois fichiers)
+SPARSE_COLUMNS = ('payload',)
+
+META_FILE = 'meta.json'
+VOCAB_FILE = 'vocab.json'
+# Ids manquants sous le watermark encore attendus (commits hors d'ordre)
+SYNC_OVERLAP_IDS = 1000
+
+
+class FeatureStore:
+    """Stockage colonne des menaces, indexé par id et lu par tranches de temps"""
+
+    def __init__(self, path, pipeline=None, retention_hours=168, max_segments=32, clock=datetime.utcnow):
+        self.path = path
+        self.pipeline = pipeline or FeaturePipeline()
+        self.retention = timedelta(hours=retention_hours)
+        self.max_segments = max_segments
+        self.clock = clock  # Heure UTC courante (figée par les benchmarks sur données synthétiques)
+
+        os.makedirs(self.path, exist_ok=True)
+        self.meta = self._read_json(META_FILE, {'watermark': 0, 'next_segment': 1, 'segments': []})
+        vocab = self._read_json(VOCAB_FILE, {name: [] for name in CATEGORICAL_COLUMNS})
+        self.vocab = {name: list(vocab.get(name, [])) for name in CATEGORICAL_COLUMNS}
+        self._codes = {name: {value: code for code, value in enumerate(values)}
+                       for name, values in self.vocab.items()}
+
+    @property
+    def watermark(self):
+        """Plus grand id de menace présent dans le store"""
+        return self.meta['watermark']
+
+    @property
+    def gaps(self):
+        """Ids manquants parmi les SYNC_OVERLAP_IDS derniers (transactions pas encore visibles)"""
+        return self.meta.get('gaps', [])
+
+    def __len__(self):
+        return sum(segment['rows'] for segment in self.meta['segments'])
+
+    # === Synchronisation ===
+
+    def sync(self, api_url, batch_size=1000, flush_rows=100_000, timeout=30):
+        """Récupère les menaces d'id > watermark et les ajoute au store
+
+        Retourne le nombre de menaces ajoutées.
+        """
+        # Reprise au plus ancien trou: les menaces déjà stockées sont écartées par append()
+        params = {'since_id': min(self.gaps) - 1 if self.gaps else self.watermark, 'per_page': batch_size}
+        if self.watermark == 0:
+            # Premier remplissage: inutile de remonter au-delà de la rétention
+            params['start_date'] = (self.clock() - self.retention).isoformat()
+
+        pending = []
+        added = 0
+        while True:
+            response = requests.get(f"{api_url}/api/threats", params=params, timeout=timeout)
+            response.raise_for_status()
+            page = response.json()
+            threats = page['threats']
+            if not threats:
+                break
+
+            pending.extend(threats)
+            params['since_id'] = threats[-1]['id']
+            if len(pending) >= flush_rows:
+                added += self.append(pending)
+                pending = []
+            if not page.get('has_more', len(threats) == batch_size):
+                break
+
+        if pending:
+            added += self.append(pending)
+        return added
+
+    def append(self, threats):
+        """Ajoute des menaces (format Threat.to_dict()) dans un nouveau segment"""
+        gaps = set(self.gaps)
+        threats = [t for t in threats if t['id'] > self.watermark or t['id'] in gaps]
+        if not threats:
+            return 0
+        self.meta['gaps'] = self._missing_ids(gaps, [t['id'] for t in threats])
+
+        columns = {
+            'id': np.array([t['id'] for t in threats], dtype=np.int64),
+            'timestamp': _to_epoch_us([t['timestamp'] for t in threats]),
+            'features': self.pipeline.transform(threats),
+            'payload': self.pipeline.transform_payloads(threats),
+        }
+        for name in CATEGORICAL_COLUMNS:
+            columns[name] = self._encode(name, [t[name] for t in threats])
+
+        self._write_segment(columns)
+        self._compact_if_needed()
+        return len(threats)
+
+    def _missing_ids(self, gaps, ids):
+        """Trous restants après réception de `ids`, limités aux SYNC_OVERLAP_IDS derniers ids"""
+        received = set(ids)
+        watermark = max(self.watermark, max(ids))
+        floor = watermark - SYNC_OVERLAP_IDS
+        # Premier remplissage: rien n'est attendu avant la première menace reçue
+        lower = max(self.watermark if self.watermark else min(ids), floor)
+        missing = {i for i in gaps if i > floor} | set(range(lower + 1, watermark))
+        return sorted(missing - received)
+
+    def reset(self):
+        """Vide le store (la prochaine synchronisation repart de zéro)"""
+        for segment in self.meta['segments']:
+            shutil.rmtree(os.path.join(self.path, segment['name']), ignore_errors=True)
+        self.meta = {'watermark': 0, 'next_segment': self.meta['next_segment'], 'segments': []}
+        self.vocab = {name: [] for name in CATEGORICAL_COLUMNS}
+        self._codes = {name: {} for name in CATEGORICAL_COLUMNS}
+        self._write_json(VOCAB_FILE, self.vocab)
+        self._write_json(META_FILE, self.meta)
+
+    # === Lecture ===
+
+    def read(self, since=None, until=None):
+        """Retourne les colonnes des menaces dont le timestamp est dans [since, until]
+
+        Les segments hors de l'intervalle ne sont pas ouverts; les autres sont
+        lus par memory-map et seules les lignes retenues sont copiées.
+        """
+        start = _datetime_to_us(since) if since else None
+        end = _datetime_to_us(until) if until else None
+
+        parts = {name: [] for name in COLUMNS + SPARSE_COLUMNS}
+        for segment in self.meta['segments']:
+            if start is not None and segment['max_ts'] < start:
+                continue
+            if end is not None and segment['min_ts'] > end:
+                continue
+
+            data = self._load_segment(segment['name'])
+            mask = np.ones(segment['rows'], dtype=bool)
+            if start is not None:
+                mask &= data['timestamp'] >= start
+            if end is not None:
+                mask &= data['timestamp'] <= end
+            for name in COLUMNS:
+                parts[name].append(np.asarray(data[name][mask]))
+            for name in SPARSE_COLUMNS:
+                parts[name].append(data[name][np.flatnonzero(mask)])
+
+        if not parts['id']:
+            return self._empty_columns()
+
+        columns = {name: np.concatenate(parts[name]) for name in COLUMNS}
+        for name in SPARSE_COLUMNS:
+            columns[name] = sparse.vstack(parts[name], format='csr')
+        order = np.argsort(columns['timestamp'], kind='stable')
+        return {name: values[order] for name, values in columns.items()}
+
+    def decode(self, name, codes):
+        """Retourne les chaînes correspondant aux codes d'une colonne catégorielle"""
+        return np.asarray(self.vocab[name], dtype=object)[codes]
+
+    def to_threats(self, columns, indices=None):
+        """Reconstruit des dictionnaires de menace (sans payload) à partir de colonnes"""
+        if indices is None:
+            indices = np.arange(len(columns['id']))
+        decoded = {name: self.decode(name, columns[name][indices]) for name in CATEGORICAL_COLUMNS}
+        timestamps = columns['timestamp'][indices].astype('datetime64[us]').astype(datetime)
+        features = columns['features'][indices]
+        return [
+            {
+                'id': int(columns['id'][i]),
+                'timestamp': timestamps[k].isoformat(),
+                'honeypot_id': decoded['honeypot_id'][k],
+                'service': decoded['service'][k],
+                'attacker_ip': decoded['attacker_ip'][k],
+                'attacker_port': int(features[k, 6]),
+                'attack_type': decoded['attack_type'][k],
+                'risk_score': int(features[k, 3])
+            }
+            for k, i in enumerate(indices)
+        ]
+
+    # === Stockage ===
+
+    def _encode(self, name, values):
+        codes = self._codes[name]
+        vocab = self.vocab[name]
+        result = np.empty(len(values), dtype=np.int32)
+        for i, value in enumerate(values):
+            code = codes.get(value)
+            if code is None:
+                code = codes[value] = len(vocab)
+                vocab.append(value)
+            result[i] = code
+        return result
+
+    def _write_segment(self, columns, replace=()):
+        """Écrit un segment puis publie meta.json (le segment n'existe qu'une fois référencé)"""
+        name = f"segment-{self.meta['next_segment']:06d}"
+        tmp_dir = os.path.join(self.path, f".{name}.tmp")
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        for column, values in columns.items():
+            if column in SPARSE_COLUMNS:
+                for part in ('data', 'indices', 'indptr'):
+                    np.save(os.path.join(tmp_dir, f"{column}.{part}.npy"), getattr(values, part))
+            else:
+                np.save(os.path.join(tmp_dir, f"{column}.npy"), values)
+        os.replace(tmp_dir, os.path.join(self.path, name))
+
+        self._write_json(VOCAB_FILE, self.vocab)
+        segments = [s for s in self.meta['segments'] if s['name'] not in replace]
+        if len(columns['id']):
+            segments.append({
+                'name': name,
+                'rows': int(len(columns['id'])),
+                'min_id': int(columns['id'].min()),
+                'max_id': int(columns['id'].max()),
+                'min_ts': int(columns['timestamp'].min()),
+                'max_ts': int(columns['timestamp'].max())
+            })
+        self.meta = {
+            'watermark': max([self.meta['watermark']] + [s['max_id'] for s in segments]),
+            'next_segment': self.meta['next_segment'] + 1,
+            'segments': segments,
+            'gaps': self.gaps
+        }
+        self._write_json(META_FILE, self.meta)
+
+        for old in replace:
+            shutil.rmtree(os.path.join(self.path, old), ignore_errors=True)
+
+    def _compact_if_needed(self):
+        """Fusionne les segments et purge les menaces hors rétention"""
+        if len(self.meta['segments']) <= self.max_segments:
+            return
+        self.compact()
+
+    def compact(self):
+        """Réécrit le store en un seul segment, sans les menaces expirées"""
+        old_segments = [s['name'] for s in self.meta['segments']]
+        columns = self.read(since=self.clock() - self.retention)
+
+        # Vocabulaires reconstruits pour ne garder que les valeurs encore utilisées
+        for name in CATEGORICAL_COLUMNS:
+            used, remapped = np.unique(columns[name], return_inverse=True)
+            self.vocab[name] = [self.vocab[name][code] for code in used]
+            self._codes[name] = {value: code for code, value in enumerate(self.vocab[name])}
+            columns[name] = remapped.astype(np.int32)
+
+        self._write_segment(columns, replace=old_segments)
+
+    def _load_segment(self, name):
+        directory = os.path.join(self.path, name)
+        data = {column: np.load(os.path.join(directory, f"{column}.npy"), mmap_mode='r')
+                for column in COLUMNS}
+        for column in SPARSE_COLUMNS:
+            shape = (len(data['id']), self.pipeline.payload_hasher.n_features)
+            if not os.path.exists(os.path.join(directory, f"{column}.indptr.npy")):
+                # Segment antérieur aux features de payload: lignes vides
+                data[column] = sparse.csr_matrix(shape, dtype=np.float32)
+                continue
+            parts = [np.load(os.path.join(directory, f"{column}.{part}.npy"), mmap_mode='r')
+                     for part in ('data', 'indices', 'indptr')]
+            data[column] = sparse.csr_matrix(tuple(parts), shape=shape)
+        return data
+
+    def _empty_columns(self):
+        columns = {name: np.empty(0, dtype=np.int32) for name in CATEGORICAL_COLUMNS}
+        columns['id'] = np.empty(0, dtype=np.int64)
+        columns['timestamp'] = np.empty(0, dtype=np.int64)
+        columns['features'] = np.empty((0, len(FEATURE_COLUMNS)), dtype=np.int64)
+        columns['payload'] = sparse.csr_matrix((0, self.pipeline.payload_hasher.n_features), dtype=np.float32)
+        return columns
+
+    def _read_json(self, filename, default):
+        path = os.path.join(self.path, filename)
+        if not os.path.exists(path):
+            return default
+        with open(path) as f:
+            return json.load(f)
+
+    def _write_json(self, filename, data):
+        path = os.path.join(self.path, filename)
+        with open(f"{path}.tmp", 'w') as f:
+            json.dump(data, f)
+        os.replace(f"{path}.tmp", path)
+
+
+def _to_epoch_us(timestamps):
+    """Timestamps ISO 8601 -> microsecondes epoch (int64)"""
+    return np.array(timestamps, dtype='datetime64[us]').astype(np.int64)
+
+
+def _datetime_to_us(value):
+    return np.datetime64(value, 'us').astype(np.int64)
@@ -8,14 +8,32 @@ import asyncio
 import json
 import logging
 import os
+import re
+import signal
 import socket
 import sys
+import time
+import uuid
+from collections import Counter, deque
 from datetime import datetime
-from typing import Dict, Any
+from functools import partial
+from typing import Dict, Any, List, Optional, Tuple
 import aiohttp
 from aiohttp import web
 import configparser
 
+# Modules communs avec l'API (copiés à côté d'app.py dans l'image Docker)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'common'))
+
+from ip_lists import IPLists, Match  # noqa: E402
+from listeners import PortListener, unescape  # noqa: E402
+from load_shedding import LoadShedder  # noqa: E402
+from log_index import INDEX_SUFFIX, index_segment  # noqa: E402
+from sample_store import SampleStore, iter_chunks  # noqa: E402
+from sampling_profiler import ProfilerBusy, profile_for  # noqa: E402
+from scan_tracker import ScanTracker  # noqa: E402
+from sessions import FakeShell, SessionManager, is_malicious_command  # noqa: E402
+
 # Configuration du logging
 LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
 logging.basicConfig(
@@ -31,18 +49,123 @@ logger = logging.getLogger('honeypot')
 # Configuration globale
 API_URL = os.environ.get('API_URL', 'http://localhost:5000')
 HONEYPOT_ID = os.environ.get('HONEYPOT_ID', 'honeypot-001')
+CONFIG_FILE = os.path.join(
+    os.environ.get('CONFIG_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'config')),
+    'honeypot.conf'
+)
+
+# File d'attente d'acceptation: les rafales de connexions des scanners
+# débordent la valeur par défaut (100) et restent bloquées côté client
+ACCEPT_BACKLOG = int(os.environ.get('ACCEPT_BACKLOG', 1024))
+
+# Détection de scans multi-services (IPs suivies: ~40 octets chacune, préalloués)
+SCAN_WINDOW_SECONDS = float(os.environ.get('SCAN_WINDOW_SECONDS', 60))
+SCAN_THRESHOLD = int(os.environ.get('SCAN_THRESHOLD', 3))
+SCAN_MAX_TRACKED = int(os.environ.get('SCAN_MAX_TRACKED', 1_000_000))
+
+NOT_LISTED = Match(False, ())  # Adresse hors des listes
+
+# Horloge de traçage: monotone, ancrée sur l'heure système (secondes epoch)
+_CLOCK_ANCHOR = time.time() - time.monotonic()
+
+
+def trace_clock() -> float:
+    """Horodatage des étapes du pipeline (voir api/tracing.py)"""
+    return _CLOCK_ANCHOR + time.monotonic()
+
+
+def load_config(path: str = CONFIG_FILE) -> configparser.ConfigParser:
+    """Lit honeypot.conf (configuration vide si absent: valeurs par défaut)"""
+    config = configparser.ConfigParser(interpolation=None)
+    if not config.read(path, encoding='utf-8'):
+        logger.warning(f"Config file not found: {path}, using defaults")
+    return config
 
 
 class AttackLogger:
     """Gère l'enregistrement et l'envoi des attaques détectées"""
     
-    def __init__(self):
+    def __init__(self, max_log_bytes: int = 100 * 2**20, index_on_rotate: bool = True,
+                 ip_lists: Optional[IPLists] = None, send_queue_size: int = 10_000,
+                 send_workers: int = 16, shedder: Optional[LoadShedder] = None):
         self.attack_log_file = '/app/logs/attacks.log'
+        # Rotation par taille: chaque segment scellé est indexé (search_attacks.py)
+        self.max_log_bytes = max_log_bytes
+        self.index_on_rotate = index_on_rotate
+        # Plages exclues (nos scanners) ou étiquetées, partagées avec l'API
+        self.ip_lists = ip_lists
+        self.excluded = 0
+        # Envoi à l'API: files bornées (haut risque en tête) vidées par quelques
+        # workers qui partagent une session HTTP
+        self.send_queue_size = send_queue_size
+        self.send_workers = send_workers
+        self.send_dropped = 0
+        self._priority: deque = deque()
+        self._normal: deque = deque()
+        self._pending = asyncio.Semaphore(0)
+        self._carried: Counter = Counter()
+        self.shedder = shedder or LoadShedder()
+        self._tasks: List[asyncio.Task] = []
+        self._session: Optional[aiohttp.ClientSession] = None
+        # Partagé par tous les services: un scan se voit entre services
+        self.scan_tracker = ScanTracker(
+            window=SCAN_WINDOW_SECONDS,
+            threshold=SCAN_THRESHOLD,
+            capacity=SCAN_MAX_TRACKED
+        )
+    
+    async def record_connection(self, service: str, attacker_ip: str, attacker_port: int,
+                                captured: Optional[float] = None):
+        """Enregistre une connexion acceptée et signale un scan multi-services
+        
+        Appelé à l'acceptation, avant tout échange: un scanner qui ferme
+        aussitôt la connexion est compté aussi.
+        """
+        if not attacker_ip or self._listed(attacker_ip).allowed:
+            return
+        try:
+            services = self.scan_tracker.touch(attacker_ip, service)
+        except ValueError:
+            return  # Pas une adresse IP (socket Unix...)
+        if services:
+            await self.log_attack(
+                service=service,
+                attacker_ip=attacker_ip,
+                attacker_port=attacker_port,
+                attack_type='port_scan',
+                payload={
+                    'services': services,
+                    'window_seconds': self.scan_tracker.window,
+                    'first_seen_seconds_ago': self.scan_tracker.first_seen(attacker_ip)
+                },
+                captured=captured
+            )
+    
+    def _listed(self, attacker_ip: str) -> Match:
+        listed = self.ip_lists.match(attacker_ip) if self.ip_lists else None
+        return listed or NOT_LISTED
     
     async def log_attack(self, service: str, attacker_ip: str, attacker_port: int, 
-                        attack_type: str, payload: Dict[str, Any]):
-        """Enregistre une attaque et l'envoie à l'API"""
+                        attack_type: str, payload: Dict[str, Any],
+                        captured: Optional[float] = None):
+        """Enregistre une attaque et l'envoie à l'API
         
+        captured: trace_clock() à l'acceptation de la connexion (maintenant par défaut)
+        Les plages exclues ne sont ni journalisées ni envoyées, pas plus que
+        les événements délestés en surcharge (retourne None).
+        """
+        listed = self._listed(attacker_ip)
+        if listed.allowed:
+            self.excluded += 1
+            return None
+        risk_score = self._calculate_risk_score(attack_type, payload)
+        sample_rate = self.shedder.sample(attack_type, attacker_ip, risk_score)
+        if sample_rate is None:
+            return None
+        trace = {
+            'trace_id': uuid.uuid4().hex,
+            'stages': {'captured': captured if captured is not None else trace_clock()}
+        }
         attack_data = {
             'timestamp': datetime.utcnow().isoformat(),
             'honeypot_id': HONEYPOT_ID,
@@ -51,25 +174,98 @@ class AttackLogger:
             'attacker_port': attacker_port,
             'attack_type': attack_type,
             'payload': payload,
-            'risk_score': self._calculate_risk_score(attack_type, payload)
+            'risk_score': risk_score,
+            'sample_rate': sample_rate,  # Poids à l'API: 1 / sample_rate
+            'trace': trace
         }
+        if listed.tags:
+            attack_data['ip_tags'] = list(listed.tags)
         
         # Log local
         with open(self.attack_log_file, 'a') as f:
             f.write(json.dumps(attack_data) + '\n')
+            log_size = f.tell()
+        trace['stages']['logged'] = trace_clock()
+        if self.max_log_bytes and log_size >= self.max_log_bytes:
+            self._rotate()
         
-        logger.info(f"[{service}] Attack detected from {attacker_ip}:{attacker_port} - Type: {attack_type}")
+        log = logger.debug if self.shedder.overloaded else logger.info
+        log(f"[{service}] Attack detected from {attacker_ip}:{attacker_port} - Type: {attack_type}")
         
         # Envoi à l'API (sans bloquer si l'API est down)
-        asyncio.create_task(self._send_to_api(attack_data))
+        self._start()
+        self._enqueue(attack_data)
         
         return attack_data
     
+    def _start(self):
+        """Workers d'envoi et surveillance de la charge, au premier événement"""
+        if self._tasks:
+            return
+        self._tasks = [asyncio.create_task(self._send_worker()) for _ in range(self.send_workers)]
+        self._tasks.append(asyncio.create_task(
+            self.shedder.run(lambda: max(len(self._priority), len(self._normal)) / self.send_queue_size)
+        ))
+    
+    def send_backlog(self) -> int:
+        """Événements en attente d'envoi à l'API"""
+        return len(self._priority) + len(self._normal)
+    
+    def _enqueue(self, attack_data: Dict[str, Any]):
+        """Met l'événement en file d'envoi, les menaces à haut risque dans la file prioritaire
+        
+        File pleine: l'événement reste dans le journal local seul et son poids
+        est reporté sur le prochain événement du même type envoyé, pour que
+        les comptes repondérés de l'API restent justes.
+        """
+        attack_type = attack_data['attack_type']
+        queue = self._priority if attack_data['risk_score'] >= self.shedder.keep_risk else self._normal
+        if len(queue) >= self.send_queue_size:
+            self.send_dropped += 1
+            self._carried[attack_type] += 1 / attack_data['sample_rate']
+            if self.send_dropped % 1000 == 1:
+                logger.warning(f"Send queue full: {self.send_dropped} events kept in the local log only")
+            return
+        carried = self._carried.pop(attack_type, 0)
+        if carried:
+            attack_data = dict(attack_data, sample_rate=1 / (1 / attack_data['sample_rate'] + carried))
+        queue.append(attack_data)
+        self._pending.release()
+    
+    async def _send_worker(self):
+        while True:
+            await self._pending.acquire()
+            queue = self._priority if self._priority else self._normal
+            await self._send_to_api(queue.popleft())
+    
+    def _rotate(self):
+        """Renomme attacks.log en attacks.log.<horodatage UTC> et indexe ce segment
+
+        L'index partiel du journal courant suit le segment: il n'est que complété.
+        """
+        segment = f"{self.attack_log_file}.{datetime.utcnow():%Y%m%dT%H%M%S}"
+        suffix = 1
+        while os.path.exists(segment):
+            segment = f"{self.attack_log_file}.{datetime.utcnow():%Y%m%dT%H%M%S}-{suffix}"
+            suffix += 1
+        try:
+            os.replace(self.attack_log_file, segment)
+            if os.path.exists(self.attack_log_file + INDEX_SUFFIX):
+                os.replace(self.attack_log_file + INDEX_SUFFIX, segment + INDEX_SUFFIX)
+        except OSError as e:
+            logger.error(f"Log rotation failed: {e}")
+            return
+        logger.info(f"Attack log rotated to {segment}")
+        if self.index_on_rotate:
+            # Lecture du segment complet: hors de la boucle d'événements
+            asyncio.get_running_loop().run_in_executor(None, index_segment, segment)
+    
     def _calculate_risk_score(self, attack_type: str, payload: Dict[str, Any]) -> int:
         """Calcule un score de risque basique"""
         risk_scores = {
             'brute_force': 5,
             'command_injection': 8,
+            'shell_session': 4,
             'sql_injection': 7,
             'port_scan': 3,
             'malware_upload': 9,
@@ -80,17 +276,15 @@ class AttackLogger:
     
     async def _send_to_api(self, attack_data: Dict[str, Any]):
         """Envoie les données d'attaque à l'API"""
+        if self._session is None:
+            self._session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=5))
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    f"{API_URL}/api/threats",
-                    json=attack_data,
-                    timeout=aiohttp.ClientTimeout(total=5)
-                ) as response:
-                    if response.status == 201:
-                        logger.debug("Attack data sent to API successfully")
-                    else:
-                        logger.warning(f"API returned status {response.status}")
+            attack_data['trace']['stages']['sent'] = trace_clock()
+            async with self._session.post(f"{API_URL}/api/threats", json=attack_data) as response:
+                if response.status == 201:
+                    logger.debug("Attack data sent to API successfully")
+                else:
+                    logger.warning(f"API returned status {response.status}")
         except Exception as e:
             logger.error(f"Failed to send to API: {e}")
 
@@ -98,16 +292,21 @@ class AttackLogger:
 class SSHHoneypot:
     """Simule un serveur SSH vulnérable"""
     
-    def __init__(self, attack_logger: AttackLogger):
+    def __init__(self, attack_logger: AttackLogger, config: Optional[configparser.ConfigParser] = None,
+                 sessions: Optional[SessionManager] = None):
+        config = config or configparser.ConfigParser()
         self.attack_logger = attack_logger
-        self.port = 22
-        self.banner = "SSH-2.0-OpenSSH_5.1p1 Debian-5\r\n"  # Vieille version vulnérable
+        self.sessions = sessions or SessionManager.from_config(config)
+        self.port = config.getint('ssh', 'port', fallback=22)
+        # Vieille version vulnérable
+        self.banner = config.get('ssh', 'banner', fallback="SSH-2.0-OpenSSH_5.1p1 Debian-5") + "\r\n"
         self.common_passwords = ['admin', '123456', 'password', 'root', '12345']
     
     async def start(self):
         """Démarre le serveur SSH honeypot"""
         server = await asyncio.start_server(
-            self.handle_connection, '0.0.0.0', self.port
+            self.handle_connection, '0.0.0.0', self.port, limit=self.sessions.reader_limit,
+            backlog=ACCEPT_BACKLOG
         )
         logger.info(f"SSH Honeypot started on port {self.port}")
         
@@ -115,18 +314,30 @@ class SSHHoneypot:
             await server.serve_forever()
     
     async def handle_connection(self, reader, writer):
-        """Gère une connexion SSH"""
+        """Gère une connexion SSH
+        
+        Sans transport chiffré, seule la bannière du client est lue: la
+        session sert à borner l'attente (inactivité, budget mémoire).
+        """
+        captured = trace_clock()
         addr = writer.get_extra_info('peername')
         logger.debug(f"SSH connection from {addr}")
+        session = None
         
         try:
+            await self.attack_logger.record_connection('ssh', addr[0], addr[1], captured)
+            session = self.sessions.open('ssh', addr[0], addr[1])
+            if session is None:
+                return
+            
             # Envoyer le banner SSH
             writer.write(self.banner.encode())
             await writer.drain()
             
-            # Lire la réponse du client
-            data = await reader.read(1024)
-            if data:
+            # Lire la bannière du client
+            client_banner = await self.sessions.read_line(reader, session)
+            if client_banner is not None:
+                session.command(client_banner)
                 # Simuler une tentative de brute force
                 await self.attack_logger.log_attack(
                     service='ssh',
@@ -134,9 +345,10 @@ class SSHHoneypot:
                     attacker_port=addr[1],
                     attack_type='brute_force',
                     payload={
-                        'client_banner': data.decode('utf-8', errors='ignore'),
+                        'client_banner': client_banner,
                         'attempted_auth': 'password'
-                    }
+                    },
+                    captured=captured
                 )
             
             # Fermer la connexion (échec d'authentification)
@@ -146,6 +358,8 @@ class SSHHoneypot:
         except Exception as e:
             logger.error(f"SSH handler error: {e}")
         finally:
+            if session is not None:
+                self.sessions.close(session)
             writer.close()
             await writer.wait_closed()
 
@@ -153,13 +367,21 @@ class SSHHoneypot:
 class HTTPHoneypot:
     """Simule un serveur web vulnérable"""
     
-    def __init__(self, attack_logger: AttackLogger):
+    def __init__(self, attack_logger: AttackLogger, config: Optional[configparser.ConfigParser] = None):
+        config = config or configparser.ConfigParser()
         self.attack_logger = attack_logger
-        self.port = 80
+        self.port = config.getint('http', 'port', fallback=80)
         self.fake_paths = [
             '/admin', '/login', '/wp-admin', '/phpmyadmin',
             '/.env', '/config.php', '/backup.sql'
         ]
+        # Champs de formulaire lus pour la détection (le reste du corps est ignoré)
+        self.max_form_bytes = config.getint('http', 'max_post_size_kb', fallback=1024) * 1024
+        self.sample_store = SampleStore(
+            root=os.environ.get('SAMPLES_DIR', config.get('uploads', 'store_dir', fallback='/app/samples')),
+            max_sample_bytes=config.getint('uploads', 'max_sample_mb', fallback=10) * 2**20,
+            max_total_bytes=config.getint('uploads', 'max_store_mb', fallback=1024) * 2**20
+        )
     
     async def start(self):
         """Démarre le serveur HTTP honeypot"""
@@ -175,33 +397,46 @@ class HTTPHoneypot:
     
     async def handle_request(self, request):
         """Gère une requête HTTP"""
+        captured = trace_clock()
         attacker_ip = request.remote
         path = request.path
         
+        await self.attack_logger.record_connection('http', attacker_ip, 0, captured)
+        
+        uploads, form = await self._read_body(request)
+        
         # Détection du type d'attaque
         attack_type = 'reconnaissance'
-        if path in self.fake_paths:
+        if uploads:
+            attack_type = 'malware_upload'
+        elif path in self.fake_paths:
             attack_type = 'unauthorized_access'
         elif 'union' in str(request.url).lower() or 'select' in str(request.url).lower():
             attack_type = 'sql_injection'
         elif '../' in path:
             attack_type = 'path_traversal'
-        elif request.method == 'POST' and 'cmd=' in await request.text():
+        elif request.method == 'POST' and b'cmd=' in form:
             attack_type = 'command_injection'
         
+        payload = {
+            'method': request.method,
+            'path': path,
+            'headers': dict(request.headers),
+            'query': str(request.query_string),
+            'user_agent': request.headers.get('User-Agent', 'Unknown')
+        }
+        if uploads:
+            # Empreinte et taille seulement: le contenu est dans le stockage d'échantillons
+            payload['uploads'] = uploads
+        
         # Logger l'attaque
         await self.attack_logger.log_attack(
             service='http',
             attacker_ip=attacker_ip,
             attacker_port=0,  # HTTP ne donne pas le port source facilement
             attack_type=attack_type,
-            payload={
-                'method': request.method,
-                'path': path,
-                'headers': dict(request.headers),
-                'query': str(request.query_string),
-                'user_agent': request.headers.get('User-Agent', 'Unknown')
-            }
+            payload=payload,
+            captured=captured
         )
         
         # Réponse factice
@@ -213,20 +448,94 @@ class HTTPHoneypot:
         else:
             return web.Response(text='<html><body><h1>404 Not Found</h1></body></html>', 
                               status=404, content_type='text/html')
+    
+    # Types déclarés explicitement par le client qui font d'un corps un échantillon
+    BINARY_TYPES = ('application/octet-stream', 'application/zip', 'application/gzip',
+                    'application/java-archive', 'application/x-')
+    
+    async def _read_body(self, request) -> Tuple[List[Dict[str, Any]], bytes]:
+        """Lit le corps de la requête sans le garder en mémoire
+        
+        Les fichiers multipart et les corps binaires (PUT, Content-Type binaire
+        explicite) partent au fil de l'eau dans le stockage d'échantillons; des
+        autres corps (formulaires, JSON, pas de Content-Type...), seuls les
+        max_form_bytes premiers octets sont gardés.
+        Retourne (uploads non vides, début des champs de formulaire).
+        """
+        uploads = []
+        form = bytearray()
+        if not request.can_read_body:
+            return uploads, b''
+        
+        try:
+            if request.content_type.startswith('multipart/'):
+                reader = await request.multipart()
+                while True:
+                    part = await reader.next()
+                    if part is None:
+                        break
+                    if getattr(part, 'filename', None):
+                        record = await self.sample_store.capture(iter_chunks(part.read_chunk))
+                        uploads.append({**record, 'filename': part.filename,
+                                        'content_type': part.headers.get('Content-Type')})
+                    elif hasattr(part, 'read_chunk'):
+                        form += await self._read_limited(part.read_chunk, self.max_form_bytes - len(form))
+                    # Multipart imbriqué: ignoré (libéré par reader.next())
+            elif request.method != 'PUT' and not self._is_binary(request):
+                form += await self._read_limited(request.content.read, self.max_form_bytes)
+            else:
+                record = await self.sample_store.capture(iter_chunks(request.content.read),
+                                                         keep=self.max_form_bytes)
+                form += record.pop('head')
+                uploads.append({**record, 'filename': os.path.basename(request.path) or None,
+                                'content_type': request.content_type})
+        except Exception as e:
+            # Corps mal formé ou connexion coupée: on garde ce qui a été lu
+            logger.debug(f"HTTP body read error: {e}")
+        
+        return [upload for upload in uploads if upload['size']], bytes(form)
+    
+    @classmethod
+    def _is_binary(cls, request) -> bool:
+        """Content-Type binaire envoyé par le client
+        
+        request.content_type vaut application/octet-stream quand l'en-tête
+        manque: on lit l'en-tête brut pour ne pas prendre un POST nu pour un upload.
+        """
+        media_type = request.headers.get('Content-Type', '').split(';')[0].strip().lower()
+        return (media_type.startswith(cls.BINARY_TYPES)
+                and media_type != 'application/x-www-form-urlencoded')
+    
+    @staticmethod
+    async def _read_limited(read, limit: int) -> bytes:
+        data = bytearray()
+        if limit <= 0:
+            return b''
+        async for chunk in iter_chunks(read):
+            data += chunk[:limit - len(data)]
+            if len(data) >= limit:
+                break
+        return bytes(data)
 
 
 class TelnetHoneypot:
-    """Simule un serveur Telnet vulnérable"""
+    """Simule un serveur Telnet vulnérable avec un shell interactif factice"""
     
-    def __init__(self, attack_logger: AttackLogger):
+    def __init__(self, attack_logger: AttackLogger, config: Optional[configparser.ConfigParser] = None,
+                 sessions: Optional[SessionManager] = None):
+        config = config or configparser.ConfigParser()
         self.attack_logger = attack_logger
-        self.port = 23
-        self.banner = b"\r\nLinux 2.6.32 Telnet Server\r\nLogin: "
+        self.sessions = sessions or SessionManager.from_config(config)
+        self.port = config.getint('telnet', 'port', fallback=23)
+        banner = config.get('telnet', 'banner', fallback=None)
+        self.banner = (unescape(banner) if banner else b"\r\nLinux 2.6.32 Telnet Server\r\n") + b"Login: "
+        self.hostname = config.get('sessions', 'hostname', fallback='srv01')
     
     async def start(self):
         """Démarre le serveur Telnet honeypot"""
         server = await asyncio.start_server(
-            self.handle_connection, '0.0.0.0', self.port
+            self.handle_connection, '0.0.0.0', self.port, limit=self.sessions.reader_limit,
+            backlog=ACCEPT_BACKLOG
         )
         logger.info(f"Telnet Honeypot started on port {self.port}")
         
@@ -234,42 +543,93 @@ class TelnetHoneypot:
             await server.serve_forever()
     
     async def handle_connection(self, reader, writer):
-        """Gère une connexion Telnet"""
+        """Gère une connexion Telnet: login accepté puis shell factice"""
+        captured = trace_clock()
         addr = writer.get_extra_info('peername')
         logger.debug(f"Telnet connection from {addr}")
+        session = None
+        malicious = False
         
         try:
+            await self.attack_logger.record_connection('telnet', addr[0], addr[1], captured)
+            session = self.sessions.open('telnet', addr[0], addr[1])
+            if session is None:
+                # Budget mémoire atteint
+                writer.write(b"\r\nToo many users logged in, try again later\r\n")
+                await writer.drain()
+                return
+            
             # Envoyer le banner
             writer.write(self.banner)
             await writer.drain()
             
             # Lire le username
-            username = await reader.read(100)
-            if username:
-                writer.write(b"Password: ")
-                await writer.drain()
-                
-                # Lire le password
-                password = await reader.read(100)
-                
-                # Logger la tentative
-                await self.attack_logger.log_attack(
-                    service='telnet',
-                    attacker_ip=addr[0],
-                    attacker_port=addr[1],
-                    attack_type='brute_force',
-                    payload={
-                        'username': username.decode('utf-8', errors='ignore').strip(),
-                        'password': password.decode('utf-8', errors='ignore').strip()
-                    }
-                )
+            username = await self.sessions.read_line(reader, session)
+            if username is None:
+                return
+            writer.write(b"Password: ")
+            await writer.drain()
+            
+            # Lire le password
+            password = await self.sessions.read_line(reader, session)
+            session.record('<', f"login: {username}".encode('utf-8', errors='replace'))
+            session.record('<', f"password: {password or ''}".encode('utf-8', errors='replace'))
+            
+            # Logger la tentative
+            await self.attack_logger.log_attack(
+                service='telnet',
+                attacker_ip=addr[0],
+                attacker_port=addr[1],
+                attack_type='brute_force',
+                payload={
+                    'username': username,
+                    'password': password or ''
+                },
+                captured=captured
+            )
+            if password is None:
+                return
+            
+            # Login accepté: on garde l'attaquant dans un shell factice
+            user = username if re.fullmatch(r'[a-z_][a-z0-9_-]{0,31}', username) else 'root'
+            shell = FakeShell(self.hostname, user)
+            writer.write(b"\r\nLast login: Mon Jan 16 09:12:44 2012 from 10.0.0.2\r\n" + shell.prompt)
+            await writer.drain()
+            
+            while True:
+                line = await self.sessions.read_line(reader, session)
+                if line is None:
+                    break
+                if line:
+                    session.command(line)
+                    # Testé à la saisie: l'historique du résumé est borné
+                    malicious = malicious or is_malicious_command(line)
+                    output, done = shell.execute(line)
+                    writer.write(output)
+                    if done:
+                        session.end_reason = 'exit'
+                        break
+                writer.write(shell.prompt)
+                # Un client qui ne lit plus ne doit pas bloquer la session indéfiniment
+                await asyncio.wait_for(writer.drain(), self.sessions.idle_timeout)
             
-            writer.write(b"\r\nLogin incorrect\r\n")
             await writer.drain()
             
         except Exception as e:
             logger.error(f"Telnet handler error: {e}")
         finally:
+            if session is not None:
+                summary = self.sessions.close(session)
+                if summary['command_count']:
+                    # Un login suivi de `ls` ou `exit` n'est pas une injection (risque 8: alerte critique)
+                    await self.attack_logger.log_attack(
+                        service='telnet',
+                        attacker_ip=addr[0],
+                        attacker_port=addr[1],
+                        attack_type='command_injection' if malicious else 'shell_session',
+                        payload=summary,
+                        captured=captured
+                    )
             writer.close()
             await writer.wait_closed()
 
@@ -277,13 +637,60 @@ class TelnetHoneypot:
 class HoneypotManager:
     """Gestionnaire principal du honeypot"""
     
-    def __init__(self):
-        self.attack_logger = AttackLogger()
+    def __init__(self, config: Optional[configparser.ConfigParser] = None):
+        self.config = config or load_config()
+        self.attack_logger = AttackLogger(
+            max_log_bytes=self.config.getint('general', 'max_log_size_mb', fallback=100) * 2**20,
+            index_on_rotate=self.config.getboolean('general', 'index_on_rotate', fallback=True),
+            ip_lists=IPLists(
+                os.environ.get('IP_LISTS_DIR', self.config.get('security', 'ip_lists_dir', fallback='/app/iplists')),
+                reload_interval=self.config.getfloat('security', 'ip_lists_reload_seconds', fallback=5)
+            ),
+            send_queue_size=self.config.getint('api', 'send_queue_size', fallback=10_000),
+            send_workers=self.config.getint('api', 'send_workers', fallback=16),
+            shedder=LoadShedder.from_config(self.config)
+        )
+        # Budget mémoire commun aux sessions SSH et Telnet
+        self.sessions = SessionManager.from_config(self.config)
+        services = {
+            'ssh': partial(SSHHoneypot, sessions=self.sessions),
+            'http': HTTPHoneypot,
+            'telnet': partial(TelnetHoneypot, sessions=self.sessions)
+        }
         self.services = {
-            'ssh': SSHHoneypot(self.attack_logger),
-            'http': HTTPHoneypot(self.attack_logger),
-            'telnet': TelnetHoneypot(self.attack_logger)
+            name: service(self.attack_logger, self.config)
+            for name, service in services.items()
+            if self.config.getboolean(name, 'enabled', fallback=True)
         }
+        if self.config.getboolean('listeners', 'enabled', fallback=False):
+            # Plages de ports: les ports des services ci-dessus sont exclus
+            self.services['listeners'] = PortListener.from_config(
+                self.attack_logger, self.config,
+                exclude={service.port for service in self.services.values()},
+                clock=trace_clock
+            )
+    
+    def request_profile(self):
+        """SIGUSR1: profile le honeypot ([profiling] seconds) sans bloquer la boucle"""
+        asyncio.get_running_loop().create_task(self.profile())
+    
+    async def profile(self) -> Optional[str]:
+        """Profil de tous les threads, écrit en collapsed stacks dans [profiling] output_dir"""
+        seconds = self.config.getfloat('profiling', 'seconds', fallback=30)
+        interval = self.config.getfloat('profiling', 'interval_ms', fallback=5) / 1000
+        output_dir = self.config.get('profiling', 'output_dir', fallback='/app/logs/profiles')
+        logger.info(f"Profiling started for {seconds:g}s")
+        try:
+            profiler = await asyncio.get_running_loop().run_in_executor(None, profile_for, seconds, interval)
+        except ProfilerBusy:
+            logger.warning("Profiling already running, signal ignored")
+            return None
+        os.makedirs(output_dir, exist_ok=True)
+        path = os.path.join(output_dir, f"{HONEYPOT_ID}-{datetime.utcnow():%Y%m%dT%H%M%S}.folded")
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(profiler.collapsed())
+        logger.info(f"Profile written to {path} ({profiler.samples} samples)")
+        return path
     
     async def start_all(self):
         """Démarre tous les services honeypot"""
@@ -307,6 +714,8 @@ class HoneypotManager:
 async def main():
     """Point d'entrée principal"""
     manager = HoneypotManager()
+    # kill -USR1 <pid>: profil à la demande (voir sampling_profiler.py)
+    asyncio.get_running_loop().add_signal_handler(signal.SIGUSR1, manager.request_profile)
     
     try:
         await manager.start_all()
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+Écoute multi-ports
+Ouvre des centaines de ports (plages, ports de services courants) dans la
+même boucle asyncio pour attraper les scanners. Chaque port a un profil
+léger (bannière envoyée à la connexion, réponse au premier message); les
+connexions sont gérées par un Protocol partagé, sans StreamReader/Writer ni
+tâche par connexion: quelques centaines d'octets par socket.
+"""
+
+import asyncio
+import codecs
+import configparser
+import logging
+import socket
+import time
+from functools import partial
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+logger = logging.getLogger('honeypot')
+
+DEFAULT_PORTS = '21,25,110,143,445,1433,1521,3306,3389,5432,5900,6379,8000,8080,8443,8888,9200,11211,27017'
+
+
+class ListenerProfile(NamedTuple):
+    """Comportement d'un port: bannière à la connexion, réponse au premier message"""
+    service: str
+    banner: bytes = b''
+    response: bytes = b''
+    attack_type: str = 'reconnaissance'
+
+
+_HTTP_RESPONSE = (
+    b"HTTP/1.1 404 Not Found\r\nServer: Apache/2.2.14 (Ubuntu)\r\n"
+    b"Content-Type: text/html\r\nContent-Length: 48\r\nConnection: close\r\n\r\n"
+    b"<html><body><h1>404 Not Found</h1></body></html>"
+)
+
+
+def _mysql_packets():
+    """Handshake MySQL 5.1 (protocole 10) et erreur 1045 Access denied"""
+    greeting = (b"\x0a5.1.73-1\x00" + (42).to_bytes(4, 'little') + b"abcdefgh\x00"
+                + b"\xff\xf7\x08\x02\x00" + bytes(13) + b"ijklmnopqrst\x00")
+    error = b"\xff\x15\x04#28000Access denied for user"
+    return (len(greeting).to_bytes(3, 'little') + b"\x00" + greeting,
+            len(error).to_bytes(3, 'little') + b"\x02" + error)
+
+
+# Profils intégrés des ports courants (les autres ports répondent en silence)
+PROFILES: Dict[int, ListenerProfile] = {
+    21: ListenerProfile('ftp', b"220 (vsFTPd 2.3.4)\r\n", b"530 Login incorrect.\r\n", 'brute_force'),
+    25: ListenerProfile('smtp', b"220 mail.localdomain ESMTP Postfix (Debian/GNU)\r\n",
+                        b"502 5.5.2 Error: command not recognized\r\n"),
+    110: ListenerProfile('pop3', b"+OK Dovecot ready.\r\n", b"-ERR Authentication failed.\r\n", 'brute_force'),
+    143: ListenerProfile('imap', b"* OK [CAPABILITY IMAP4rev1] Dovecot ready.\r\n",
+                         b"* BAD Error in IMAP command.\r\n", 'brute_force'),
+    445: ListenerProfile('smb'),
+    1433: ListenerProfile('mssql', attack_type='brute_force'),
+    1521: ListenerProfile('oracle'),
+    3306: ListenerProfile('mysql', *_mysql_packets(), 'brute_force'),
+    3389: ListenerProfile('rdp'),
+    5432: ListenerProfile('postgresql', response=b"EFATAL\x00", attack_type='brute_force'),
+    5900: ListenerProfile('vnc', b"RFB 003.008\n", attack_type='brute_force'),
+    6379: ListenerProfile('redis', response=b"-NOAUTH Authentication required.\r\n", attack_type='unauthorized_access'),
+    8000: ListenerProfile('http-alt', response=_HTTP_RESPONSE),
+    8080: ListenerProfile('http-proxy', response=_HTTP_RESPONSE),
+    8443: ListenerProfile('https-alt'),
+    8888: ListenerProfile('http-alt', response=_HTTP_RESPONSE),
+    9200: ListenerProfile('elasticsearch', response=_HTTP_RESPONSE, attack_type='unauthorized_access'),
+    11211: ListenerProfile('memcached', response=b"ERROR\r\n", attack_type='unauthorized_access'),
+    27017: ListenerProfile('mongodb', attack_type='unauthorized_access'),
+}
+
+
+def unescape(value: str) -> bytes:
+    """Bannière de la configuration ('\\r\\n', '\\x00'...) -> octets"""
+    return codecs.decode(value, 'unicode_escape').encode('latin-1')
+
+
+def parse_ports(spec: str) -> List[int]:
+    """'21,25,8000-8099' -> ports triés sans doublons; ValueError si invalide"""
+    ports = set()
+    for part in spec.replace(' ', '').split(','):
+        if not part:
+            continue
+        first, _, last = part.partition('-')
+        start, end = int(first), int(last or first)
+        if not 1 <= start <= end <= 65535:
+            raise ValueError(f"Plage de ports invalide: {part}")
+        ports.update(range(start, end + 1))
+    return sorted(ports)
+
+
+def profile_for(port: int, config: Optional[configparser.ConfigParser] = None) -> ListenerProfile:
+    """Profil d'un port: section [listener:<port>] de la configuration, profil intégré ou générique"""
+    profile = PROFILES.get(port) or ListenerProfile(f"tcp-{port}")
+    section = f"listener:{port}"
+    if config is None or not config.has_section(section):
+        return profile
+    options = config[section]
+    return ListenerProfile(
+        service=options.get('service', profile.service),
+        banner=unescape(options['banner']) if 'banner' in options else profile.banner,
+        response=unescape(options['response']) if 'response' in options else profile.response,
+        attack_type=options.get('attack_type', profile.attack_type)
+    )
+
+
+class ListenerProtocol(asyncio.Protocol):
+    """Une connexion sur un port écouté: bannière, premier message, fermeture"""
+
+    __slots__ = ('listener', 'port', 'profile', 'transport', 'peer', 'captured', 'timer', 'done')
+
+    def __init__(self, listener: 'PortListener', port: int, profile: ListenerProfile):
+        self.listener = listener
+        self.port = port
+        self.profile = profile
+        self.transport = None
+        self.peer = None
+        self.timer = None
+        self.done = False
+
+    def connection_made(self, transport):
+        listener = self.listener
+        self.captured = listener.clock()
+        self.transport = transport
+        self.peer = transport.get_extra_info('peername') or (None, 0)
+        listener.accepted += 1
+        listener.spawn(listener.attack_logger.record_connection(
+            self.profile.service, self.peer[0], self.peer[1], self.captured
+        ))
+
+        if listener.active >= listener.max_connections:
+            # Saturation: la connexion est comptée (scan) mais pas servie
+            listener.rejected += 1
+            self.done = True
+            transport.abort()
+            return
+        listener.active += 1
+        if self.profile.banner:
+            transport.write(self.profile.banner)
+        self.timer = asyncio.get_running_loop().call_later(listener.read_timeout, self._timeout)
+
+    def data_received(self, data: bytes):
+        if self.done:
+            return
+        self.done = True
+        data = data[:self.listener.max_read]
+        if self.profile.response:
+            self.transport.write(self.profile.response)
+        self.listener.spawn(self.listener.attack_logger.log_attack(
+            service=self.profile.service,
+            attacker_ip=self.peer[0],
+            attacker_port=self.peer[1],
+            attack_type=self.profile.attack_type,
+            payload={
+                'port': self.port,
+                'data': data.decode('utf-8', errors='ignore'),
+                'data_bytes': len(data)
+            },
+            captured=self.captured
+        ))
+        self.transport.close()
+
+    def _timeout(self):
+        # Connexion muette: seul le scan est compté
+        self.done = True
+        self.transport.close()
+
+    def connection_lost(self, exc):
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+            self.listener.active -= 1
+
+
+class PortListener:
+    """Écoute de nombreux ports dans la boucle courante, gestion des connexions partagée"""
+
+    def __init__(self, attack_logger, ports: Dict[int, ListenerProfile], host: str = '0.0.0.0',
+                 read_timeout: float = 10.0, max_read: int = 1024, max_connections: int = 1000,
+                 backlog: int = 128, clock: Callable[[], float] = time.time):
+        self.attack_logger = attack_logger
+        self.ports = ports
+        self.host = host
+        self.read_timeout = read_timeout
+        self.max_read = max_read
+        self.max_connections = max_connections
+        self.backlog = backlog
+        self.clock = clock
+        self.servers = []
+        self.failed: Dict[int, str] = {}
+        self.active = 0
+        self.accepted = 0
+        self.rejected = 0
+        self._tasks = set()
+        self._stopped = None
+
+    @classmethod
+    def from_config(cls, attack_logger, config: configparser.ConfigParser, exclude=(), **kwargs):
+        """Listener décrit par la section [listeners] (ports déjà servis exclus)"""
+        ports = parse_ports(config.get('listeners', 'ports', fallback=DEFAULT_PORTS))
+        return cls(
+            attack_logger,
+            {port: profile_for(port, config) for port in ports if port not in exclude},
+            host=config.get('listeners', 'bind', fallback='0.0.0.0'),
+            read_timeout=config.getfloat('listeners', 'read_timeout', fallback=10.0),
+            max_read=config.getint('listeners', 'max_read_bytes', fallback=1024),
+            max_connections=config.getint('listeners', 'max_connections', fallback=1000),
+            **kwargs
+        )
+
+    def spawn(self, coro):
+        """Lance un enregistrement sans bloquer le callback (référence gardée jusqu'à la fin)"""
+        task = asyncio.get_running_loop().create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _socket(self, port: int) -> socket.socket:
+        family = socket.AF_INET6 if ':' in self.host else socket.AF_INET
+        sock = socket.socket(family, socket.SOCK_STREAM)
+        try:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            sock.bind((self.host, port))
+            sock.setblocking(False)
+        except OSError:
+            sock.close()
+            raise
+        return sock
+
+    async def bind(self):
+        """Ouvre tous les ports; un port indisponible est journalisé et ignoré"""
+        loop = asyncio.get_running_loop()
+        for port, profile in self.ports.items():
+            try:
+                # Socket créé à la main: pas de résolution getaddrinfo par port
+                server = await loop.create_server(
+                    partial(ListenerProtocol, self, port, profile),
+                    sock=self._socket(port), backlog=self.backlog
+                )
+            except OSError as e:
+                self.failed[port] = str(e)
+                continue
+            self.servers.append(server)
+        if self.failed:
+            logger.warning(f"Listener: {len(self.failed)} ports unavailable "
+                           f"({', '.join(map(str, sorted(self.failed)[:10]))}...)")
+        logger.info(f"Port listener started on {len(self.servers)} ports")
+
+    async def start(self):
+        """Démarre l'écoute et rend la main à l'arrêt (stop())"""
+        self._stopped = asyncio.Event()
+        await self.bind()
+        await self._stopped.wait()
+
+    async def stop(self):
+        for server in self.servers:
+            server.close()
+        for server in self.servers:
+            await server.wait_closed()
+        self.servers = []
+        if self._stopped is not None:
+            self._stopped.set()
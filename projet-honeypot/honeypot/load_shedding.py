@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Délestage du honeypot en surcharge
+Quand les événements arrivent plus vite que le journal et l'API ne les
+absorbent, la file d'envoi se remplit et la boucle d'événements prend du
+retard. Le LoadShedder surveille ces deux signaux: tant qu'un seuil est
+dépassé, le taux d'échantillonnage des événements de faible valeur
+(reconnaissance, brute force répété d'une même IP) est divisé par deux à
+chaque intervalle, jusqu'à un plancher; il remonte quand la pression
+retombe. Les événements à haut risque sont toujours gardés.
+
+Chaque événement gardé porte son sample_rate: l'API compte un événement
+gardé au taux 1/8 pour 8.
+"""
+
+import asyncio
+import configparser
+import logging
+import random
+import time
+from collections import Counter, OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger('honeypot')
+
+# Reconnaissance: échantillonnée dès le premier événement
+RECON_TYPES = frozenset({'port_scan', 'reconnaissance', 'unauthorized_access'})
+# Échantillonnées à partir de la deuxième occurrence d'une IP dans la fenêtre
+REPEATED_TYPES = frozenset({'brute_force'})
+
+
+class LoadShedder:
+    """Taux d'échantillonnage piloté par la profondeur de file et le retard de la boucle"""
+
+    def __init__(self, queue_high: float = 0.5, lag_high: float = 0.1, interval: float = 0.5,
+                 min_rate: float = 1 / 64, keep_risk: int = 7, repeat_window: float = 60.0,
+                 max_tracked: int = 100_000, clock: Callable[[], float] = time.monotonic,
+                 rng: Callable[[], float] = random.random):
+        self.queue_high = queue_high  # Fraction de la file d'envoi
+        self.lag_high = lag_high  # Secondes de retard de la boucle
+        self.interval = interval
+        self.min_rate = min_rate
+        self.keep_risk = keep_risk
+        self.repeat_window = repeat_window
+        self.max_tracked = max_tracked
+        self.clock = clock
+        self.rng = rng
+        self.rate = 1.0
+        self.depth = 0.0
+        self.lag = 0.0
+        self.kept: Counter = Counter()
+        self.shed: Counter = Counter()
+        self._seen: 'OrderedDict[Tuple[str, str], float]' = OrderedDict()
+
+    @classmethod
+    def from_config(cls, config: configparser.ConfigParser):
+        """Délestage décrit par la section [shedding]"""
+        return cls(
+            queue_high=config.getfloat('shedding', 'queue_high_percent', fallback=50) / 100,
+            lag_high=config.getfloat('shedding', 'loop_lag_high_ms', fallback=100) / 1000,
+            interval=config.getfloat('shedding', 'adjust_interval', fallback=0.5),
+            min_rate=1 / config.getint('shedding', 'max_sampling_factor', fallback=64),
+            keep_risk=config.getint('shedding', 'keep_risk_score', fallback=7),
+            repeat_window=config.getfloat('shedding', 'repeat_window', fallback=60.0)
+        )
+
+    @property
+    def overloaded(self) -> bool:
+        return self.rate < 1.0
+
+    def update(self, depth: float, lag: float):
+        """Ajuste le taux d'après la file (fraction remplie) et le retard mesurés
+
+        Hystérésis: le taux ne remonte que sous la moitié des deux seuils.
+        """
+        self.depth, self.lag = depth, lag
+        previous = self.rate
+        if depth >= self.queue_high or lag >= self.lag_high:
+            self.rate = max(self.min_rate, self.rate / 2)
+        elif depth < self.queue_high / 2 and lag < self.lag_high / 2:
+            self.rate = min(1.0, self.rate * 2)
+        if self.rate == previous:
+            return
+        if self.rate == 1.0:
+            logger.info(f"Load shedding ended ({sum(self.shed.values())} low-value events shed so far)")
+            return
+        log = logger.warning if self.rate < previous else logger.info
+        log(f"Load shedding: low-value events sampled at 1/{round(1 / self.rate)} "
+            f"(send queue {depth:.0%}, loop lag {lag * 1000:.0f} ms)")
+
+    def _repeated(self, attacker_ip: str, attack_type: str) -> bool:
+        """L'IP a-t-elle déjà produit ce type d'événement dans la fenêtre ?"""
+        key = (attacker_ip, attack_type)
+        now = self.clock()
+        last = self._seen.pop(key, None)
+        self._seen[key] = now
+        if len(self._seen) > self.max_tracked:
+            self._seen.popitem(last=False)
+        return last is not None and now - last < self.repeat_window
+
+    def sample(self, attack_type: str, attacker_ip: str, risk_score: int) -> Optional[float]:
+        """Taux auquel l'événement est gardé, ou None s'il est délesté"""
+        if risk_score >= self.keep_risk:
+            low_value = False
+        elif attack_type in REPEATED_TYPES:
+            low_value = self._repeated(attacker_ip, attack_type)
+        else:
+            low_value = attack_type in RECON_TYPES
+        if not low_value or self.rate >= 1.0:
+            self.kept[attack_type] += 1
+            return 1.0
+        if self.rng() < self.rate:
+            self.kept[attack_type] += 1
+            return self.rate
+        self.shed[attack_type] += 1
+        return None
+
+    async def run(self, depth: Callable[[], float], probe: float = 0.05):
+        """Mesure le retard de la boucle (le pire sur l'intervalle) et ajuste le taux"""
+        loop = asyncio.get_running_loop()
+        while True:
+            worst = 0.0
+            deadline = loop.time() + self.interval
+            while loop.time() < deadline:
+                start = loop.time()
+                await asyncio.sleep(probe)
+                worst = max(worst, loop.time() - start - probe)
+            self.update(depth(), worst)
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            'sample_rate': self.rate,
+            'send_queue': self.depth,
+            'loop_lag_ms': round(self.lag * 1000, 1),
+            'kept': dict(self.kept),
+            'shed': dict(self.shed)
+        }
@@ -0,0 +1,474 @@
+#!/usr/bin/env python3
+"""
+Index des segments d'attacks.log
+Chaque segment (journal rotaté, ou attacks.log en cours) reçoit un fichier
+voisin <segment>.idx:
+- un index de blocs: tous les BLOCK_LINES lignes, la position du bloc dans le
+  segment, ses premier/dernier horodatages et les comptes par type
+  d'attaque, service et honeypot;
+- pour chaque IP, la liste des positions (octets) de ses lignes, codée en
+  écarts varint, retrouvée par recherche dichotomique dans une table triée
+  d'entrées de taille fixe (empreinte de l'IP sur 8 octets).
+Une recherche par IP ou par période lit ces positions et va chercher les
+lignes dans le segment projeté en mémoire (mmap) au lieu de tout relire; un
+comptage sur une période n'ouvre que les deux blocs de bord. L'index du
+journal courant est complété, pas reconstruit, quand le journal grossit.
+"""
+
+import bisect
+import gzip
+import hashlib
+import json
+import logging
+import mmap
+import os
+import struct
+import zlib
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger('honeypot')
+
+MAGIC = b'HPIDX1\n'
+# Longueur de l'en-tête compressé, nombre d'IP
+PREFIX = struct.Struct('<II')
+# Empreinte de l'IP, position et longueur de ses écarts, nombre de lignes, dernière position
+ENTRY = struct.Struct('<8sQIIQ')
+INDEX_SUFFIX = '.idx'
+LOG_PREFIX = 'attacks.log'
+BLOCK_LINES = 1024
+COUNTED_FIELDS = ('attack_type', 'service', 'honeypot_id')
+# Empreinte du début du segment: un attacks.log recréé après rotation ne
+# doit pas être complété avec l'index de l'ancien
+FINGERPRINT_BYTES = 4096
+
+
+def encode_deltas(offsets: List[int], previous: int = 0) -> bytes:
+    """Positions croissantes -> écarts successifs en varint (7 bits par octet)"""
+    out = bytearray()
+    for offset in offsets:
+        delta = offset - previous
+        previous = offset
+        while delta >= 0x80:
+            out.append((delta & 0x7f) | 0x80)
+            delta >>= 7
+        out.append(delta)
+    return bytes(out)
+
+
+def decode_deltas(data: bytes) -> List[int]:
+    offsets = []
+    value = shift = previous = 0
+    for byte in data:
+        value |= (byte & 0x7f) << shift
+        if byte & 0x80:
+            shift += 7
+            continue
+        previous += value
+        offsets.append(previous)
+        value = shift = 0
+    return offsets
+
+
+def to_epoch(value: str) -> float:
+    """Horodatage ISO du journal (UTC sans fuseau) -> secondes epoch"""
+    timestamp = datetime.fromisoformat(value)
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return timestamp.timestamp()
+
+
+def parse_line(line: bytes) -> Tuple[Optional[Dict[str, Any]], Optional[float]]:
+    """(événement, horodatage epoch), (None, None) si la ligne est invalide"""
+    try:
+        event = json.loads(line)
+        return event, to_epoch(event['timestamp'])
+    except (ValueError, KeyError, TypeError):
+        return None, None
+
+
+def list_segments(paths: List[str]) -> List[str]:
+    """Segments d'attacks.log: un répertoire est remplacé par ses attacks.log*"""
+    segments = []
+    for path in paths:
+        if os.path.isdir(path):
+            segments.extend(
+                os.path.join(path, name) for name in sorted(os.listdir(path))
+                if name.startswith(LOG_PREFIX) and not name.endswith((INDEX_SUFFIX, '.tmp'))
+            )
+        else:
+            segments.append(path)
+    return segments
+
+
+def ip_key(ip: str) -> bytes:
+    """Clé de la table des IP (une collision ne fait que lire des lignes en trop)"""
+    return hashlib.blake2b(ip.encode(), digest_size=8).digest()
+
+
+def _fingerprint(path: str, length: int) -> str:
+    with open(path, 'rb') as f:
+        return hashlib.sha1(f.read(length)).hexdigest()
+
+
+class _Builder:
+    """Accumule blocs et positions pendant la lecture d'une portion de segment"""
+
+    def __init__(self, block_lines: int):
+        self.block_lines = block_lines
+        self.blocks: List[list] = []
+        self.counts: Dict[str, List[Dict[str, int]]] = {field: [] for field in COUNTED_FIELDS}
+        self.postings: Dict[str, List[int]] = {}
+        self.invalid = 0
+        self._start = None
+        self._lines = 0
+        self._first = self._last = None
+        self._counters = {field: Counter() for field in COUNTED_FIELDS}
+
+    def add(self, offset: int, line: bytes):
+        if self._start is None:
+            self._start = offset
+        self._lines += 1
+        event, timestamp = parse_line(line)
+        if event is None:
+            self.invalid += 1
+        else:
+            self._first = timestamp if self._first is None else min(self._first, timestamp)
+            self._last = timestamp if self._last is None else max(self._last, timestamp)
+            for field, counter in self._counters.items():
+                counter[str(event.get(field))] += 1
+            ip = event.get('attacker_ip')
+            if ip:
+                self.postings.setdefault(ip, []).append(offset)
+        if self._lines >= self.block_lines:
+            self.close_block(offset + len(line))
+
+    def close_block(self, end: int):
+        if not self._lines:
+            return
+        self.blocks.append([self._start, end, self._first, self._last, self._lines])
+        for field, counter in self._counters.items():
+            self.counts[field].append(dict(counter))
+            counter.clear()
+        self._start = None
+        self._lines = 0
+        self._first = self._last = None
+
+
+class SegmentIndex:
+    """Index d'un segment, chargé depuis <segment>.idx
+
+    Seul l'en-tête (blocs et comptes) est chargé; la table des IP et les
+    positions sont lues à la demande dans le fichier d'index.
+    """
+
+    def __init__(self, segment: str, header: Dict[str, Any], ips: int, table_offset: int):
+        self.segment = segment
+        self.header = header
+        self.ips = ips
+        self.table_offset = table_offset
+        self.postings_offset = table_offset + ips * ENTRY.size
+        self.blocks = header['blocks']
+        self.block_starts = [block[0] for block in self.blocks]
+
+    @property
+    def path(self) -> str:
+        return self.segment + INDEX_SUFFIX
+
+    @property
+    def size(self) -> int:
+        """Octets du segment couverts par l'index (lignes complètes)"""
+        return self.header['segment_size']
+
+    @property
+    def time_range(self) -> Tuple[Optional[float], Optional[float]]:
+        firsts = [block[2] for block in self.blocks if block[2] is not None]
+        lasts = [block[3] for block in self.blocks if block[3] is not None]
+        return (min(firsts), max(lasts)) if firsts else (None, None)
+
+    @classmethod
+    def load(cls, segment: str) -> Optional['SegmentIndex']:
+        try:
+            with open(segment + INDEX_SUFFIX, 'rb') as f:
+                if f.read(len(MAGIC)) != MAGIC:
+                    return None
+                length, ips = PREFIX.unpack(f.read(PREFIX.size))
+                header = json.loads(zlib.decompress(f.read(length)))
+        except (OSError, ValueError, struct.error, zlib.error):
+            return None
+        return cls(segment, header, ips, len(MAGIC) + PREFIX.size + length)
+
+    def matches(self) -> bool:
+        """Le segment est-il celui qui a été indexé (éventuellement agrandi) ?"""
+        try:
+            if os.path.getsize(self.segment) < self.size:
+                return False
+            length = self.header['fingerprint_bytes']
+            return _fingerprint(self.segment, length) == self.header['fingerprint']
+        except OSError:
+            return False
+
+    def offsets(self, ip: str) -> List[int]:
+        """Positions des lignes d'une IP dans le segment (croissantes)"""
+        if not self.ips:
+            return []
+        key = ip_key(ip)
+        with open(self.path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            low, high = 0, self.ips
+            while low < high:
+                middle = (low + high) // 2
+                position = self.table_offset + middle * ENTRY.size
+                if mm[position:position + 8] < key:
+                    low = middle + 1
+                else:
+                    high = middle
+            if low == self.ips:
+                return []
+            found, blob_offset, blob_length, _, _ = ENTRY.unpack_from(mm, self.table_offset + low * ENTRY.size)
+            if found != key:
+                return []
+            start = self.postings_offset + blob_offset
+            return decode_deltas(mm[start:start + blob_length])
+
+    def entries(self) -> Dict[bytes, Tuple[int, int, int, int]]:
+        """Table complète des IP (pour compléter l'index)"""
+        with open(self.path, 'rb') as f:
+            f.seek(self.table_offset)
+            table = f.read(self.ips * ENTRY.size)
+        return {key: rest for key, *rest in ENTRY.iter_unpack(table)}
+
+    def block_of(self, offset: int) -> int:
+        return bisect.bisect_right(self.block_starts, offset) - 1
+
+
+def _write_index(segment: str, header: Dict[str, Any], table: bytes, ips: int, blob: bytes):
+    """Écriture atomique: un lecteur ne voit jamais un index à moitié écrit"""
+    packed = zlib.compress(json.dumps(header, separators=(',', ':')).encode(), 6)
+    temp_path = segment + INDEX_SUFFIX + '.tmp'
+    with open(temp_path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(PREFIX.pack(len(packed), ips))
+        f.write(packed)
+        f.write(table)
+        f.write(blob)
+    os.replace(temp_path, segment + INDEX_SUFFIX)
+
+
+def build_index(segment: str, block_lines: int = BLOCK_LINES) -> Optional[SegmentIndex]:
+    """Crée ou complète l'index d'un segment; None pour un segment .gz
+
+    Seules les lignes complètes sont indexées: la dernière ligne du journal
+    en cours d'écriture le sera au prochain passage.
+    """
+    if segment.endswith('.gz'):
+        return None  # Pas de mmap possible: lu en entier à la recherche
+    previous = SegmentIndex.load(segment)
+    if previous is not None and not previous.matches():
+        previous = None
+    start = previous.size if previous else 0
+
+    builder = _Builder(block_lines)
+    end = start
+    with open(segment, 'rb') as f:
+        f.seek(start)
+        for line in f:
+            if not line.endswith(b'\n'):
+                break
+            builder.add(end, line)
+            end += len(line)
+    builder.close_block(end)
+    if previous is not None and end == start:
+        return previous
+
+    old = previous.header if previous else {'blocks': [], 'invalid': 0,
+                                            'counts': {field: [] for field in COUNTED_FIELDS}}
+    old_entries, old_blob = {}, b''
+    if previous is not None:
+        old_entries = previous.entries()
+        with open(previous.path, 'rb') as f:
+            f.seek(previous.postings_offset)
+            old_blob = f.read()
+
+    # Les positions nouvelles d'une IP prolongent sa liste: écart depuis sa dernière position
+    new_postings = {}
+    for ip, offsets in builder.postings.items():
+        new_postings.setdefault(ip_key(ip), []).extend(offsets)
+    table, parts, cursor = [], [], 0
+    for key in sorted(old_entries.keys() | new_postings.keys()):
+        blob_offset, blob_length, count, last = old_entries.get(key, (0, 0, 0, 0))
+        data = old_blob[blob_offset:blob_offset + blob_length]
+        new = new_postings.get(key)
+        if new:
+            new.sort()  # Deux IP de même empreinte: listes fusionnées
+            data += encode_deltas(new, last)
+            count += len(new)
+            last = new[-1]
+        table.append(ENTRY.pack(key, cursor, len(data), count, last))
+        parts.append(data)
+        cursor += len(data)
+
+    fingerprint_bytes = min(FINGERPRINT_BYTES, end)
+    header = {
+        'version': 1,
+        'segment_size': end,
+        'fingerprint_bytes': fingerprint_bytes,
+        'fingerprint': _fingerprint(segment, fingerprint_bytes),
+        'block_lines': block_lines,
+        'blocks': old['blocks'] + builder.blocks,
+        'counts': {field: old['counts'][field] + builder.counts[field] for field in COUNTED_FIELDS},
+        'invalid': old['invalid'] + builder.invalid
+    }
+    _write_index(segment, header, b''.join(table), len(table), b''.join(parts))
+    return SegmentIndex.load(segment)
+
+
+def index_segment(segment: str) -> Optional[SegmentIndex]:
+    """build_index pour un thread: une erreur est journalisée, pas propagée"""
+    try:
+        index = build_index(segment)
+    except OSError as e:
+        logger.error(f"Indexing {segment} failed: {e}")
+        return None
+    if index is not None:
+        logger.info(f"Indexed {segment}: {len(index.blocks)} blocks, {index.ips} IPs")
+    return index
+
+
+class LogSearch:
+    """Recherche dans des segments indexés
+
+    since/until: secondes epoch, intervalle [since, until[. stats compte ce
+    qui a réellement été lu (blocs, lignes, octets) pour comparer au volume
+    total des segments.
+    """
+
+    def __init__(self, paths: List[str], update: bool = True, block_lines: int = BLOCK_LINES):
+        self.stats = Counter()
+        self.segments = []
+        for segment in list_segments(paths):
+            index = build_index(segment, block_lines) if update else SegmentIndex.load(segment)
+            if index is not None and not index.matches():
+                index = None
+            self.stats['segments'] += 1
+            self.stats['total_bytes'] += os.path.getsize(segment)
+            self.segments.append((segment, index))
+        # Ordre chronologique des segments (les non indexés ou vides en dernier)
+        self.segments.sort(key=self._chronological)
+
+    @staticmethod
+    def _chronological(item: Tuple[str, Optional[SegmentIndex]]) -> Tuple[bool, float]:
+        """Clé de tri: jamais de None comparé (segment vide après copytruncate, par exemple)"""
+        first = item[1].time_range[0] if item[1] else None
+        return (first is None, first if first is not None else 0.0)
+
+    @staticmethod
+    def _in_range(timestamp: float, since: Optional[float], until: Optional[float]) -> bool:
+        return (since is None or timestamp >= since) and (until is None or timestamp < until)
+
+    @staticmethod
+    def _overlaps(block: list, since: Optional[float], until: Optional[float]) -> bool:
+        if block[2] is None:
+            return False
+        return (since is None or block[3] >= since) and (until is None or block[2] < until)
+
+    @staticmethod
+    def _inside(block: list, since: Optional[float], until: Optional[float]) -> bool:
+        return (since is None or block[2] >= since) and (until is None or block[3] < until)
+
+    def _lines(self, segment: str, index: Optional[SegmentIndex], ip: Optional[str],
+               since: Optional[float], until: Optional[float]) -> Iterator[bytes]:
+        """Lignes candidates d'un segment (à filtrer ensuite sur l'événement)"""
+        if index is None:
+            # Segment compressé ou non indexé: lecture complète
+            self.stats['scanned_segments'] += 1
+            opener = gzip.open if segment.endswith('.gz') else open
+            with opener(segment, 'rb') as f:
+                for line in f:
+                    self.stats['lines'] += 1
+                    self.stats['bytes_read'] += len(line)
+                    yield line
+            return
+        if not index.size:
+            return
+
+        with open(segment, 'rb') as f, mmap.mmap(f.fileno(), index.size, access=mmap.ACCESS_READ) as mm:
+            if ip is not None:
+                offsets = index.offsets(ip)
+                blocks = set()
+                for offset in offsets:
+                    block = index.block_of(offset)
+                    if not self._overlaps(index.blocks[block], since, until):
+                        continue
+                    if block not in blocks:
+                        blocks.add(block)
+                        self.stats['blocks'] += 1
+                    end = mm.find(b'\n', offset)
+                    self.stats['lines'] += 1
+                    self.stats['bytes_read'] += end + 1 - offset
+                    yield mm[offset:end]
+                return
+            for block in index.blocks:
+                if not self._overlaps(block, since, until):
+                    continue
+                self.stats['blocks'] += 1
+                self.stats['bytes_read'] += block[1] - block[0]
+                for line in mm[block[0]:block[1]].splitlines():
+                    self.stats['lines'] += 1
+                    yield line
+
+    def events(self, ip: Optional[str] = None, since: Optional[float] = None,
+               until: Optional[float] = None, attack_type: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """Événements correspondant aux critères, segment par segment"""
+        for segment, index in self.segments:
+            if index is not None:
+                first, last = index.time_range
+                if first is None or (since is not None and last < since) or (until is not None and first >= until):
+                    continue
+            for line in self._lines(segment, index, ip, since, until):
+                event, timestamp = parse_line(line)
+                if event is None or not self._in_range(timestamp, since, until):
+                    continue
+                if ip is not None and event.get('attacker_ip') != ip:
+                    continue
+                if attack_type is not None and event.get('attack_type') != attack_type:
+                    continue
+                yield event
+
+    def count(self, by: str, ip: Optional[str] = None, since: Optional[float] = None,
+              until: Optional[float] = None, attack_type: Optional[str] = None) -> Counter:
+        """Nombre d'événements par valeur du champ `by`
+
+        Sans filtre par IP ni par type, et pour un champ compté dans l'index,
+        les blocs entièrement dans la période sont additionnés sans être lus.
+        """
+        counts = Counter()
+        if ip is not None or attack_type is not None or by not in COUNTED_FIELDS:
+            for event in self.events(ip, since, until, attack_type):
+                counts[str(event.get(by))] += 1
+            return counts
+
+        for segment, index in self.segments:
+            if index is None or not index.size:
+                for line in self._lines(segment, None, None, since, until):
+                    event, timestamp = parse_line(line)
+                    if event is not None and self._in_range(timestamp, since, until):
+                        counts[str(event.get(by))] += 1
+                continue
+            with open(segment, 'rb') as f, mmap.mmap(f.fileno(), index.size, access=mmap.ACCESS_READ) as mm:
+                for block, block_counts in zip(index.blocks, index.header['counts'][by]):
+                    if not self._overlaps(block, since, until):
+                        continue
+                    if self._inside(block, since, until):
+                        self.stats['counted_blocks'] += 1
+                        counts.update(block_counts)
+                        continue
+                    # Bloc de bord: seules ses lignes sont lues
+                    self.stats['blocks'] += 1
+                    self.stats['bytes_read'] += block[1] - block[0]
+                    for line in mm[block[0]:block[1]].splitlines():
+                        self.stats['lines'] += 1
+                        event, timestamp = parse_line(line)
+                        if event is not None and self._in_range(timestamp, since, until):
+                            counts[str(event.get(by))] += 1
+        return counts
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Stockage des échantillons uploadés
+Les corps de requête sont écrits sur disque au fil de l'eau (morceaux de
+64 Ko), le SHA-256 est calculé pendant l'écriture et le fichier est rangé
+sous son empreinte: le même échantillon envoyé par 10 000 bots n'est stocké
+qu'une fois. Tailles bornées par échantillon et pour tout le stockage;
+l'événement ne transporte que l'empreinte et la taille. Les écritures et le
+renommage passent par le pool d'exécution: un upload lent ou volumineux ne
+bloque pas les autres services de la boucle.
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import uuid
+from typing import AsyncIterator, Awaitable, Callable, Dict, Any
+
+logger = logging.getLogger('honeypot')
+
+CHUNK_SIZE = 64 * 1024
+
+
+async def iter_chunks(read: Callable[[int], Awaitable[bytes]], size: int = CHUNK_SIZE) -> AsyncIterator[bytes]:
+    """Morceaux d'un flux aiohttp (request.content.read, part.read_chunk) jusqu'à b''"""
+    while True:
+        chunk = await read(size)
+        if not chunk:
+            return
+        yield chunk
+
+
+class SampleStore:
+    """Stockage adressé par contenu: <racine>/<2 premiers hex>/<sha256>"""
+
+    def __init__(self, root: str = '/app/samples', max_sample_bytes: int = 10 * 2**20,
+                 max_total_bytes: int = 1024 * 2**20):
+        self.root = root
+        self.max_sample_bytes = max_sample_bytes
+        self.max_total_bytes = max_total_bytes
+        self.incoming = os.path.join(root, '.incoming')
+        os.makedirs(self.incoming, exist_ok=True)
+        self.total_bytes = self._disk_usage()
+        self.stats = {'stored': 0, 'duplicates': 0, 'truncated': 0, 'over_quota': 0}
+
+    def _disk_usage(self) -> int:
+        total = 0
+        for directory, _, files in os.walk(self.root):
+            if directory.startswith(self.incoming):
+                continue
+            total += sum(os.path.getsize(os.path.join(directory, name)) for name in files)
+        return total
+
+    def path(self, sha256: str) -> str:
+        return os.path.join(self.root, sha256[:2], sha256)
+
+    @staticmethod
+    def _append(f, digest, chunk: bytes):
+        digest.update(chunk)
+        f.write(chunk)
+
+    @staticmethod
+    def _publish(temp_path: str, final_path: str) -> bool:
+        """Range le fichier sous son empreinte; False si un upload identique l'a fait avant"""
+        os.makedirs(os.path.dirname(final_path), exist_ok=True)
+        try:
+            # Lien dur: échoue si la cible existe (atomique, contrairement à exists() + replace())
+            os.link(temp_path, final_path)
+        except FileExistsError:
+            return False
+        except OSError:
+            # Système de fichiers sans liens durs
+            if os.path.exists(final_path):
+                return False
+            os.replace(temp_path, final_path)
+        return True
+
+    @staticmethod
+    def _discard(temp_path: str):
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+    async def capture(self, chunks: AsyncIterator[bytes], keep: int = 0) -> Dict[str, Any]:
+        """Écrit le flux dans le stockage pendant le calcul de l'empreinte
+
+        Au-delà de max_sample_bytes la lecture s'arrête: l'empreinte et le
+        fichier portent sur le début de l'échantillon (truncated=True).
+        Retourne {'sha256', 'size', 'stored', 'duplicate', 'truncated'} et,
+        si keep > 0, les `keep` premiers octets sous 'head' (détection).
+        """
+        loop = asyncio.get_running_loop()
+        digest = hashlib.sha256()
+        size = 0
+        truncated = False
+        head = bytearray()
+        temp_path = os.path.join(self.incoming, uuid.uuid4().hex)
+
+        try:
+            f = await loop.run_in_executor(None, open, temp_path, 'wb')
+            try:
+                async for chunk in chunks:
+                    if size + len(chunk) > self.max_sample_bytes:
+                        chunk = chunk[:self.max_sample_bytes - size]
+                        truncated = True
+                    await loop.run_in_executor(None, self._append, f, digest, chunk)
+                    size += len(chunk)
+                    if len(head) < keep:
+                        head += chunk[:keep - len(head)]
+                    if truncated:
+                        break
+            finally:
+                await loop.run_in_executor(None, f.close)
+
+            sha256 = digest.hexdigest()
+            final_path = self.path(sha256)
+            duplicate = await loop.run_in_executor(None, os.path.exists, final_path)
+            stored = duplicate
+            if not duplicate and size and self.total_bytes + size > self.max_total_bytes:
+                # Stockage plein: seule l'empreinte est conservée
+                self.stats['over_quota'] += 1
+                logger.warning(f"Sample store full ({self.total_bytes} bytes), sample {sha256} not kept")
+            elif not duplicate and size:
+                # Réservé avant le renommage: les uploads simultanés voient le quota à jour
+                self.total_bytes += size
+                if await loop.run_in_executor(None, self._publish, temp_path, final_path):
+                    self.stats['stored'] += 1
+                    logger.info(f"New sample stored: {sha256} ({size} bytes)")
+                else:
+                    # Même contenu rangé entre-temps par un upload simultané: compté une fois
+                    self.total_bytes -= size
+                    duplicate = True
+                stored = True
+            if duplicate:
+                self.stats['duplicates'] += 1
+            if truncated:
+                self.stats['truncated'] += 1
+        finally:
+            await loop.run_in_executor(None, self._discard, temp_path)
+
+        record = {
+            'sha256': sha256,
+            'size': size,
+            'stored': stored,
+            'duplicate': duplicate,
+            'truncated': truncated
+        }
+        if keep:
+            record['head'] = bytes(head)
+        return record
+
+    def summary(self) -> Dict[str, int]:
+        return {**self.stats, 'total_bytes': self.total_bytes}
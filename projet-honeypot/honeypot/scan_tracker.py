@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Détection de scans de ports multi-services
+Suit, pour chaque IP source, les services touchés pendant une fenêtre de
+temps. Mémoire bornée et préallouée quel que soit le nombre d'IPs: table de
+hachage à adressage ouvert dans des array (clé 64 bits, bitset des services,
+tick de première connexion), expiration par roue temporelle.
+"""
+
+import hashlib
+import ipaddress
+import time
+from array import array
+from typing import Callable, Dict, List, Optional
+
+# Bit 63 du bitset: scan déjà signalé dans la fenêtre courante
+REPORTED_BIT = 1 << 63
+SERVICE_BITS = 63
+SERVICE_MASK = REPORTED_BIT - 1
+
+_GOLDEN = 0x9E3779B97F4A7C15
+_MASK64 = (1 << 64) - 1
+_IPV6_TAG = 1 << 63
+
+
+def ip_key(ip: str) -> int:
+    """Clé 64 bits non nulle d'une IP (IPv4 exacte, IPv6 hachée)"""
+    address = ipaddress.ip_address(ip)
+    if address.version == 4:
+        return (1 << 32) | int(address)
+    if address.ipv4_mapped:
+        return (1 << 32) | int(address.ipv4_mapped)
+    digest = hashlib.blake2b(address.packed, digest_size=8).digest()
+    return int.from_bytes(digest, 'little') | _IPV6_TAG
+
+
+def ip_from_key(key: int) -> Optional[str]:
+    """IP d'origine d'une clé IPv4 (les clés IPv6 sont des hachés)"""
+    if key & _IPV6_TAG:
+        return None
+    return str(ipaddress.IPv4Address(key & 0xFFFFFFFF))
+
+
+class ScanTracker:
+    """Services touchés par IP source sur une fenêtre glissante
+
+    touch() retourne la liste des services la première fois qu'une IP en
+    atteint `threshold` distincts dans la fenêtre, None sinon: un seul
+    événement port_scan par IP et par fenêtre.
+    """
+
+    def __init__(self, window: float = 60.0, threshold: int = 3, capacity: int = 1_000_000,
+                 resolution: float = 1.0, clock: Callable[[], float] = time.monotonic):
+        if threshold < 2:
+            raise ValueError("threshold doit être au moins 2")
+        self.window = window
+        self.threshold = threshold
+        self.capacity = capacity
+        self.resolution = resolution
+        self.clock = clock
+
+        # Table à adressage ouvert (sondage linéaire), facteur de charge <= 0.5
+        size = 1
+        while size < 2 * capacity:
+            size <<= 1
+        self._mask = size - 1
+        self._shift = 64 - size.bit_length() + 1
+        self._keys = array('Q', bytes(8 * size))  # 0 = case vide
+        self._bits = array('Q', bytes(8 * size))
+        self._ticks = array('I', bytes(4 * size))
+        self.count = 0
+
+        # Roue temporelle: une case par tick, clés entrées à ce tick
+        self._wheel_size = int(window / resolution) + 1
+        self._wheel = [array('Q') for _ in range(self._wheel_size)]
+        self._tick = int(self.clock() / resolution)
+        self._expired = self._tick - self._wheel_size  # dernier tick expiré
+
+        # Services -> position dans le bitset (au-delà de 63: position hachée, approchée)
+        self._services: Dict[str, int] = {}
+        self.evicted = 0
+
+    # === Table de hachage ===
+
+    def _home(self, key: int) -> int:
+        return ((key * _GOLDEN) & _MASK64) >> self._shift
+
+    def _find(self, key: int) -> int:
+        """Index de la clé, ou de la case vide où l'insérer"""
+        keys, mask = self._keys, self._mask
+        i = self._home(key)
+        while keys[i] and keys[i] != key:
+            i = (i + 1) & mask
+        return i
+
+    def _delete(self, i: int):
+        """Suppression par décalage arrière (pas de pierre tombale)"""
+        keys, bits, ticks, mask = self._keys, self._bits, self._ticks, self._mask
+        j = i
+        while True:
+            j = (j + 1) & mask
+            if not keys[j]:
+                break
+            home = self._home(keys[j])
+            # La clé en j reste si sa position d'origine est dans (i, j] (circulairement)
+            if (i < j and i < home <= j) or (i > j and (home > i or home <= j)):
+                continue
+            keys[i], bits[i], ticks[i] = keys[j], bits[j], ticks[j]
+            i = j
+        keys[i] = 0
+        bits[i] = 0
+        self.count -= 1
+
+    # === Expiration ===
+
+    def _expire_slot(self, tick: int):
+        slot = tick % self._wheel_size
+        stamp = tick & 0xFFFFFFFF
+        for key in self._wheel[slot]:
+            i = self._find(key)
+            # La clé a pu expirer puis revenir (autre tick): on ne supprime que la bonne entrée
+            if self._keys[i] == key and self._ticks[i] == stamp:
+                self._delete(i)
+        self._wheel[slot] = array('Q')
+
+    def advance(self, now: Optional[float] = None):
+        """Expire les entrées plus anciennes que la fenêtre"""
+        self._tick = int((self.clock() if now is None else now) / self.resolution)
+        horizon = self._tick - self._wheel_size + 1
+        if horizon - self._expired > self._wheel_size:
+            # Longue inactivité: toute la roue est périmée
+            self._expired = horizon - self._wheel_size
+        while self._expired < horizon:
+            self._expired += 1
+            self._expire_slot(self._expired)
+
+    def _evict_oldest(self):
+        """Table pleine: expiration anticipée des entrées les plus anciennes"""
+        while self.count >= self.capacity and self._expired < self._tick:
+            self._expired += 1
+            before = self.count
+            self._expire_slot(self._expired)
+            self.evicted += before - self.count
+
+    # === API ===
+
+    def service_bit(self, service: str) -> int:
+        position = self._services.get(service)
+        if position is None:
+            if len(self._services) < SERVICE_BITS:
+                position = len(self._services)
+                self._services[service] = position
+            else:
+                position = hash(service) % SERVICE_BITS
+        return 1 << position
+
+    def services(self, bits: int) -> List[str]:
+        return [service for service, position in self._services.items() if bits >> position & 1]
+
+    def touch(self, ip: str, service: str, now: Optional[float] = None) -> Optional[List[str]]:
+        """Enregistre une connexion de `ip` sur `service`"""
+        self.advance(now)
+        key = ip_key(ip)
+        bit = self.service_bit(service)
+
+        i = self._find(key)
+        if not self._keys[i]:
+            if self.count >= self.capacity:
+                self._evict_oldest()
+                i = self._find(key)
+                if self.count >= self.capacity:
+                    # Tout est dans le tick courant: on refuse plutôt que de grossir
+                    self.evicted += 1
+                    return None
+            self._keys[i] = key
+            self._bits[i] = bit
+            self._ticks[i] = self._tick & 0xFFFFFFFF
+            self._wheel[self._tick % self._wheel_size].append(key)
+            self.count += 1
+            return None
+
+        bits = self._bits[i] | bit
+        if not bits & REPORTED_BIT and (bits & SERVICE_MASK).bit_count() >= self.threshold:
+            self._bits[i] = bits | REPORTED_BIT
+            return self.services(bits)
+        self._bits[i] = bits
+        return None
+
+    def first_seen(self, ip: str) -> Optional[float]:
+        """Secondes depuis la première connexion de la fenêtre courante"""
+        self.advance()
+        i = self._find(ip_key(ip))
+        if not self._keys[i]:
+            return None
+        age = (self._tick - self._ticks[i]) & 0xFFFFFFFF
+        return age * self.resolution
+
+    def memory_bytes(self) -> int:
+        """Mémoire des tables (préallouée) et de la roue"""
+        table = sum(a.itemsize * len(a) for a in (self._keys, self._bits, self._ticks))
+        return table + sum(a.itemsize * len(a) for a in self._wheel)
@@ -0,0 +1,393 @@
+#!/usr/bin/env python3
+"""
+Sessions interactives
+Enregistre ce que tapent les attaquants sur des milliers de sessions
+simultanées sans dépasser un budget mémoire: chaque session a un tampon
+circulaire de taille fixe, vidé périodiquement dans son fichier de
+transcription (ouvert le temps de l'écriture: pas de descripteur par
+session), un historique borné des commandes, et des limites d'inactivité
+et de durée totale. Une session n'est admise que si son coût maximal
+(tampons + lecteur + surcoût fixe mesuré) tient dans le budget.
+"""
+
+import asyncio
+import configparser
+import logging
+import os
+import re
+import time
+import uuid
+from collections import deque
+from datetime import datetime
+from typing import Deque, Dict, Optional, Set, Tuple
+
+logger = logging.getLogger('honeypot')
+
+# Surcoût mesuré d'une connexion asyncio inactive (transport, StreamReader/Writer,
+# tâche du handler, objets de session): benchmarks/bench_sessions.py
+SESSION_OVERHEAD = 8 * 1024
+
+# Commandes d'attaque dans un shell: téléchargement, sous-shell, exécution d'un flux,
+# shell inversé. Les commandes de reconnaissance (ls, uname, cat) ne suffisent pas.
+_MALICIOUS_COMMAND = re.compile(
+    r"(?:^|[;&|`(\s])(?:wget|curl|tftp|ftpget|nc|ncat|netcat)\s"
+    r"|\$\(|`"
+    r"|\|\s*(?:ba|da|z)?sh\b"
+    r"|chmod\s+(?:\+|[0-7]*7)\S*\s"
+    r"|/dev/(?:tcp|udp)/"
+    r"|base64\s+(?:-d|--decode)"
+)
+
+# Commandes IAC telnet (RFC 854)
+IAC, SB, SE = 255, 250, 240
+
+
+def strip_telnet(data: bytes) -> bytes:
+    """Retire les négociations telnet (IAC ...) d'un flux"""
+    if IAC not in data:
+        return data
+    out = bytearray()
+    i, n = 0, len(data)
+    while i < n:
+        byte = data[i]
+        if byte != IAC:
+            out.append(byte)
+            i += 1
+        elif i + 1 < n and data[i + 1] == IAC:
+            out.append(IAC)  # 0xFF échappé
+            i += 2
+        elif i + 1 < n and data[i + 1] == SB:
+            end = data.find(bytes((IAC, SE)), i + 2)
+            i = n if end < 0 else end + 2
+        else:
+            i += 3 if i + 1 < n and data[i + 1] >= 251 else 2
+    return bytes(out)
+
+
+def is_malicious_command(line: str) -> bool:
+    """Vrai si la ligne télécharge, exécute ou ouvre un shell distant"""
+    return _MALICIOUS_COMMAND.search(line) is not None
+
+
+class RingBuffer:
+    """Tampon circulaire de capacité fixe: les octets les plus anciens sont écrasés"""
+
+    __slots__ = ('capacity', '_data', '_start', '_size', 'dropped')
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._data = bytearray(capacity)
+        self._start = 0
+        self._size = 0
+        self.dropped = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def write(self, data: bytes):
+        if len(data) >= self.capacity:
+            self.dropped += self._size + len(data) - self.capacity
+            self._data[:] = data[-self.capacity:]
+            self._start, self._size = 0, self.capacity
+            return
+        overflow = self._size + len(data) - self.capacity
+        if overflow > 0:
+            # Le vidage n'a pas suivi: on perd le plus ancien, pas la mémoire
+            self.dropped += overflow
+            self._start = (self._start + overflow) % self.capacity
+            self._size -= overflow
+        end = (self._start + self._size) % self.capacity
+        first = min(len(data), self.capacity - end)
+        self._data[end:end + first] = data[:first]
+        self._data[:len(data) - first] = data[first:]
+        self._size += len(data)
+
+    def drain(self) -> bytes:
+        end = self._start + self._size
+        if end <= self.capacity:
+            data = bytes(self._data[self._start:end])
+        else:
+            data = bytes(self._data[self._start:]) + bytes(self._data[:end - self.capacity])
+        self._start = self._size = 0
+        return data
+
+
+class Session:
+    """Une session: transcription en cours, historique, compteurs"""
+
+    __slots__ = ('id', 'service', 'attacker_ip', 'attacker_port', 'started', 'last_activity',
+                 'ring', 'pending', 'history', 'commands', 'bytes_in', 'written', 'transcript', 'end_reason')
+
+    def __init__(self, service: str, attacker_ip: str, attacker_port: int, ring_bytes: int, history: int):
+        self.id = uuid.uuid4().hex
+        self.service = service
+        self.attacker_ip = attacker_ip
+        self.attacker_port = attacker_port
+        self.started = self.last_activity = time.monotonic()
+        self.ring = RingBuffer(ring_bytes)
+        self.pending = bytearray()  # Reçu, pas encore découpé en lignes
+        self.history: Deque[str] = deque(maxlen=history)
+        self.commands = 0
+        self.bytes_in = 0
+        self.written = 0
+        # Chemin relatif au dossier des transcriptions
+        self.transcript = os.path.join(datetime.utcnow().strftime('%Y%m%d'), f"{service}-{self.id}.log")
+        self.end_reason = None
+
+    def record(self, direction: str, data: bytes):
+        """Ajoute une ligne horodatée à la transcription ('<' reçu, '>' envoyé)"""
+        elapsed = time.monotonic() - self.started
+        self.ring.write(f"{elapsed:.3f} {direction} ".encode() + data.rstrip(b'\r\n') + b'\n')
+
+    def command(self, line: str):
+        self.commands += 1
+        self.history.append(line)
+        self.record('<', line.encode('utf-8', errors='replace'))
+
+    def summary(self) -> Dict:
+        return {
+            'session_id': self.id,
+            'duration': round(time.monotonic() - self.started, 3),
+            'commands': list(self.history),
+            'command_count': self.commands,
+            'bytes_in': self.bytes_in,
+            'transcript': self.transcript,
+            'transcript_bytes': self.written,
+            'dropped_bytes': self.ring.dropped,
+            'end_reason': self.end_reason
+        }
+
+
+class SessionManager:
+    """Admission sous budget mémoire, lecture bornée et vidage des transcriptions"""
+
+    def __init__(self, transcript_dir: str = '/app/logs/sessions', memory_budget: int = 384 * 2**20,
+                 ring_bytes: int = 4096, reader_limit: int = 4096, max_line: int = 512,
+                 history: int = 20, idle_timeout: float = 60.0, max_duration: float = 600.0,
+                 flush_interval: float = 1.0, max_transcript_bytes: int = 256 * 1024):
+        self.transcript_dir = transcript_dir
+        self.memory_budget = memory_budget
+        self.ring_bytes = ring_bytes
+        self.reader_limit = reader_limit
+        self.max_line = max_line
+        self.history = history
+        self.idle_timeout = idle_timeout
+        self.max_duration = max_duration
+        self.flush_interval = flush_interval
+        self.max_transcript_bytes = max_transcript_bytes
+        self.sessions: Set[Session] = set()
+        self.refused = 0
+        self.peak = 0
+        self._flusher = None
+        self._closed = []  # Derniers morceaux des sessions terminées, écrits au prochain vidage
+
+    @classmethod
+    def from_config(cls, config: configparser.ConfigParser):
+        """Gestionnaire décrit par la section [sessions]"""
+        return cls(
+            transcript_dir=config.get('sessions', 'transcript_dir', fallback='/app/logs/sessions'),
+            memory_budget=config.getint('sessions', 'memory_budget_mb', fallback=384) * 2**20,
+            ring_bytes=config.getint('sessions', 'ring_buffer_kb', fallback=4) * 1024,
+            idle_timeout=config.getfloat('sessions', 'idle_timeout', fallback=60.0),
+            max_duration=config.getfloat('sessions', 'max_duration', fallback=600.0),
+            max_transcript_bytes=config.getint('sessions', 'max_transcript_kb', fallback=256) * 1024
+        )
+
+    @property
+    def session_cost(self) -> int:
+        """Mémoire maximale d'une session (tout ce qu'elle peut retenir)"""
+        # Le StreamReader met en pause la lecture au-delà de 2 x limit; une
+        # ligne en attente fait au plus max_line + une lecture
+        reader = 2 * self.reader_limit + self.max_line + self.reader_limit
+        return self.ring_bytes + reader + self.history * self.max_line + SESSION_OVERHEAD
+
+    @property
+    def max_sessions(self) -> int:
+        return self.memory_budget // self.session_cost
+
+    def memory_used(self) -> int:
+        return len(self.sessions) * self.session_cost
+
+    def open(self, service: str, attacker_ip: str, attacker_port: int) -> Optional[Session]:
+        """Nouvelle session, ou None si le budget mémoire est atteint"""
+        if len(self.sessions) >= self.max_sessions:
+            self.refused += 1
+            return None
+        if self._flusher is None:
+            self._flusher = asyncio.get_running_loop().create_task(self._flush_loop())
+        session = Session(service, attacker_ip, attacker_port, self.ring_bytes, self.history)
+        self.sessions.add(session)
+        self.peak = max(self.peak, len(self.sessions))
+        return session
+
+    def close(self, session: Session, reason: str = 'closed') -> Dict:
+        """Termine la session (dernier morceau mis en file) et retourne son résumé"""
+        if session.end_reason is None:
+            session.end_reason = reason
+        pending = self._drain(session)
+        if pending:
+            self._closed.append(pending)
+        self.sessions.discard(session)
+        return session.summary()
+
+    def _split_line(self, session: Session) -> Optional[str]:
+        pending = session.pending
+        ends = [i for i in (pending.find(b'\n'), pending.find(b'\r')) if i >= 0]
+        if ends:
+            end = min(ends)
+            line = bytes(pending[:min(end, self.max_line)])
+            # Fin de ligne \r\n, \r\0 (telnet) ou \n
+            while end < len(pending) and pending[end] in b'\r\n\x00':
+                end += 1
+            del pending[:end]
+        elif len(pending) >= self.max_line:
+            # Ligne trop longue: tronquée
+            line = bytes(pending[:self.max_line])
+            pending.clear()
+        else:
+            return None
+        return line.decode('utf-8', errors='replace').strip('\x00 ')
+
+    async def read_line(self, reader: asyncio.StreamReader, session: Session) -> Optional[str]:
+        """Ligne suivante (sans négociation telnet), None à la fin de la session
+
+        La session se termine sur EOF, inactivité (idle_timeout) ou durée
+        maximale; les lignes plus longues que max_line sont tronquées.
+        """
+        while True:
+            line = self._split_line(session)
+            if line is not None:
+                return line
+            remaining = self.max_duration - (time.monotonic() - session.started)
+            if remaining <= 0:
+                session.end_reason = 'max_duration'
+                return None
+            try:
+                data = await asyncio.wait_for(reader.read(self.reader_limit), min(self.idle_timeout, remaining))
+            except asyncio.TimeoutError:
+                session.end_reason = 'idle' if remaining > self.idle_timeout else 'max_duration'
+                return None
+            if not data:
+                session.end_reason = 'eof'
+                return None
+            session.bytes_in += len(data)
+            session.last_activity = time.monotonic()
+            session.pending += strip_telnet(data)
+
+    def _drain(self, session: Session) -> Optional[Tuple[Session, str, bytes]]:
+        """Vide le tampon de la session (dans la boucle: simple copie mémoire)"""
+        if not len(session.ring):
+            return None
+        data = session.ring.drain()
+        room = self.max_transcript_bytes - session.written
+        if len(data) > room:
+            session.ring.dropped += len(data) - max(room, 0)
+            data = data[:max(room, 0)]
+        if not data:
+            return None
+        session.written += len(data)
+        return session, os.path.join(self.transcript_dir, session.transcript), data
+
+    @staticmethod
+    def _write(batch):
+        """Écritures disque d'un vidage (thread: la boucle n'attend pas le disque)"""
+        for session, path, data in batch:
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, 'ab') as f:
+                    f.write(data)
+            except OSError as e:
+                session.written -= len(data)
+                session.ring.dropped += len(data)
+                logger.error(f"Transcript write failed ({path}): {e}")
+
+    async def flush(self):
+        """Vidage incrémental de toutes les sessions et des sessions terminées"""
+        batch, self._closed = self._closed, []
+        batch += filter(None, map(self._drain, list(self.sessions)))
+        if batch:
+            await asyncio.get_running_loop().run_in_executor(None, self._write, batch)
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Transcript flush error: {e}")
+
+    def stats(self) -> Dict:
+        return {
+            'active': len(self.sessions),
+            'peak': self.peak,
+            'refused': self.refused,
+            'max_sessions': self.max_sessions,
+            'memory_used': self.memory_used(),
+            'memory_budget': self.memory_budget
+        }
+
+
+class FakeShell:
+    """Shell Linux factice: réponses plausibles aux commandes courantes des bots"""
+
+    def __init__(self, hostname: str = 'srv01', user: str = 'root'):
+        self.hostname = hostname
+        self.user = user
+        self.cwd = '/root' if user == 'root' else f'/home/{user}'
+        self.outputs = {
+            'whoami': user,
+            'id': 'uid=0(root) gid=0(root) groups=0(root)',
+            'uname': 'Linux',
+            'uname -a': f'Linux {hostname} 2.6.32-5-686 #1 SMP Mon Jan 16 16:04:25 UTC 2012 i686 GNU/Linux',
+            'uname -m': 'i686',
+            'hostname': hostname,
+            'ls': 'backup.tar.gz  notes.txt',
+            'ls -la': ('total 24\r\ndrwx------  3 root root 4096 Jan 12 09:14 .\r\n'
+                       'drwxr-xr-x 22 root root 4096 Jan 10 17:02 ..\r\n'
+                       '-rw-------  1 root root  812 Jan 12 09:14 .bash_history\r\n'
+                       '-rw-r--r--  1 root root 1049 Jan 11 11:30 backup.tar.gz\r\n'
+                       '-rw-r--r--  1 root root   94 Jan 11 11:31 notes.txt'),
+            'cat /etc/passwd': ('root:x:0:0:root:/root:/bin/bash\r\n'
+                                'daemon:x:1:1:daemon:/usr/sbin:/bin/sh\r\n'
+                                'www-data:x:33:33:www-data:/var/www:/bin/sh\r\n'
+                                'mysql:x:104:107:MySQL Server,,,:/var/lib/mysql:/bin/false'),
+            'cat /proc/cpuinfo': 'processor\t: 0\r\nmodel name\t: Intel(R) Xeon(R) CPU E5-2620 0 @ 2.00GHz',
+            'nproc': '1',
+            'free': ('             total       used       free\r\n'
+                     'Mem:        509124     301240     207884'),
+            'w': ' 09:14:02 up 41 days,  2:03,  1 user,  load average: 0.00, 0.01, 0.05',
+            'uptime': ' 09:14:02 up 41 days,  2:03,  1 user,  load average: 0.00, 0.01, 0.05',
+        }
+
+    @property
+    def prompt(self) -> bytes:
+        sign = '#' if self.user == 'root' else '$'
+        return f"{self.user}@{self.hostname}:{self.cwd.replace('/root', '~')}{sign} ".encode()
+
+    def execute(self, line: str) -> Tuple[bytes, bool]:
+        """Sortie d'une ligne de commande et fin de session demandée"""
+        output = []
+        for command in line.replace('&&', ';').replace('||', ';').split(';'):
+            command = ' '.join(command.split())
+            if not command:
+                continue
+            name = command.split()[0]
+            if name in ('exit', 'logout', 'quit'):
+                return '\r\n'.join(output).encode() + (b'\r\n' if output else b''), True
+            if command in self.outputs:
+                output.append(self.outputs[command])
+            elif name == 'pwd':
+                output.append(self.cwd)
+            elif name == 'cd':
+                parts = command.split()
+                self.cwd = parts[1] if len(parts) > 1 and parts[1].startswith('/') else self.cwd
+            elif name == 'echo':
+                output.append(command[5:].strip('\'"'))
+            elif name in ('wget', 'curl', 'tftp', 'ftpget'):
+                output.append(f"{name}: unable to resolve host address")
+            elif name in ('chmod', 'rm', 'mkdir', 'touch', 'export', 'history', 'unset', 'kill'):
+                continue
+            else:
+                output.append(f"-bash: {name}: command not found")
+        text = '\r\n'.join(output)
+        return (text + '\r\n').encode() if text else b'', False
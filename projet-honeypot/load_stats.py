@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Statistiques de latence pour les outils de charge
+Percentiles sur un échantillon borné (réservoir) pour rester en mémoire
+constante, même sur des millions de mesures.
+"""
+
+import random
+from collections import Counter
+
+RESERVOIR_SIZE = 100_000
+
+
+def percentile(sorted_values, q):
+    """Percentile q (0-100) par interpolation linéaire sur une liste triée"""
+    if not sorted_values:
+        return 0.0
+    position = (len(sorted_values) - 1) * q / 100
+    low = int(position)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (position - low)
+
+
+class LatencyRecorder:
+    """Enregistre des durées (secondes) et résume en millisecondes"""
+
+    def __init__(self, reservoir_size=RESERVOIR_SIZE, seed=0):
+        self.reservoir_size = reservoir_size
+        self.samples = []
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._rng = random.Random(seed)
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        if len(self.samples) < self.reservoir_size:
+            self.samples.append(seconds)
+        else:
+            # Échantillonnage par réservoir: chaque mesure a la même probabilité d'être gardée
+            slot = self._rng.randrange(self.count)
+            if slot < self.reservoir_size:
+                self.samples[slot] = seconds
+
+    def summary(self):
+        values = sorted(self.samples)
+        return {
+            'count': self.count,
+            'mean_ms': self.total / self.count * 1000 if self.count else 0.0,
+            'p50_ms': percentile(values, 50) * 1000,
+            'p95_ms': percentile(values, 95) * 1000,
+            'p99_ms': percentile(values, 99) * 1000,
+            'max_ms': self.max * 1000
+        }
+
+
+class OutcomeStats:
+    """Compteurs de résultats et latences par étape pour un service (ou un endpoint)"""
+
+    def __init__(self, stages=('total',)):
+        self.attempts = 0
+        self.ok = 0
+        self.errors = Counter()  # type d'erreur -> nombre
+        self.latencies = {stage: LatencyRecorder() for stage in stages}
+
+    @property
+    def failed(self):
+        return sum(self.errors.values())
+
+    def record(self, stage, seconds):
+        self.latencies[stage].add(seconds)
+
+    def error(self, kind):
+        self.errors[kind] += 1
+
+    def error_rate(self):
+        return self.failed / self.attempts if self.attempts else 0.0
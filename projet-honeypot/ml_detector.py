@@ -4,144 +4,229 @@ Machine Learning pour détecter les patterns d'attaque anormaux
 Utilise l'algorithme Isolation Forest pour la détection d'anomalies
 """
 
-import requests
+import os
+import joblib
 import numpy as np
 import pandas as pd
-from sklearn.ensemble import IsolationForest
-from sklearn.preprocessing import StandardScaler
-import json
 from datetime import datetime, timedelta
 import schedule
 import time
 
+from attack_patterns import find_coordinated_campaigns
+from feature_store import FeatureStore
+from ml_features import FeaturePipeline
+from ml_partitions import GLOBAL_KEY, PartitionedModel
+from sequence_miner import SequenceMiner
+from model_export import export_scoring_model
+
+# Persistance du modèle entre les redémarrages
+MODEL_DIR = os.environ.get('MODEL_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'models'))
+MODEL_FILE = 'anomaly_model.joblib'
+MODEL_FORMAT = 4  # À incrémenter si la structure de l'artefact change
+
+# Feature store local (menaces synchronisées depuis l'API)
+FEATURE_STORE_DIR = os.environ.get('FEATURE_STORE_DIR')  # Par défaut: <model_dir>/feature_store
+SYNC_INTERVAL = 30  # Secondes minimum entre deux synchronisations avec l'API
+
+# Un modèle par partition: 'service', 'honeypot_service' ou 'global'
+PARTITION_BY = os.environ.get('PARTITION_BY', 'service')
+TRAINING_WORKERS = int(os.environ.get('TRAINING_WORKERS', os.cpu_count() or 1))
+
+# Séquences d'attaque par IP (n-grammes de types d'attaque)
+SEQUENCE_FILE = 'sequences.json'
+SEQUENCE_MAX_N = int(os.environ.get('SEQUENCE_MAX_N', 3))
+SEQUENCE_MIN_SUPPORT = int(os.environ.get('SEQUENCE_MIN_SUPPORT', 2))
+
+# Fenêtre glissante d'entraînement
+TRAINING_WINDOW_HOURS = 168  # 7 jours
+
+# Attaques coordonnées: au moins 4 IPs distinctes à ±5 minutes
+COORDINATION_WINDOW_US = 5 * 60 * 1_000_000
+COORDINATION_MIN_IPS = 4
+
+
 class MLThreatDetector:
-    def __init__(self, api_url='http://localhost:5000'):
+    def __init__(self, api_url='http://localhost:5000', model_dir=MODEL_DIR, store_dir=None, clock=datetime.utcnow):
         self.api_url = api_url
-        self.model = IsolationForest(contamination=0.1, random_state=42)
-        self.scaler = StandardScaler()
+        self.model_dir = model_dir
+        self.clock = clock  # Fin des fenêtres glissantes (heure UTC courante)
+        self.model = PartitionedModel(PARTITION_BY, max_workers=TRAINING_WORKERS)
+        self.features = FeaturePipeline()
         self.is_trained = False
-        
-    def fetch_threats(self, hours=24):
-        """Récupère les menaces des dernières heures"""
+        self.partition_summary = {}
+        
+        # État de l'entraînement incrémental
+        self.model_version = 0
+        self.watermark = 0  # Plus grand id de menace vu au dernier entraînement
+        
+        # Démarrage à chaud si un modèle a déjà été entraîné
+        self.load_model()
+        
+        self.store = FeatureStore(
+            store_dir or FEATURE_STORE_DIR or os.path.join(model_dir, 'feature_store'),
+            pipeline=self.features,
+            retention_hours=TRAINING_WINDOW_HOURS,
+            clock=clock
+        )
+        self._last_sync = 0
+        
+        self.sequences = SequenceMiner.load(
+            os.path.join(model_dir, SEQUENCE_FILE), SEQUENCE_MAX_N, SEQUENCE_MIN_SUPPORT
+        )
+        
+    def refresh(self, force=False):
+        """Synchronise le feature store avec l'API (delta depuis le dernier id connu)"""
+        if not force and time.monotonic() - self._last_sync < SYNC_INTERVAL:
+            return 0
         try:
-            response = requests.get(f"{self.api_url}/api/threats?per_page=1000")
-            if response.status_code == 200:
-                threats = response.json()['threats']
-                
-                # Filtrer par date
-                cutoff_time = datetime.utcnow() - timedelta(hours=hours)
-                recent_threats = [
-                    t for t in threats 
-                    if datetime.fromisoformat(t['timestamp']) > cutoff_time
-                ]
-                
-                return recent_threats
+            added = self.store.sync(self.api_url)
+            self._last_sync = time.monotonic()
+            return added
         except Exception as e:
-            print(f"Erreur lors de la récupération des menaces: {e}")
-            return []
+            # Le store local reste utilisable si l'API est indisponible
+            print(f"Erreur lors de la synchronisation des menaces: {e}")
+            return 0
+    
+    def load_window(self, hours=24):
+        """Colonnes des menaces des dernières heures, lues depuis le feature store"""
+        self.refresh()
+        return self.store.read(since=self.clock() - timedelta(hours=hours))
+    
+    def fetch_threats(self, hours=24):
+        """Récupère les menaces des dernières heures (sans payload)"""
+        return self.store.to_threats(self.load_window(hours))
     
     def prepare_features(self, threats):
-        """Prépare les features pour le ML"""
-        if not threats:
-            return None
-            
-        features = []
-        
-        for threat in threats:
-            # Extraire les caractéristiques
-            hour = datetime.fromisoformat(threat['timestamp']).hour
-            
-            # Encoder le service
-            service_encoding = {
-                'ssh': 0,
-                'http': 1,
-                'telnet': 2
-            }.get(threat['service'], 3)
-            
-            # Encoder le type d'attaque
-            attack_encoding = {
-                'brute_force': 0,
-                'unauthorized_access': 1,
-                'sql_injection': 2,
-                'command_injection': 3,
-                'path_traversal': 4,
-                'reconnaissance': 5
-            }.get(threat['attack_type'], 6)
-            
-            # Extraire l'octet final de l'IP
-            ip_parts = threat['attacker_ip'].split('.')
-            ip_last_octet = int(ip_parts[-1]) if len(ip_parts) == 4 else 0
-            
-            # Calculer la longueur du payload
-            payload_length = len(json.dumps(threat.get('payload', {})))
-            
-            feature_vector = [
-                hour,                    # Heure de l'attaque
-                service_encoding,        # Type de service
-                attack_encoding,         # Type d'attaque
-                threat['risk_score'],    # Score de risque
-                ip_last_octet,          # Dernier octet de l'IP
-                payload_length,         # Taille du payload
-                threat.get('attacker_port', 0)  # Port source
-            ]
-            
-            features.append(feature_vector)
-        
-        return np.array(features)
+        """Prépare les features pour le ML (voir ml_features.FEATURE_COLUMNS)"""
+        return self.features.transform(threats)
+    
+    def partition_keys(self, columns):
+        """Clé de partition de chaque ligne (ex: 'ssh' ou 'honeypot-001|ssh')"""
+        fields = self.model.fields
+        if not fields:
+            return np.full(len(columns['id']), '', dtype=object)
+        # Une jointure de chaînes par combinaison distincte, pas par ligne
+        codes = np.column_stack([columns[field] for field in fields])
+        combinations, inverse = np.unique(codes, axis=0, return_inverse=True)
+        labels = np.array([
+            '|'.join(self.store.vocab[field][code] for field, code in zip(fields, row))
+            for row in combinations.tolist()
+        ], dtype=object)
+        return labels[inverse.ravel()]
     
-    def train_model(self):
-        """Entraîne le modèle sur les données historiques"""
+    def train_model(self, incremental=True):
+        """Entraîne le modèle sur la fenêtre glissante des 7 derniers jours
+
+        En mode incrémental, seules les menaces postérieures au watermark sont
+        récupérées (synchronisation du feature store) avant le réentraînement.
+        Sinon le feature store est reconstruit entièrement depuis l'API.
+        """
         print("🤖 Entraînement du modèle ML...")
         
-        threats = self.fetch_threats(hours=168)  # 7 jours
-        if not threats:
-            print("❌ Pas assez de données pour l'entraînement")
-            return False
+        if not incremental:
+            self.store.reset()
+        added = self.refresh(force=True)
+        print(f"   {added} nouvelles menaces depuis l'id {self.watermark}")
         
-        features = self.prepare_features(threats)
-        if features is None or len(features) < 10:
+        window = self.store.read(since=self.clock() - timedelta(hours=TRAINING_WINDOW_HOURS))
+        features = window['features']
+        if len(features) < 10:
             print("❌ Pas assez de features pour l'entraînement")
             return False
         
-        # Normaliser les features
-        features_scaled = self.scaler.fit_transform(features)
-        
-        # Entraîner le modèle
-        self.model.fit(features_scaled)
+        # Un modèle par partition (normalisation comprise), entraînés en parallèle
+        start = time.perf_counter()
+        self.model.fit(self.partition_keys(window), features, window['payload'])
+        elapsed = time.perf_counter() - start
         self.is_trained = True
+        self.model_version += 1
+        self.watermark = self.store.watermark
+        
+        self.save_model(n_samples=len(features))
         
-        print(f"✅ Modèle entraîné sur {len(features)} échantillons")
+        print(f"✅ Modèle v{self.model_version} entraîné sur {len(features)} échantillons "
+              f"({len(self.model.partitions)} partitions, {elapsed:.1f}s)")
         return True
     
+    def save_model(self, n_samples=0):
+        """Persiste les modèles des partitions, les encodeurs et le watermark"""
+        os.makedirs(self.model_dir, exist_ok=True)
+        artifact = {
+            'format': MODEL_FORMAT,
+            'version': self.model_version,
+            'trained_at': datetime.utcnow().isoformat(),
+            'watermark': self.watermark,
+            'n_samples': n_samples,
+            'encoders': self.features.to_dict(),
+            'partitions': self.model.to_dict()
+        }
+        # Écriture atomique: un lecteur ne voit jamais un fichier à moitié écrit
+        _atomic_write(os.path.join(self.model_dir, MODEL_FILE), lambda f: joblib.dump(artifact, f))
+        # Version portable pour le scoring à l'ingestion côté API
+        export_scoring_model(self.model_dir, self.model_version, self.features, self.model)
+    
+    def load_model(self):
+        """Recharge le dernier modèle persisté (démarrage à chaud)"""
+        path = os.path.join(self.model_dir, MODEL_FILE)
+        if not os.path.exists(path):
+            return False
+        try:
+            artifact = joblib.load(path)
+            if artifact.get('format') != MODEL_FORMAT:
+                print(f"⚠️  Format de modèle incompatible ({artifact.get('format')}), réentraînement nécessaire")
+                return False
+            
+            self.model = PartitionedModel.from_dict(artifact['partitions'], max_workers=TRAINING_WORKERS)
+            self.features = FeaturePipeline.from_dict(artifact['encoders'])
+            self.model_version = artifact['version']
+            self.watermark = artifact['watermark']
+            self.is_trained = True
+            
+            print(f"📦 Modèle v{self.model_version} chargé ({artifact['n_samples']} échantillons, "
+                  f"{len(self.model.partitions)} partitions, watermark id {self.watermark})")
+            return True
+        except Exception as e:
+            print(f"⚠️  Impossible de charger le modèle: {e}")
+            return False
+    
     def detect_anomalies(self):
         """Détecte les anomalies dans les menaces récentes"""
         if not self.is_trained:
             if not self.train_model():
                 return []
         
-        # Récupérer les menaces de la dernière heure
-        recent_threats = self.fetch_threats(hours=1)
-        if not recent_threats:
+        # Menaces de la dernière heure
+        window = self.load_window(hours=1)
+        features = window['features']
+        if len(features) == 0:
             return []
         
-        features = self.prepare_features(recent_threats)
-        if features is None:
-            return []
-        
-        # Normaliser et prédire
-        features_scaled = self.scaler.transform(features)
-        predictions = self.model.predict(features_scaled)
-        anomaly_scores = self.model.score_samples(features_scaled)
+        # Chaque menace est normalisée et scorée par le modèle de sa partition
+        keys = self.partition_keys(window)
+        predictions, anomaly_scores, used = self.model.predict(keys, features, window['payload'])
+        
+        # Bilan par partition pour le rapport combiné
+        self.partition_summary = {}
+        for key in np.unique(keys):
+            rows = keys == key
+            model_key = self.model.resolve(key)
+            self.partition_summary[key or GLOBAL_KEY] = {
+                'model': model_key,
+                'trained_samples': self.model.partitions[model_key]['n_samples'],
+                'events': int(rows.sum()),
+                'anomalies': int((predictions[rows] == -1).sum())
+            }
         
-        # Identifier les anomalies
+        # Identifier les anomalies (seules celles-ci sont reconstruites en dictionnaires)
+        indices = np.flatnonzero(predictions == -1)
         anomalies = []
-        for i, (threat, pred, score) in enumerate(zip(recent_threats, predictions, anomaly_scores)):
-            if pred == -1:  # Anomalie détectée
-                anomalies.append({
-                    'threat': threat,
-                    'anomaly_score': float(score),
-                    'reason': self.analyze_anomaly(threat, features[i])
-                })
+        for i, threat in zip(indices, self.store.to_threats(window, indices)):
+            anomalies.append({
+                'threat': threat,
+                'anomaly_score': float(anomaly_scores[i]),
+                'partition': used[i],
+                'reason': self.analyze_anomaly(threat, features[i])
+            })
         
         return anomalies
     
@@ -169,67 +254,87 @@ class MLThreatDetector:
     
     def analyze_attack_patterns(self):
         """Analyse les patterns d'attaque"""
-        threats = self.fetch_threats(hours=24)
-        if not threats:
+        window = self.load_window(hours=24)
+        if len(window['id']) == 0:
             return {}
         
-        df = pd.DataFrame(threats)
+        df = pd.DataFrame({
+            'timestamp': window['timestamp'].astype('datetime64[us]'),
+            'attacker_ip': self.store.decode('attacker_ip', window['attacker_ip']),
+            'attack_type': self.store.decode('attack_type', window['attack_type'])
+        })
         
         # Analyser les patterns temporels
-        df['hour'] = pd.to_datetime(df['timestamp']).dt.hour
+        df['hour'] = df['timestamp'].dt.hour
         hourly_pattern = df.groupby('hour').size().to_dict()
         
-        # Analyser les séquences d'attaques
-        ip_sequences = df.groupby('attacker_ip').apply(
-            lambda x: list(x.sort_values('timestamp')['attack_type'])
-        ).to_dict()
-        
-        # Détecter les attaques coordonnées
-        time_window = pd.Timedelta(minutes=5)
-        df['timestamp'] = pd.to_datetime(df['timestamp'])
-        coordinated_attacks = []
-        
-        for i in range(len(df)):
-            current_time = df.iloc[i]['timestamp']
-            window_attacks = df[
-                (df['timestamp'] >= current_time - time_window) &
-                (df['timestamp'] <= current_time + time_window)
-            ]
-            
-            if len(window_attacks['attacker_ip'].unique()) > 3:
-                coordinated_attacks.append({
-                    'time': current_time.isoformat(),
-                    'ips': list(window_attacks['attacker_ip'].unique()),
-                    'attack_types': list(window_attacks['attack_type'].unique())
-                })
+        # Séquences d'attaques des IPs les plus actives (tri par IP puis par date,
+        # découpage aux changements d'IP: pas de groupby.apply ligne à ligne)
+        attack_sequences = {}
+        order = np.lexsort((window['timestamp'], window['attacker_ip']))
+        ip_codes = window['attacker_ip'][order]
+        attack_types = df['attack_type'].to_numpy()[order]
+        bounds = np.flatnonzero(np.diff(ip_codes)) + 1
+        starts = np.concatenate(([0], bounds))
+        ends = np.concatenate((bounds, [len(order)]))
+        for start, end in zip(starts[ends - starts > 5], ends[ends - starts > 5]):  # Plus de 5 attaques
+            ip = self.store.vocab['attacker_ip'][ip_codes[start]]
+            attack_sequences[ip] = attack_types[start:end].tolist()
+        
+        # Mettre à jour l'arbre des n-grammes avec les nouvelles menaces
+        self.update_sequences(window)
+        
+        # Détecter les attaques coordonnées (campagnes fusionnées, fenêtre de ±5 minutes)
+        campaigns = find_coordinated_campaigns(
+            window['timestamp'], window['attacker_ip'], window['attack_type'],
+            window=COORDINATION_WINDOW_US, min_ips=COORDINATION_MIN_IPS
+        )
+        coordinated_attacks = [
+            {
+                'start': _us_to_iso(campaign['start']),
+                'end': _us_to_iso(campaign['end']),
+                'events': campaign['events'],
+                'ips': self.store.decode('attacker_ip', campaign['ips']).tolist(),
+                'attack_types': self.store.decode('attack_type', campaign['attack_types']).tolist()
+            }
+            for campaign in sorted(campaigns, key=lambda c: len(c['ips']), reverse=True)
+        ]
         
         return {
             'hourly_pattern': hourly_pattern,
-            'attack_sequences': {
-                ip: seq for ip, seq in ip_sequences.items() 
-                if len(seq) > 5  # IPs avec plus de 5 attaques
+            'attack_sequences': attack_sequences,
+            'frequent_sequences': {
+                n: self.sequences.top_k(n, k=5) for n in range(2, self.sequences.max_n + 1)
             },
-            'coordinated_attacks': coordinated_attacks[:5],  # Top 5
+            'coordinated_attacks': coordinated_attacks[:5],  # Top 5 (nombre d'IPs)
             'summary': {
                 'peak_hour': max(hourly_pattern, key=hourly_pattern.get) if hourly_pattern else None,
                 'most_persistent_attacker': df['attacker_ip'].value_counts().index[0] if len(df) > 0 else None,
-                'most_common_pattern': self.find_common_pattern(ip_sequences)
+                'most_common_pattern': self.find_common_pattern()
             }
         }
     
-    def find_common_pattern(self, sequences):
-        """Trouve le pattern d'attaque le plus commun"""
-        pattern_count = {}
-        
-        for seq in sequences.values():
-            if len(seq) >= 2:
-                # Créer des bi-grammes
-                for i in range(len(seq) - 1):
-                    pattern = f"{seq[i]} -> {seq[i+1]}"
-                    pattern_count[pattern] = pattern_count.get(pattern, 0) + 1
-        
-        if pattern_count:
-            return max(pattern_count, key=pattern_count.get)
+    def update_sequences(self, window):
+        """Ajoute à l'arbre des séquences les menaces postérieures à son watermark"""
+        new = np.flatnonzero(window['id'] > self.sequences.watermark)
+        if len(new) == 0:
+            return 0
+        added = self.sequences.update(
+            window['id'][new].tolist(),
+            window['timestamp'][new].tolist(),
+            self.store.decode('attacker_ip', window['attacker_ip'][new]).tolist(),
+            self.store.decode('attack_type', window['attack_type'][new]).tolist()
+        )
+        self.sequences.prune(int(window['timestamp'][-1]))
+        os.makedirs(self.model_dir, exist_ok=True)
+        self.sequences.save(os.path.join(self.model_dir, SEQUENCE_FILE))
+        return added
+    
+    def find_common_pattern(self):
+        """Trouve le pattern d'attaque le plus commun (bigramme le plus fréquent)"""
+        top = self.sequences.top_k(2, k=1)
+        if top:
+            return " -> ".join(top[0][0])
         return None
     
     def generate_report(self):
@@ -238,12 +343,21 @@ class MLThreatDetector:
         print("=" * 50)
         
         # Détecter les anomalies
+        self.partition_summary = {}
         anomalies = self.detect_anomalies()
+        if self.partition_summary:
+            print(f"\n🧩 MODÈLES PAR PARTITION ({self.model.partition_by}):")
+            for key, summary in sorted(self.partition_summary.items()):
+                model = '' if summary['model'] == key else f" [modèle {summary['model']}]"
+                print(f"- {key}{model}: {summary['anomalies']}/{summary['events']} anomalies "
+                      f"(entraîné sur {summary['trained_samples']})")
+        
         if anomalies:
             print(f"\n🚨 {len(anomalies)} ANOMALIES DÉTECTÉES:")
             for i, anomaly in enumerate(anomalies[:5]):  # Top 5
                 threat = anomaly['threat']
-                print(f"\n{i+1}. IP: {threat['attacker_ip']} | Service: {threat['service']}")
+                print(f"\n{i+1}. IP: {threat['attacker_ip']} | Service: {threat['service']} "
+                      f"| Partition: {anomaly['partition']}")
                 print(f"   Type: {threat['attack_type']} | Score: {threat['risk_score']}")
                 print(f"   Raison: {anomaly['reason']}")
                 print(f"   Score d'anomalie: {anomaly['anomaly_score']:.3f}")
@@ -261,26 +375,47 @@ class MLThreatDetector:
         if patterns['summary']['most_common_pattern']:
             print(f"- Pattern le plus commun: {patterns['summary']['most_common_pattern']}")
         
+        frequent = patterns['frequent_sequences'].get(self.sequences.max_n)
+        if frequent:
+            print(f"\n🔗 SÉQUENCES FRÉQUENTES ({self.sequences.max_n} attaques):")
+            for sequence, count in frequent[:3]:
+                print(f"- {' -> '.join(sequence)} ({count}x)")
+        
         if patterns['coordinated_attacks']:
             print(f"\n🎯 ATTAQUES COORDONNÉES POSSIBLES:")
             for attack in patterns['coordinated_attacks'][:3]:
-                print(f"- {attack['time']}: {len(attack['ips'])} IPs simultanées")
+                print(f"- {attack['start']} → {attack['end']}: {len(attack['ips'])} IPs, "
+                      f"{attack['events']} attaques ({', '.join(attack['attack_types'])})")
         
         print("\n" + "=" * 50)
         
         # Retourner les résultats pour l'API
         return {
             'anomalies': anomalies,
+            'partitions': self.partition_summary,
             'patterns': patterns,
             'timestamp': datetime.utcnow().isoformat()
         }
 
 
+def _us_to_iso(timestamp_us):
+    """Timestamp epoch en microsecondes -> ISO 8601"""
+    return pd.Timestamp(int(timestamp_us), unit='us').isoformat()
+
+
+def _atomic_write(path, write):
+    """Écrit un fichier via un fichier temporaire puis os.replace"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        write(f)
+    os.replace(tmp_path, path)
+
+
 def run_ml_analysis():
     """Fonction principale pour l'analyse ML périodique"""
     detector = MLThreatDetector()
     
-    # Analyse initiale
+    # Analyse initiale (le modèle persisté est déjà chargé s'il existe)
     detector.generate_report()
     
     # Programmer des analyses régulières
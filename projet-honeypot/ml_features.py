@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+Extraction vectorisée des features pour le détecteur ML
+Construit la matrice de features en colonnes (NumPy/pandas) au lieu
+d'une boucle Python par menace, et une matrice creuse (SciPy CSR) des
+tokens du payload hachés dans un espace de taille fixe
+"""
+
+import json
+import re
+import zlib
+from json import encoder as json_encoder
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+# Encodages catégoriels (identiques à ceux historiques de prepare_features)
+SERVICE_ENCODING = {
+    'ssh': 0,
+    'http': 1,
+    'telnet': 2
+}
+
+ATTACK_ENCODING = {
+    'brute_force': 0,
+    'unauthorized_access': 1,
+    'sql_injection': 2,
+    'command_injection': 3,
+    'path_traversal': 4,
+    'reconnaissance': 5
+}
+
+# Ordre des colonnes de la matrice de features
+FEATURE_COLUMNS = [
+    'hour',            # Heure de l'attaque
+    'service',         # Type de service
+    'attack_type',     # Type d'attaque
+    'risk_score',      # Score de risque
+    'ip_last_octet',   # Dernier octet de l'IP
+    'payload_length',  # Taille du payload
+    'attacker_port'    # Port source
+]
+
+# Champs texte du payload tokenisés (chemin, requête, user agent, identifiants Telnet, banner SSH)
+PAYLOAD_FIELDS = ('path', 'query', 'user_agent', 'username', 'password', 'client_banner')
+PAYLOAD_HASH_FEATURES = 2 ** 14  # Largeur de l'espace de hachage
+PAYLOAD_MAX_CHARS = 2048  # Seul le début des champs démesurés est tokenisé
+
+# Mots alphanumériques et caractères spéciaux isolés (' | ; $ ( .. ) : signaux d'injection)
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+|[^a-z0-9\s]")
+
+# Encodeur JSON réutilisé pour mesurer la taille des payloads
+# (mêmes options que json.dumps par défaut)
+_payload_encoder = json.JSONEncoder()
+
+
+def _make_c_encoder():
+    """Encodeur C de json appelé directement (évite le coût fixe de json.dumps par payload)
+
+    c_make_encoder est interne à CPython et sa signature n'est pas garantie:
+    None (repli sur json.dumps) s'il manque, refuse ces arguments ou ne
+    produit pas exactement la sortie de json.dumps.
+    """
+    try:
+        encode = json_encoder.c_make_encoder(
+            {}, _payload_encoder.default, json_encoder.encode_basestring_ascii,
+            None, ': ', ', ', False, False, True
+        )
+        probe = {'path': '/é"\n', 'n': [1, 2.5, None, True], 'h': {}}
+        return encode if ''.join(encode(probe, 0)) == json.dumps(probe) else None
+    except Exception:
+        return None
+
+
+_c_encode = _make_c_encoder()
+
+
+class CategoricalEncoder:
+    """Encode une colonne catégorielle en entiers, valeur par défaut si inconnue"""
+
+    def __init__(self, mapping, default):
+        self.mapping = dict(mapping)
+        self.default = default
+
+    def transform(self, values):
+        """Encode une séquence de valeurs en un tableau d'entiers"""
+        categorical = pd.Categorical(values)
+        # Une seule recherche par catégorie distincte, puis indexation vectorisée;
+        # le code -1 (valeur manquante) tombe sur la valeur par défaut en fin de table
+        lookup = np.array(
+            [self.mapping.get(c, self.default) for c in categorical.categories] + [self.default],
+            dtype=np.int64
+        )
+        return lookup[categorical.codes]
+
+    def to_dict(self):
+        return {'mapping': self.mapping, 'default': self.default}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['mapping'], data['default'])
+
+
+def tokenize_payload(payload):
+    """Tokens préfixés par leur champ, ex: 'user_agent:sqlmap', 'query:\''"""
+    tokens = []
+    if not isinstance(payload, dict):
+        return tokens
+    for field in PAYLOAD_FIELDS:
+        value = payload.get(field)
+        if isinstance(value, str) and value:
+            tokens.extend(f"{field}:{token}" for token in
+                          _TOKEN_PATTERN.findall(value[:PAYLOAD_MAX_CHARS].lower()))
+    return tokens
+
+
+class PayloadHasher:
+    """Hache les tokens des payloads dans une matrice creuse CSR (n_menaces, n_features)
+
+    CRC32 plutôt que hash(): stable d'un processus à l'autre et reproductible
+    côté API (api/scoring.py).
+    """
+
+    def __init__(self, n_features=PAYLOAD_HASH_FEATURES):
+        self.n_features = n_features
+        self._cache = {}
+
+    def index(self, token):
+        column = self._cache.get(token)
+        if column is None:
+            if len(self._cache) > 1_000_000:
+                self._cache.clear()
+            column = self._cache[token] = zlib.crc32(token.encode('utf-8')) % self.n_features
+        return column
+
+    def transform(self, payloads):
+        """Compte des tokens hachés de chaque payload (mémoire proportionnelle aux non-zéros)"""
+        indptr = [0]
+        indices = []
+        for payload in payloads:
+            indices.extend(self.index(token) for token in tokenize_payload(payload))
+            indptr.append(len(indices))
+
+        matrix = sparse.csr_matrix(
+            (np.ones(len(indices), dtype=np.float32),
+             np.array(indices, dtype=np.int32),
+             np.array(indptr, dtype=np.int64)),
+            shape=(len(payloads), self.n_features)
+        )
+        matrix.sum_duplicates()
+        return matrix
+
+
+class FeaturePipeline:
+    """Transforme une liste de menaces (format Threat.to_dict()) en matrice de features"""
+
+    def __init__(self, service_encoder=None, attack_encoder=None, payload_hasher=None):
+        self.service_encoder = service_encoder or CategoricalEncoder(SERVICE_ENCODING, 3)
+        self.attack_encoder = attack_encoder or CategoricalEncoder(ATTACK_ENCODING, 6)
+        self.payload_hasher = payload_hasher or PayloadHasher()
+
+    def transform(self, threats):
+        """Construit la matrice (n_menaces, len(FEATURE_COLUMNS))"""
+        if not threats:
+            return None
+
+        n = len(threats)
+        features = np.empty((n, len(FEATURE_COLUMNS)), dtype=np.int64)
+
+        features[:, 0] = extract_hours([t['timestamp'] for t in threats])
+        features[:, 1] = self.service_encoder.transform([t['service'] for t in threats])
+        features[:, 2] = self.attack_encoder.transform([t['attack_type'] for t in threats])
+        features[:, 3] = np.fromiter((t['risk_score'] for t in threats), dtype=np.int64, count=n)
+        features[:, 4] = extract_ip_last_octet([t['attacker_ip'] for t in threats])
+        features[:, 5] = payload_lengths([t.get('payload', {}) for t in threats])
+        features[:, 6] = pd.Series(
+            [t.get('attacker_port', 0) for t in threats], dtype='float64'
+        ).fillna(0).to_numpy(dtype=np.int64)
+
+        return features
+
+    def transform_payloads(self, threats):
+        """Matrice creuse des tokens hachés des payloads (voir PayloadHasher)"""
+        return self.payload_hasher.transform([t.get('payload', {}) for t in threats])
+
+    def to_dict(self):
+        return {
+            'service_encoder': self.service_encoder.to_dict(),
+            'attack_encoder': self.attack_encoder.to_dict(),
+            'payload_hash_features': self.payload_hasher.n_features
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            CategoricalEncoder.from_dict(data['service_encoder']),
+            CategoricalEncoder.from_dict(data['attack_encoder']),
+            PayloadHasher(data.get('payload_hash_features', PAYLOAD_HASH_FEATURES))
+        )
+
+
+def _ascii_matrix(values, width):
+    """Vue (n, width) en octets d'une liste de chaînes ASCII (complétée par des zéros)"""
+    return np.array(values, dtype=f'S{width}').view(np.uint8).reshape(len(values), width)
+
+
+def extract_hours(timestamps):
+    """Heure de timestamps ISO 8601 (équivalent de datetime.fromisoformat(ts).hour)"""
+    try:
+        chars = _ascii_matrix(timestamps, 16)
+    except UnicodeEncodeError:
+        return pd.to_datetime(pd.Series(timestamps), format='ISO8601').dt.hour.to_numpy(dtype=np.int64)
+
+    # 'YYYY-MM-DDTHH...' : l'heure est aux positions 11-12
+    digits = chars[:, 11:13].astype(np.int64) - ord('0')
+    hours = digits[:, 0] * 10 + digits[:, 1]
+    valid = np.isin(chars[:, 10], (ord('T'), ord(' '))) & ((digits >= 0) & (digits <= 9)).all(axis=1)
+    if not valid.all():
+        # Formats atypiques (date seule, etc.): parsing complet
+        fallback = pd.Series(timestamps)[~valid]
+        hours[~valid] = pd.to_datetime(fallback, format='ISO8601').dt.hour.to_numpy()
+    return hours
+
+
+def extract_ip_last_octet(ips):
+    """Dernier octet des IPv4, 0 pour les autres adresses"""
+    try:
+        chars = _ascii_matrix(ips, 45)
+    except UnicodeEncodeError:
+        return np.array([_ip_last_octet(ip) for ip in ips], dtype=np.int64)
+
+    is_dot = chars == ord('.')
+    is_ipv4 = is_dot.sum(axis=1) == 3
+    length = (chars != 0).sum(axis=1)
+    last_dot = chars.shape[1] - 1 - np.argmax(is_dot[:, ::-1], axis=1)
+
+    # Lecture des chiffres après le dernier point
+    rows = np.arange(len(ips))
+    octet = np.zeros(len(ips), dtype=np.int64)
+    numeric = length > last_dot + 1
+    for offset in range(1, 4):
+        position = np.minimum(last_dot + offset, chars.shape[1] - 1)
+        in_octet = last_dot + offset < length
+        digit = chars[rows, position].astype(np.int64) - ord('0')
+        numeric &= ~in_octet | ((digit >= 0) & (digit <= 9))
+        octet = np.where(in_octet, octet * 10 + digit, octet)
+    numeric &= length <= last_dot + 4
+
+    result = np.where(is_ipv4, octet, 0)
+    irregular = is_ipv4 & ~numeric
+    if irregular.any():
+        # Octet non standard (zéros de tête, espaces...): même conversion que int()
+        for i in np.flatnonzero(irregular):
+            result[i] = _ip_last_octet(ips[i])
+    return result
+
+
+def _ip_last_octet(ip):
+    parts = ip.split('.')
+    return int(parts[-1]) if len(parts) == 4 else 0
+
+
+def payload_lengths(payloads, fast=True):
+    """Longueur de la sérialisation JSON de chaque payload (fast=False: json.dumps seul)"""
+    if _c_encode is None or not fast:
+        encode = _payload_encoder.encode
+        lengths = (len(encode(p)) for p in payloads)
+    else:
+        # Les scalaires passent par encode() (le chemin C n'accepte que dict/list)
+        lengths = (
+            len(''.join(_c_encode(p, 0))) if isinstance(p, (dict, list))
+            else len(_payload_encoder.encode(p))
+            for p in payloads
+        )
+    return np.fromiter(lengths, dtype=np.int64, count=len(payloads))
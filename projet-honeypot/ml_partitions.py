@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Modèles d'anomalies partitionnés
+Une Isolation Forest par service (ou par honeypot + service) au lieu d'un
+modèle global: les distributions SSH, HTTP et Telnet n'ont rien en commun.
+Les partitions sont entraînées en parallèle dans un pool de processus.
+Les tokens hachés des payloads (matrice creuse) sont réduits par SVD
+tronquée, sans jamais être densifiés, avant l'Isolation Forest.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from sklearn.decomposition import TruncatedSVD
+from sklearn.ensemble import IsolationForest
+from sklearn.preprocessing import StandardScaler
+
+# Colonnes définissant une partition, selon le mode choisi
+PARTITION_SCHEMES = {
+    'global': (),
+    'service': ('service',),
+    'honeypot_service': ('honeypot_id', 'service')
+}
+
+# Modèle de repli (partitions inconnues ou trop petites)
+GLOBAL_KEY = '*'
+
+# Nombre minimum d'échantillons pour entraîner une partition dédiée
+MIN_PARTITION_SAMPLES = 50
+
+# Dimensions conservées après réduction des features de payload
+PAYLOAD_COMPONENTS = 16
+
+
+def partition_key(threat, fields):
+    """Clé de partition d'une menace (format Threat.to_dict())"""
+    return '|'.join(str(threat.get(field, '')) for field in fields)
+
+
+def fit_partition(features, payloads=None, n_jobs=1, random_state=42):
+    """Entraîne le scaler, la SVD et l'Isolation Forest d'une partition (exécuté dans un worker)
+
+    Retourne (scaler, svd, model); svd vaut None sans features de payload.
+    """
+    scaler = StandardScaler()
+    X = scaler.fit_transform(features)
+
+    svd = None
+    if payloads is not None and payloads.nnz and min(payloads.shape) > PAYLOAD_COMPONENTS:
+        svd = TruncatedSVD(n_components=PAYLOAD_COMPONENTS, random_state=random_state)
+        with np.errstate(divide='ignore', invalid='ignore'):  # Variance nulle (payloads identiques)
+            reduced = svd.fit_transform(payloads)
+        X = np.hstack([X, reduced])
+
+    model = IsolationForest(contamination=0.1, random_state=random_state, n_jobs=n_jobs)
+    model.fit(X)
+    return scaler, svd, model
+
+
+def transform_partition(partition, features, payloads=None):
+    """Matrice d'entrée de la forêt d'une partition (mêmes étapes qu'à l'entraînement)"""
+    X = partition['scaler'].transform(features)
+    if partition.get('svd') is not None:
+        X = np.hstack([X, partition['svd'].transform(payloads)])
+    return X
+
+
+class PartitionedModel:
+    """Ensemble de modèles indexés par clé de partition, avec un modèle global de repli"""
+
+    def __init__(self, partition_by='service', min_samples=MIN_PARTITION_SAMPLES, max_workers=None):
+        if partition_by not in PARTITION_SCHEMES:
+            raise ValueError(f"Partitionnement inconnu: {partition_by} "
+                             f"(attendu: {', '.join(PARTITION_SCHEMES)})")
+        self.partition_by = partition_by
+        self.min_samples = min_samples
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.partitions = {}  # clé -> {'scaler', 'model', 'n_samples'}
+
+    @property
+    def fields(self):
+        return PARTITION_SCHEMES[self.partition_by]
+
+    def fit(self, keys, features, payloads=None):
+        """Entraîne une partition par clé (plus le modèle global) en parallèle
+
+        Args:
+            keys: tableau de clés de partition, une par ligne de features
+            features: matrice (n, n_features)
+            payloads: matrice creuse CSR des tokens de payload (optionnelle)
+        """
+        keys = np.asarray(keys, dtype=object)
+        tasks = {GLOBAL_KEY: (features, payloads)}
+        if self.fields:
+            values, inverse = np.unique(keys, return_inverse=True)
+            counts = np.bincount(inverse, minlength=len(values))
+            for code in np.flatnonzero(counts >= self.min_samples):
+                rows = np.flatnonzero(inverse == code)
+                tasks[values[code]] = (features[rows], payloads[rows] if payloads is not None else None)
+
+        # Les plus grosses partitions d'abord pour équilibrer les workers
+        order = sorted(tasks, key=lambda key: len(tasks[key][0]), reverse=True)
+        workers = min(self.max_workers, len(order))
+        # Les cœurs restants servent au parallélisme interne de chaque forêt
+        n_jobs = max(1, (os.cpu_count() or 1) // workers)
+
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = {key: pool.submit(fit_partition, *tasks[key], n_jobs) for key in order}
+                fitted = {key: future.result() for key, future in futures.items()}
+        else:
+            fitted = {key: fit_partition(*tasks[key], n_jobs) for key in order}
+
+        self.partitions = {
+            key: {'scaler': scaler, 'svd': svd, 'model': model, 'n_samples': len(tasks[key][0])}
+            for key, (scaler, svd, model) in fitted.items()
+        }
+        return self
+
+    def resolve(self, key):
+        """Clé du modèle utilisé pour une partition (repli sur le modèle global)"""
+        return key if key in self.partitions else GLOBAL_KEY
+
+    def predict(self, keys, features, payloads=None):
+        """Prédictions (-1 = anomalie) et scores, chaque ligne passant par le modèle de sa partition
+
+        Retourne (predictions, scores, modèle utilisé par ligne).
+        """
+        keys = np.asarray(keys, dtype=object)
+        predictions = np.ones(len(features), dtype=np.int64)
+        scores = np.zeros(len(features), dtype=np.float64)
+        used = np.empty(len(features), dtype=object)
+        if len(features) == 0:
+            return predictions, scores, used
+
+        values, inverse = np.unique(keys, return_inverse=True)
+        for code, value in enumerate(values):
+            rows = np.flatnonzero(inverse == code)
+            key = self.resolve(value)
+            partition = self.partitions[key]
+            X = transform_partition(partition, features[rows],
+                                    payloads[rows] if payloads is not None else None)
+            predictions[rows] = partition['model'].predict(X)
+            scores[rows] = partition['model'].score_samples(X)
+            used[rows] = key
+        return predictions, scores, used
+
+    def to_dict(self):
+        return {'partition_by': self.partition_by, 'partitions': self.partitions}
+
+    @classmethod
+    def from_dict(cls, data, **kwargs):
+        partitioned = cls(data['partition_by'], **kwargs)
+        partitioned.partitions = data['partitions']
+        return partitioned
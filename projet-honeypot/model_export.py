@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Export du modèle d'anomalies dans un format portable (JSON)
+Permet à l'API de scorer chaque menace à l'ingestion sans scikit-learn:
+encodeurs, normalisation et arbres des Isolation Forest (une par partition)
+sont aplatis en tableaux simples (voir api/scoring.py pour la lecture).
+"""
+
+import json
+import math
+import os
+from datetime import datetime
+
+import numpy as np
+
+SCORING_MODEL_FILE = 'scoring_model.json'
+SCORING_FORMAT = 3
+
+
+def average_path_length(n):
+    """Longueur moyenne d'un chemin infructueux dans un BST de n éléments (c(n) du papier)"""
+    if n <= 1:
+        return 0.0
+    if n == 2:
+        return 1.0
+    return 2.0 * (math.log(n - 1.0) + np.euler_gamma) - 2.0 * (n - 1.0) / n
+
+
+def export_tree(tree, features):
+    """Aplatit un arbre d'isolation
+
+    Les indices de features sont résolus vers les colonnes d'origine et chaque
+    feuille porte directement sa contribution à la profondeur:
+    profondeur + c(nombre d'échantillons dans la feuille).
+    """
+    structure = tree.tree_
+    left = structure.children_left.tolist()
+    right = structure.children_right.tolist()
+    n_samples = structure.n_node_samples.tolist()
+
+    depths = [0] * structure.node_count
+    stack = [0]
+    while stack:
+        node = stack.pop()
+        if left[node] != -1:
+            depths[left[node]] = depths[right[node]] = depths[node] + 1
+            stack.extend((left[node], right[node]))
+
+    is_leaf = [child == -1 for child in left]
+    return {
+        'left': left,
+        'right': right,
+        'feature': [int(features[f]) if not leaf else -1
+                    for f, leaf in zip(structure.feature.tolist(), is_leaf)],
+        'threshold': [float(t) for t in structure.threshold.tolist()],
+        'value': [depths[node] + average_path_length(n_samples[node]) if is_leaf[node] else 0.0
+                  for node in range(structure.node_count)]
+    }
+
+
+def export_components(svd):
+    """Projection SVD des tokens de payload: colonne hachée -> poids des composantes
+
+    Seules les colonnes vues à l'entraînement ont des poids non nuls.
+    """
+    if svd is None:
+        return {}
+    weights = svd.components_.T
+    used = np.flatnonzero(np.abs(weights).sum(axis=1) > 0)
+    return {str(column): weights[column].tolist() for column in used.tolist()}
+
+
+def export_forest(scaler, svd, model):
+    """Aplatit le scaler, la réduction des payloads et la forêt d'une partition"""
+    return {
+        'scaler': {
+            'mean': scaler.mean_.tolist(),
+            'scale': scaler.scale_.tolist()
+        },
+        'payload_components': export_components(svd),
+        'n_components': svd.n_components if svd is not None else 0,
+        'offset': float(model.offset_),
+        'normalizer': len(model.estimators_) * average_path_length(model.max_samples_),
+        'trees': [
+            export_tree(tree, features)
+            for tree, features in zip(model.estimators_, model.estimators_features_)
+        ]
+    }
+
+
+def build_scoring_model(version, pipeline, partitioned):
+    """Construit le dictionnaire du modèle portable (un modèle par partition)"""
+    return {
+        'format': SCORING_FORMAT,
+        'version': version,
+        'exported_at': datetime.utcnow().isoformat(),
+        'encoders': pipeline.to_dict(),
+        'partition_fields': list(partitioned.fields),
+        'models': {
+            key: export_forest(partition['scaler'], partition.get('svd'), partition['model'])
+            for key, partition in partitioned.partitions.items()
+        }
+    }
+
+
+def export_scoring_model(model_dir, version, pipeline, partitioned):
+    """Écrit le modèle portable de façon atomique (rechargé à chaud par l'API)"""
+    path = os.path.join(model_dir, SCORING_MODEL_FILE)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(build_scoring_model(version, pipeline, partitioned), f)
+    os.replace(tmp_path, path)
+    return path
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+Rejeu d'attacks.log vers l'API
+Relit un ou plusieurs journaux d'attaques du honeypot (JSON lines, y compris
+les fichiers rotatés et compressés .gz d'un répertoire) et les renvoie vers
+POST /api/threats, en respectant les écarts de temps d'origine accélérés d'un
+facteur --speed, ou aussi vite que possible (--speed 0). La lecture est en
+flux: la mémoire reste bornée par --concurrency quelle que soit la taille des
+journaux.
+
+Sert au test de capacité de l'ingestion et au backfill d'une base vide.
+Rapporte le débit d'ingestion soutenu, les latences p50/p99 et les erreurs.
+
+Usage: python replay_attacks.py honeypot/logs/attacks.log [--speed 60] [--concurrency 50]
+       python replay_attacks.py /app/logs --speed 0 --api-url http://localhost:5000
+"""
+
+import argparse
+import asyncio
+import gzip
+import json
+import os
+import statistics
+import time
+from collections import Counter
+from datetime import datetime
+
+import aiohttp
+
+from load_stats import OutcomeStats
+
+API_URL = "http://localhost:5000"
+LOG_PREFIX = "attacks.log"
+
+
+def open_log(path):
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8', errors='replace')
+    return open(path, 'r', encoding='utf-8', errors='replace')
+
+
+def first_timestamp(path):
+    """Horodatage du premier événement valide d'un journal (None si vide)"""
+    with open_log(path) as f:
+        for line in f:
+            try:
+                return datetime.fromisoformat(json.loads(line)['timestamp'])
+            except (ValueError, KeyError, TypeError):
+                continue
+    return None
+
+
+def collect_logs(paths):
+    """Fichiers à rejouer, du plus ancien au plus récent
+
+    Un répertoire est remplacé par ses attacks.log* (attacks.log.1, .2.gz,
+    attacks.log.2025-07-01...), sans les index .idx de search_attacks.py. Quelle que soit la convention de rotation,
+    l'ordre chronologique est donné par le premier événement de chaque fichier.
+    """
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(os.path.join(path, name) for name in os.listdir(path)
+                         if name.startswith(LOG_PREFIX) and not name.endswith(('.idx', '.tmp')))
+        else:
+            files.append(path)
+
+    dated = []
+    for path in files:
+        start = first_timestamp(path)
+        if start is not None:
+            dated.append((start, path))
+    return [path for _, path in sorted(dated)]
+
+
+def iter_events(files, counters):
+    """Événements des journaux dans l'ordre, lignes invalides comptées et ignorées"""
+    for path in files:
+        with open_log(path) as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    event = json.loads(line)
+                    timestamp = datetime.fromisoformat(event['timestamp'])
+                except (ValueError, KeyError, TypeError):
+                    counters['invalid'] += 1
+                    continue
+                # Les étapes tracées à la capture d'origine fausseraient /api/traces/latency
+                event.pop('trace', None)
+                yield timestamp, event
+
+
+class Replayer:
+    """Envoie les événements vers l'API avec une concurrence bornée"""
+
+    def __init__(self, api_url=API_URL, speed=1.0, concurrency=50, timeout=10.0,
+                 max_gap=None, shift_to_now=False):
+        if speed < 0:
+            raise ValueError("--speed doit être positif (0 = aussi vite que possible)")
+        if concurrency < 1:
+            raise ValueError("--concurrency doit être au moins 1")
+        self.url = f"{api_url.rstrip('/')}/api/threats"
+        self.speed = speed
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.max_gap = max_gap
+        self.shift_to_now = shift_to_now
+
+        self.stats = OutcomeStats(('total', 'lag'))
+        self.counters = Counter()  # lignes invalides...
+        self.completed = Counter()  # seconde depuis le début -> menaces ingérées
+
+    async def _send(self, session, event, semaphore, started):
+        start = time.perf_counter()
+        try:
+            async with session.post(self.url, json=event) as response:
+                await response.read()
+                if response.status == 201:
+                    self.stats.ok += 1
+                    self.stats.record('total', time.perf_counter() - start)
+                    self.completed[int(time.perf_counter() - started)] += 1
+                else:
+                    self.stats.error(f"http_{response.status}")
+        except asyncio.TimeoutError:
+            self.stats.error('timeout')
+        except aiohttp.ClientConnectionError:
+            self.stats.error('connection')
+        except aiohttp.ClientError as e:
+            self.stats.error(type(e).__name__)
+        finally:
+            semaphore.release()
+
+    async def _progress(self, started, interval):
+        while True:
+            await asyncio.sleep(interval)
+            elapsed = time.perf_counter() - started
+            print(f"   ⏱️  {elapsed:6.0f}s: {self.stats.attempts} envoyées, {self.stats.ok} ingérées, "
+                  f"{self.stats.failed} erreurs ({self.stats.ok / elapsed:.0f}/s)")
+
+    async def run(self, events, limit=None, progress=5.0):
+        """Rejoue `events` ((timestamp, événement) dans l'ordre), retourne la durée totale"""
+        semaphore = asyncio.Semaphore(self.concurrency)
+        tasks = set()
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        connector = aiohttp.TCPConnector(limit=self.concurrency)
+
+        async with aiohttp.ClientSession(timeout=timeout, connector=connector) as session:
+            started = time.perf_counter()
+            reporter = asyncio.create_task(self._progress(started, progress)) if progress else None
+            origin = previous = None
+            offset = 0.0  # secondes de journal écoulées, trous plafonnés par max_gap
+            shift = None
+
+            for timestamp, event in events:
+                if limit is not None and self.stats.attempts >= limit:
+                    break
+                if origin is None:
+                    origin = previous = timestamp
+                    if self.shift_to_now:
+                        shift = datetime.utcnow() - timestamp  # Même horloge que le honeypot
+
+                if self.speed:
+                    gap = (timestamp - previous).total_seconds()
+                    if self.max_gap is not None:
+                        gap = min(gap, self.max_gap)
+                    # Journaux rotatés qui se chevauchent: pas de retour en arrière
+                    offset += max(gap, 0.0)
+                    previous = max(previous, timestamp)
+                    due = started + offset / self.speed
+                    delay = due - time.perf_counter()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+
+                # Concurrence maximale atteinte: la lecture du journal attend aussi
+                await semaphore.acquire()
+                if self.speed:
+                    self.stats.record('lag', max(time.perf_counter() - due, 0.0))
+                if shift is not None:
+                    event = {**event, 'timestamp': (timestamp + shift).isoformat()}
+                self.stats.attempts += 1
+                task = asyncio.create_task(self._send(session, event, semaphore, started))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+
+            if tasks:
+                await asyncio.wait(tasks)
+            if reporter:
+                reporter.cancel()
+            return time.perf_counter() - started
+
+    def sustained_rate(self):
+        """Débit médian par seconde pleine (hors première et dernière secondes, incomplètes)"""
+        if not self.completed:
+            return 0.0
+        last = max(self.completed)
+        seconds = [self.completed[second] for second in range(1, last)]
+        if not seconds:
+            return float(sum(self.completed.values()))
+        return statistics.median(seconds)
+
+
+def print_report(replayer, elapsed):
+    stats = replayer.stats
+    latency = stats.latencies['total'].summary()
+    print(f"\n📊 {stats.attempts} menaces rejouées en {elapsed:.1f}s")
+    if replayer.counters['invalid']:
+        print(f"   ⚠️  {replayer.counters['invalid']} lignes invalides ignorées")
+    print(f"   Ingérées: {stats.ok} | Erreurs: {stats.failed} ({stats.error_rate():.2%})")
+    print(f"   Débit moyen: {stats.ok / elapsed:.1f}/s | soutenu (médiane par seconde): "
+          f"{replayer.sustained_rate():.1f}/s")
+    print(f"   Latence POST /api/threats: p50 {latency['p50_ms']:.1f} ms | p99 {latency['p99_ms']:.1f} ms "
+          f"| max {latency['max_ms']:.1f} ms")
+    if replayer.speed:
+        lag = stats.latencies['lag'].summary()
+        print(f"   Retard sur le temps d'origine x{replayer.speed:g}: p50 {lag['p50_ms']:.1f} ms "
+              f"| p99 {lag['p99_ms']:.1f} ms")
+        if lag['p99_ms'] > 1000:
+            print("   ⚠️  Le rejeu ne tient pas la cadence: augmentez --concurrency ou réduisez --speed")
+    for kind, count in stats.errors.most_common():
+        print(f"   ❌ {kind}: {count}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('paths', nargs='+', help='attacks.log, fichiers rotatés ou répertoires de logs')
+    parser.add_argument('--api-url', default=os.environ.get('API_URL', API_URL))
+    parser.add_argument('--speed', type=float, default=1.0,
+                        help="facteur d'accélération du temps d'origine (0 = aussi vite que possible)")
+    parser.add_argument('--concurrency', type=int, default=50, help='requêtes simultanées maximum')
+    parser.add_argument('--timeout', type=float, default=10.0, help='timeout (s) par requête')
+    parser.add_argument('--max-gap', type=float, default=None,
+                        help="écart maximal (s, temps d'origine) entre deux événements")
+    parser.add_argument('--shift-to-now', action='store_true',
+                        help='décale les horodatages pour que le rejeu commence maintenant')
+    parser.add_argument('--limit', type=int, default=None, help="nombre maximal d'événements")
+    parser.add_argument('--progress', type=float, default=5.0, help='intervalle (s) de progression (0 = aucune)')
+    args = parser.parse_args()
+
+    try:
+        replayer = Replayer(args.api_url, args.speed, args.concurrency, args.timeout,
+                            args.max_gap, args.shift_to_now)
+    except ValueError as e:
+        parser.error(str(e))
+    for path in args.paths:
+        if not os.path.exists(path):
+            parser.error(f"introuvable: {path}")
+
+    files = collect_logs(args.paths)
+    if not files:
+        print("❌ Aucun événement à rejouer")
+        return
+
+    print("🔁 Rejeu des attaques vers l'API")
+    print(f"   Cible: {replayer.url}")
+    print(f"   Journaux: {', '.join(files)}")
+    print(f"   Vitesse: {'maximum' if not args.speed else f'x{args.speed:g}'} | concurrence {args.concurrency}")
+    elapsed = asyncio.run(replayer.run(iter_events(files, replayer.counters), args.limit, args.progress))
+    print_report(replayer, elapsed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Recherche hors ligne dans les journaux d'attaques
+Quand l'API est arrêtée ou que les données ont dépassé la rétention, il ne
+reste qu'attacks.log et ses segments rotatés. Chaque segment reçoit un index
+voisin (<segment>.idx, voir honeypot/log_index.py): blocs horodatés et
+positions des lignes par IP. Les recherches vont lire les lignes utiles dans
+le segment projeté en mémoire au lieu de parcourir tout le journal.
+
+Les index sont créés (ou complétés pour le journal en cours) avant chaque
+recherche; le honeypot indexe lui-même un segment quand il le rotate. Les
+segments .gz ne sont pas indexables et sont lus en entier.
+
+Usage: python search_attacks.py index honeypot/logs
+       python search_attacks.py events honeypot/logs --ip 203.0.113.7 --since 2025-07-01 --until 2025-07-02
+       python search_attacks.py count honeypot/logs --by attack_type --since 2025-07-01T12:00
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'honeypot'))
+
+from log_index import BLOCK_LINES, LogSearch, build_index, list_segments, to_epoch  # noqa: E402
+
+
+def parse_time(value):
+    try:
+        return to_epoch(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"date ISO attendue (2025-07-01 ou 2025-07-01T12:00): {value}")
+
+
+def report(search, elapsed):
+    """Volume lu face au volume des segments (sur stderr: stdout reste exploitable)"""
+    stats = search.stats
+    total = max(stats['total_bytes'], 1)
+    print(f"🔎 {stats['segments']} segments ({stats['scanned_segments']} lus en entier), "
+          f"{stats['blocks']} blocs lus, {stats['counted_blocks']} blocs comptés depuis l'index, "
+          f"{stats['lines']} lignes, {stats['bytes_read'] / 2**20:.1f}/{stats['total_bytes'] / 2**20:.1f} Mo "
+          f"({100 * stats['bytes_read'] / total:.2f}%) en {elapsed * 1000:.0f} ms",
+          file=sys.stderr)
+
+
+def cmd_index(args):
+    for segment in list_segments(args.paths):
+        start = time.perf_counter()
+        index = build_index(segment, args.block_lines)
+        if index is None:
+            print(f"⏭️  {segment}: compressé, non indexé")
+            continue
+        size = os.path.getsize(index.path)
+        print(f"✅ {segment}: {len(index.blocks)} blocs, {index.ips} IP, "
+              f"index {size / 1024:.0f} Ko pour {index.size / 2**20:.1f} Mo "
+              f"({time.perf_counter() - start:.2f}s)")
+
+
+def cmd_events(args):
+    start = time.perf_counter()
+    search = LogSearch(args.paths, update=not args.no_update, block_lines=args.block_lines)
+    shown = 0
+    for event in search.events(args.ip, args.since, args.until, args.type):
+        print(json.dumps(event))
+        shown += 1
+        if args.limit and shown >= args.limit:
+            break
+    report(search, time.perf_counter() - start)
+    print(f"📄 {shown} événements", file=sys.stderr)
+
+
+def cmd_count(args):
+    start = time.perf_counter()
+    search = LogSearch(args.paths, update=not args.no_update, block_lines=args.block_lines)
+    counts = search.count(args.by, args.ip, args.since, args.until, args.type)
+    if args.json:
+        print(json.dumps(dict(counts.most_common())))
+    else:
+        width = max((len(value) for value in counts), default=10)
+        for value, count in counts.most_common():
+            print(f"{value:<{width}} {count:>10}")
+        print(f"{'total':<{width}} {sum(counts.values()):>10}")
+    report(search, time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    def add_common(command):
+        command.add_argument('paths', nargs='+', help="Journaux ou répertoires de journaux")
+        command.add_argument('--block-lines', type=int, default=BLOCK_LINES,
+                             help="Lignes par bloc de l'index (nouveaux index)")
+        return command
+
+    add_common(commands.add_parser('index', help="Crée ou complète les index"))
+
+    for name, help_text in (('events', "Événements correspondants (JSON lines)"),
+                            ('count', "Comptage par valeur d'un champ")):
+        command = add_common(commands.add_parser(name, help=help_text))
+        command.add_argument('--ip', help="Adresse de l'attaquant")
+        command.add_argument('--since', type=parse_time, help="Début inclus (UTC)")
+        command.add_argument('--until', type=parse_time, help="Fin exclue (UTC)")
+        command.add_argument('--type', help="Type d'attaque")
+        command.add_argument('--no-update', action='store_true',
+                             help="Utilise les index existants sans les compléter")
+        if name == 'events':
+            command.add_argument('--limit', type=int, default=0)
+        else:
+            command.add_argument('--by', default='attack_type',
+                                 help="Champ de regroupement (attack_type, service, honeypot_id: depuis l'index)")
+            command.add_argument('--json', action='store_true')
+
+    args = parser.parse_args()
+    {'index': cmd_index, 'events': cmd_events, 'count': cmd_count}[args.command](args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Fouille incrémentale des séquences d'attaque
+Compte les n-grammes de types d'attaque de chaque IP dans un arbre de
+préfixes mis à jour au fil des nouvelles menaces (seules les menaces
+postérieures au watermark sont traitées) et persisté entre deux analyses.
+"""
+
+import heapq
+import json
+import os
+
+SEQUENCE_FORMAT = 1
+
+
+class SequenceMiner:
+    """Arbre de préfixes des n-grammes (longueur 1 à max_n) de types d'attaque par IP
+
+    Chaque nœud de profondeur k compte le n-gramme de longueur k formé par
+    le chemin depuis la racine. Pour chaque IP, seuls les max_n - 1 derniers
+    types d'attaque sont conservés (la "queue") pour prolonger les séquences.
+    """
+
+    def __init__(self, max_n=3, min_support=2, tail_ttl_us=24 * 3600 * 1_000_000):
+        self.max_n = max_n
+        self.min_support = min_support
+        self.tail_ttl_us = tail_ttl_us
+
+        self.tokens = []  # token -> type d'attaque
+        self._token_ids = {}
+        self.root = [0, {}]  # [compteur, enfants par token]
+        self.tails = {}  # ip -> [tokens récents, timestamp du dernier]
+        self.watermark = 0  # Plus grand id de menace traité
+
+    # === Mise à jour ===
+
+    def update(self, ids, timestamps, ips, attack_types):
+        """Ajoute des menaces triées chronologiquement (déjà vues: ignorées)
+
+        Args (listes Python, pour rester sérialisables en JSON):
+            ids: ids des menaces
+            timestamps: timestamps epoch en microsecondes
+            ips: IP attaquante de chaque menace
+            attack_types: type d'attaque de chaque menace
+
+        Retourne le nombre de menaces ajoutées.
+        """
+        token_ids = self._token_ids
+        tails = self.tails
+        root = self.root
+        keep = self.max_n - 1
+        added = 0
+        watermark = self.watermark
+
+        for threat_id, timestamp, ip, attack_type in zip(ids, timestamps, ips, attack_types):
+            if threat_id <= self.watermark:
+                continue
+            token = token_ids.get(attack_type)
+            if token is None:
+                token = token_ids[attack_type] = len(self.tokens)
+                self.tokens.append(attack_type)
+
+            state = tails.get(ip)
+            if state is None or timestamp - state[1] > self.tail_ttl_us:
+                tail = []
+                state = tails[ip] = [tail, timestamp]
+            else:
+                tail = state[0]
+                state[1] = timestamp
+
+            # Nouveaux n-grammes: ceux qui se terminent par cette menace
+            tail.append(token)
+            for start in range(len(tail)):
+                node = root
+                for t in tail[start:]:
+                    children = node[1]
+                    child = children.get(t)
+                    if child is None:
+                        child = children[t] = [0, {}]
+                    node = child
+                node[0] += 1
+            root[0] += 1
+            if len(tail) > keep:
+                del tail[0]
+
+            watermark = max(watermark, threat_id)
+            added += 1
+
+        self.watermark = watermark
+        return added
+
+    def prune(self, now_us):
+        """Oublie les queues des IPs inactives depuis plus de tail_ttl_us"""
+        expired = [ip for ip, (_, last) in self.tails.items() if now_us - last > self.tail_ttl_us]
+        for ip in expired:
+            del self.tails[ip]
+        return len(expired)
+
+    # === Requêtes ===
+
+    def count(self, sequence):
+        """Nombre d'occurrences d'une séquence de types d'attaque"""
+        node = self.root
+        for attack_type in sequence:
+            token = self._token_ids.get(attack_type)
+            node = node[1].get(token) if token is not None else None
+            if node is None:
+                return 0
+        return node[0]
+
+    def top_k(self, n=2, k=5, min_support=None):
+        """Les k séquences de longueur n les plus fréquentes
+
+        Retourne une liste de (séquence, occurrences) au-dessus du support minimum.
+        """
+        if not 1 <= n <= self.max_n:
+            raise ValueError(f"Longueur de séquence hors limites: {n} (1 à {self.max_n})")
+        threshold = self.min_support if min_support is None else min_support
+
+        candidates = []
+        stack = [(self.root, ())]
+        while stack:
+            node, path = stack.pop()
+            for token, child in node[1].items():
+                # Le compteur d'un préfixe majore ceux de ses extensions
+                if child[0] < threshold:
+                    continue
+                if len(path) + 1 == n:
+                    candidates.append((child[0], path + (token,)))
+                else:
+                    stack.append((child, path + (token,)))
+
+        return [
+            ([self.tokens[t] for t in tokens], count)
+            for count, tokens in heapq.nlargest(k, candidates)
+        ]
+
+    # === Persistance ===
+
+    def to_dict(self):
+        return {
+            'format': SEQUENCE_FORMAT,
+            'max_n': self.max_n,
+            'min_support': self.min_support,
+            'tail_ttl_us': self.tail_ttl_us,
+            'tokens': self.tokens,
+            'root': _encode_node(self.root),
+            'tails': self.tails,
+            'watermark': self.watermark
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        miner = cls(data['max_n'], data['min_support'], data['tail_ttl_us'])
+        miner.tokens = data['tokens']
+        miner._token_ids = {attack_type: token for token, attack_type in enumerate(miner.tokens)}
+        miner.root = _decode_node(data['root'])
+        miner.tails = data['tails']
+        miner.watermark = data['watermark']
+        return miner
+
+    def save(self, path):
+        """Écriture atomique (fichier temporaire puis os.replace)"""
+        with open(f"{path}.tmp", 'w') as f:
+            json.dump(self.to_dict(), f)
+        os.replace(f"{path}.tmp", path)
+
+    @classmethod
+    def load(cls, path, max_n=3, min_support=2):
+        """Recharge l'arbre persisté, ou en crée un vide (aussi si max_n a changé)"""
+        if os.path.exists(path):
+            with open(path) as f:
+                data = json.load(f)
+            if data.get('format') == SEQUENCE_FORMAT and data['max_n'] == max_n:
+                miner = cls.from_dict(data)
+                miner.min_support = min_support
+                return miner
+        return cls(max_n, min_support)
+
+
+def _encode_node(node):
+    """Nœud -> [compteur, {token (str): enfant}] (les clés JSON sont des chaînes)"""
+    return [node[0], {str(token): _encode_node(child) for token, child in node[1].items()}]
+
+
+def _decode_node(data):
+    return [data[0], {int(token): _decode_node(child) for token, child in data[1].items()}]
